@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from backend.models.debug_model import ProfilerToggle
+from backend.services.loop_monitor import EventLoopMonitor
+from backend.services.profiler import SamplingProfiler
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+
+def get_profiler(request: Request) -> SamplingProfiler:
+    return request.app.state.profiler  # type: ignore[attr-defined]
+
+
+def get_loop_monitor(request: Request) -> EventLoopMonitor:
+    return request.app.state.loop_monitor  # type: ignore[attr-defined]
+
+
+@router.get("/profiler")
+async def profiler_status(profiler: SamplingProfiler = Depends(get_profiler)) -> dict:
+    return profiler.stats()
+
+
+@router.post("/profiler")
+async def toggle_profiler(payload: ProfilerToggle, profiler: SamplingProfiler = Depends(get_profiler)) -> dict:
+    if payload.reset:
+        profiler.reset()
+    if payload.enabled:
+        profiler.start(payload.interval_ms / 1000.0 if payload.interval_ms else None)
+    else:
+        profiler.stop()
+    return profiler.stats()
+
+
+@router.get("/profiler/stacks", response_class=PlainTextResponse)
+async def profiler_stacks(
+    limit: int = Query(0, ge=0, description="Only the N busiest stacks; 0 returns all"),
+    profiler: SamplingProfiler = Depends(get_profiler),
+) -> str:
+    """Collapsed stacks, ready for flamegraph.pl or speedscope."""
+    return profiler.collapsed(limit)
+
+
+@router.get("/event-loop")
+async def event_loop_status(monitor: EventLoopMonitor = Depends(get_loop_monitor)) -> dict:
+    """Event-loop lag: recent percentiles, stall count and total blocked time."""
+    return monitor.stats()
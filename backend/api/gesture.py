@@ -1,20 +1,25 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import Response
+import asyncio
+import time
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+
+from backend.api.sessions import get_session
 from backend.models.gesture_model import GestureStatus, GestureToggle
 from backend.services.ai_loop import AILoopService, GestureState
+from backend.services.preview import MJPEG_BOUNDARY
+from backend.services.sessions import Session
 
 router = APIRouter(prefix="/api/gesture", tags=["gesture"])
 
 
-def get_state(request: Request) -> GestureState:
-    state: GestureState = request.app.state.gesture_state  # type: ignore[attr-defined]
-    return state
+def get_state(session: Session = Depends(get_session)) -> GestureState:
+    return session.gesture_state
 
 
-def get_loop(request: Request) -> AILoopService:
-    loop: AILoopService = request.app.state.ai_loop  # type: ignore[attr-defined]
-    return loop
+def get_loop(session: Session = Depends(get_session)) -> AILoopService:
+    return session.ai_loop
 
 
 @router.get("", response_model=GestureStatus)
@@ -38,6 +43,51 @@ async def toggle_gesture(
 
 @router.get("/frame")
 async def preview_frame(state: GestureState = Depends(get_state)) -> Response:
-    if state.last_frame_jpeg is None:
+    # Encoding is synchronous; keep it off the event loop like ``PreviewHub.stream`` does.
+    encoded = await asyncio.to_thread(state.preview.encode)
+    if encoded is None:
         return Response(status_code=204)
-    return Response(content=state.last_frame_jpeg, media_type="image/jpeg")
+    return Response(content=encoded[1], media_type="image/jpeg")
+
+
+@router.get("/preview.mjpg")
+async def preview_stream(
+    width: int = Query(0, ge=0, description="Downscale to this width; 0 keeps the source size"),
+    quality: int = Query(70, ge=10, le=95),
+    max_fps: float = Query(0.0, ge=0.0, description="Cap on frames per second; 0 follows the AI loop"),
+    state: GestureState = Depends(get_state),
+) -> StreamingResponse:
+    return StreamingResponse(
+        state.preview.mjpeg(width=width, quality=quality, max_fps=max_fps),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get("/stats")
+async def pipeline_stats(loop: AILoopService = Depends(get_loop)) -> dict:
+    return loop.stats()
+
+
+@router.get("/history")
+async def gesture_history(
+    seconds: float = Query(60.0, gt=0, description="Window length ending at `end`; ignored when `start` is set"),
+    start: Optional[float] = Query(None, description="Window start, Unix seconds"),
+    end: Optional[float] = Query(None, description="Window end, Unix seconds; defaults to now"),
+    events: bool = Query(True, description="Include the raw prediction/action columns"),
+    aggregate: bool = Query(True, description="Include per-gesture counts, dwell time and trigger rate"),
+    limit: int = Query(1000, ge=0, description="Newest events to return per kind; 0 = all"),
+    state: GestureState = Depends(get_state),
+) -> dict:
+    if start is None:
+        start = (end if end is not None else time.time()) - seconds
+    return state.timeline.query(start=start, end=end, events=events, aggregate=aggregate, limit=limit)
+
+
+@router.get("/governor")
+async def governor_state(loop: AILoopService = Depends(get_loop)) -> dict:
+    """Current quality level and recent decisions of the latency governor."""
+    stats = loop.governor_stats()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Latency governor is disabled")
+    return stats
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from backend.models.mapping_model import ActionType, GestureMapping, MappingConfig
 from backend.services.ai_loop import AILoopService
 from backend.services.keyboard_service import KeyboardService
+from backend.services.mapping_engine import MappingValidationError
 
 router = APIRouter(prefix="/api/keyboard", tags=["keyboard"])
 
@@ -17,5 +18,17 @@ def get_loop(request: Request) -> AILoopService:
 
 @router.post("/press")
 async def press_key(mapping: GestureMapping, keyboard: KeyboardService = Depends(get_keyboard)) -> dict:
-    keyboard.press_action(mapping)
+    try:
+        compiled = keyboard.compile(mapping)
+    except MappingValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+    if not keyboard.enabled:
+        return {"status": "disabled"}
+    if not await keyboard.press_compiled_async(compiled):
+        raise HTTPException(status_code=503, detail="Key action was not performed")
     return {"status": "ok"}
+
+
+@router.post("/cancel")
+async def cancel_pending(keyboard: KeyboardService = Depends(get_keyboard)) -> dict:
+    return {"status": "ok", "cancelled": keyboard.cancel_pending()}
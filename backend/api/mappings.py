@@ -1,23 +1,21 @@
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
 
+from backend.api.sessions import get_session
 from backend.models.mapping_model import GestureMapping, MappingConfig
-from backend.services.ai_loop import AILoopService
+from backend.services.mapping_engine import MappingValidationError
+from backend.services.sessions import Session
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 
-def get_paths(request: Request) -> Path:
-    return Path(request.app.state.mappings_path)  # type: ignore[attr-defined]
+def get_paths(session: Session = Depends(get_session)) -> Path:
+    return Path(session.mappings_path)
 
 
-def get_loop(request: Request) -> AILoopService:
-    return request.app.state.ai_loop  # type: ignore[attr-defined]
-
-
-def get_config(request: Request) -> MappingConfig:
-    return request.app.state.mapping_config  # type: ignore[attr-defined]
+def get_config(session: Session = Depends(get_session)) -> MappingConfig:
+    return session.mapping_config
 
 
 def _save_config(path: Path, config: MappingConfig) -> None:
@@ -34,10 +32,11 @@ async def read_mappings(config: MappingConfig = Depends(get_config)) -> MappingC
 async def update_mappings(
     payload: MappingConfig,
     path: Path = Depends(get_paths),
-    loop: AILoopService = Depends(get_loop),
-    request: Request = None,
+    session: Session = Depends(get_session),
 ) -> MappingConfig:
+    try:
+        session.update_mappings(payload)
+    except MappingValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
     _save_config(path, payload)
-    loop.update_mappings(payload)
-    request.app.state.mapping_config = payload  # type: ignore[attr-defined]
     return payload
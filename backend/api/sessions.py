@@ -0,0 +1,69 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+
+from backend.models.session_model import SessionCreate, SessionInfo, SessionList
+from backend.services.sessions import (
+    DEFAULT_SESSION,
+    Session,
+    SessionCapacityError,
+    SessionExistsError,
+    SessionManager,
+)
+
+router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+
+
+def get_manager(request: Request) -> SessionManager:
+    return request.app.state.sessions  # type: ignore[attr-defined]
+
+
+def get_session(
+    session: str = Query(DEFAULT_SESSION, description="Session (station) id"),
+    manager: SessionManager = Depends(get_manager),
+) -> Session:
+    try:
+        return manager.get(session)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown session '{session}'")
+
+
+@router.get("", response_model=SessionList)
+async def list_sessions(manager: SessionManager = Depends(get_manager)) -> SessionList:
+    return SessionList(
+        sessions=[SessionInfo(**s.info()) for s in manager.sessions()],
+        capacity=manager.capacity,
+    )
+
+
+@router.post("", response_model=SessionInfo, status_code=201)
+async def create_session(payload: SessionCreate, request: Request) -> SessionInfo:
+    manager = get_manager(request)
+    build = request.app.state.session_factory  # type: ignore[attr-defined]
+    try:
+        # Building a session reads files and spawns a worker; keep that off the event loop.
+        session = await asyncio.to_thread(manager.create, payload.session_id, lambda sid, cpu: build(payload, cpu))
+    except SessionExistsError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except SessionCapacityError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except ValidationError as exc:
+        # e.g. a malformed saved mappings file for this session id
+        raise HTTPException(status_code=422, detail=exc.errors())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    session.ai_loop.start()
+    return SessionInfo(**session.info())
+
+
+@router.delete("/{session_id}")
+async def delete_session(session_id: str, manager: SessionManager = Depends(get_manager)) -> dict:
+    if session_id == DEFAULT_SESSION:
+        raise HTTPException(status_code=400, detail="The default session cannot be removed")
+    try:
+        # Stopping joins the session's worker process, which can take seconds.
+        await asyncio.to_thread(manager.remove, session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown session '{session_id}'")
+    return {"status": "ok"}
@@ -0,0 +1,481 @@
+"""Ramp concurrent REST and WebSocket clients against the backend and report how it copes.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.load --levels 1,10,50 --level-seconds 10 --output load.json
+    python -m backend.benchmarks.load --url http://localhost:8000 --clients ws,press
+
+Without ``--url`` the app is served in-process by uvicorn on a free local
+port, with a synthetic frame source and the no-op keyboard backend (set
+``FRAME_SOURCE``/``KEYBOARD_BACKEND`` etc. to override). The clients share
+that process's CPU and GIL, so for cleaner numbers start the server
+separately with ``FRAME_SOURCE=synthetic KEYBOARD_BACKEND=null`` and pass ``--url``.
+
+At each level, N clients of every kind in ``--clients`` run for ``--level-seconds``:
+
+- ``ws``: ``/ws/gestures`` subscribers; message rate and lag (receive time minus prediction time)
+- ``frame``: ``/api/gesture/frame`` pollers, one request every ``--frame-interval``
+- ``press``: ``/api/keyboard/press`` callers, one request every ``--press-interval``
+
+Each level also reports event-loop blocking, AI-loop FPS and capture-to-prediction
+latency, diffed from ``/metrics`` histograms. A level is marked ``degraded`` when the
+AI loop's p95 latency or FPS is worse than the first level's by more than ``--tolerance``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from backend.services.pipeline import percentile
+
+CLIENT_KINDS = ("ws", "frame", "press")
+PRESS_BODY = json.dumps({"gesture": "load_test", "action": "space", "action_type": "key"}).encode()
+
+Histogram = List[Tuple[float, float]]  # cumulative (upper bound, count)
+_BUCKET = re.compile(r'^gesture_(\w+)_bucket\{(.*?),?le="([^"]+)"\} (\S+)$')
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client, so the load generator adds no dependency or overhead."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self._writer.write(head.encode() + b"\r\n" + (body or b""))
+        try:
+            return await self._response()
+        except Exception:
+            self.close()
+            raise
+
+    async def _response(self) -> Tuple[int, bytes]:
+        reader = self._reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            data = b"".join(chunks)
+        else:
+            data = b""
+        if headers.get("connection") == "close":
+            self.close()
+        return status, data
+
+    async def get_json(self, path: str) -> Dict[str, object]:
+        status, data = await self.request("GET", path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return json.loads(data)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class KindStats:
+    """What one kind of client saw during a level."""
+
+    def __init__(self) -> None:
+        self.clients = 0
+        self.connected = 0
+        self.latencies: List[float] = []  # request round trips, or WebSocket message lag
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+        self.status: Counter = Counter()
+
+    def report(self, seconds: float, kind: str) -> Dict[str, object]:
+        samples = sorted(self.latencies)
+        figures = {f"p{q}_ms": percentile(samples, q) * 1000.0 for q in (50, 95, 99)}
+        figures["max_ms"] = samples[-1] * 1000.0 if samples else 0.0
+        report: Dict[str, object] = {
+            "clients": self.clients,
+            "connected": self.connected,
+            "messages" if kind == "ws" else "requests": self.messages,
+            "per_s": self.messages / seconds if seconds > 0 else 0.0,
+            "bytes_per_s": self.bytes / seconds if seconds > 0 else 0.0,
+            "lag" if kind == "ws" else "latency": figures,
+            "errors": self.errors,
+        }
+        if self.status:
+            report["status"] = {str(code): n for code, n in sorted(self.status.items())}
+        return report
+
+
+def _message_times(message: object) -> List[float]:
+    """Unix prediction times carried by one ``/ws/gestures`` message (heartbeats excluded)."""
+    if isinstance(message, bytes):
+        from backend.services.gesture_stream import HEADER, MSG_BATCH, UPDATE
+
+        kind, count = HEADER.unpack_from(message)
+        if kind != MSG_BATCH:
+            return []
+        return [UPDATE.unpack_from(message, HEADER.size + i * UPDATE.size)[3] for i in range(count)]
+    payload = json.loads(message)
+    if "timestamp" in payload:  # full mode
+        stamp = datetime.fromisoformat(payload["timestamp"])
+        return [stamp.replace(tzinfo=stamp.tzinfo or timezone.utc).timestamp()]
+    if payload.get("type") == "batch":
+        return [update[3] / 1000.0 for update in payload["updates"]]
+    return []
+
+
+async def ws_client(args: argparse.Namespace, stats: KindStats, stop: asyncio.Event) -> None:
+    import websockets
+
+    url = f"{args.ws_base}/ws/gestures?session={args.session}&mode={args.ws_mode}&encoding={args.ws_encoding}"
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            stats.connected += 1
+            while not stop.is_set():
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                now = time.time()
+                stats.messages += 1
+                stats.bytes += len(message)
+                stats.latencies.extend(max(now - ts, 0.0) for ts in _message_times(message))
+    except Exception:
+        stats.errors += 1
+
+
+async def http_client(
+    args: argparse.Namespace, stats: KindStats, stop: asyncio.Event, method: str, path: str, interval: float
+) -> None:
+    conn = HttpConnection(args.host, args.port)
+    body = PRESS_BODY if method == "POST" else None
+    stats.connected += 1
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    try:
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                status, data = await conn.request(method, path, body)
+            except Exception:
+                stats.errors += 1
+                await asyncio.sleep(0.1)
+                continue
+            stats.latencies.append(time.perf_counter() - began)
+            stats.messages += 1
+            stats.bytes += len(data)
+            stats.status[status] += 1
+            next_at = max(next_at + interval, loop.time())
+            await asyncio.sleep(next_at - loop.time())
+    finally:
+        conn.close()
+
+
+def scrape_histograms(text: str) -> Dict[Tuple[str, str], Histogram]:
+    """``(metric, labels)`` -> cumulative buckets from a ``/metrics`` page."""
+    out: Dict[Tuple[str, str], Histogram] = {}
+    for line in text.splitlines():
+        match = _BUCKET.match(line)
+        if match:
+            name, labels, bound, count = match.groups()
+            out.setdefault((name, labels), []).append((float(bound), float(count)))
+    return out
+
+
+def histogram_delta(before: Optional[Histogram], after: Optional[Histogram]) -> Histogram:
+    if not after:
+        return []
+    previous = dict(before or [])
+    return [(bound, count - previous.get(bound, 0.0)) for bound, count in after]
+
+
+def histogram_quantile(buckets: Histogram, q: float) -> Optional[float]:
+    """Upper bound (ms) of the bucket holding quantile ``q``; None if empty or beyond the last bound."""
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    target = q * buckets[-1][1]
+    for bound, count in buckets:
+        if count >= target:
+            return bound * 1000.0 if bound != float("inf") else None
+    return None
+
+
+def histogram_summary(buckets: Histogram) -> Dict[str, Optional[float]]:
+    return {
+        "count": buckets[-1][1] if buckets else 0.0,
+        "p50_ms_le": histogram_quantile(buckets, 0.50),
+        "p95_ms_le": histogram_quantile(buckets, 0.95),
+        "p99_ms_le": histogram_quantile(buckets, 0.99),
+    }
+
+
+async def server_snapshot(conn: HttpConnection, session: str) -> Dict[str, object]:
+    _, text = await conn.request("GET", "/metrics")
+    return {
+        "histograms": scrape_histograms(text.decode()),
+        "event_loop": await conn.get_json("/api/debug/event-loop"),
+        "stats": await conn.get_json(f"/api/gesture/stats?session={session}"),
+    }
+
+
+def server_report(before: Dict[str, object], after: Dict[str, object], seconds: float, session: str) -> Dict[str, object]:
+    hb, ha = before["histograms"], after["histograms"]
+    loop_key = ("event_loop_lag_seconds", "")
+    latency_key = ("stage_duration_seconds", f'session="{session}",stage="latency"')
+    latency = histogram_delta(hb.get(latency_key), ha.get(latency_key))
+    eb, ea = before["event_loop"], after["event_loop"]
+    sa = after["stats"]
+    predictions = latency[-1][1] if latency else 0.0
+    return {
+        "event_loop": dict(
+            histogram_summary(histogram_delta(hb.get(loop_key), ha.get(loop_key))),
+            stalls=ea["stalls"] - eb["stalls"],
+            blocked_ms=ea["blocked_ms"] - eb["blocked_ms"],
+            max_lag_ms=ea["lag"]["max_ms"],
+        ),
+        "ai_loop": dict(
+            histogram_summary(latency),
+            fps=predictions / seconds if seconds > 0 else 0.0,
+            reported_fps=sa.get("fps"),
+            dropped_frames=sa.get("dropped", {}).get("frames") if isinstance(sa.get("dropped"), dict) else None,
+        ),
+    }
+
+
+async def run_level(args: argparse.Namespace, clients: int) -> Dict[str, object]:
+    control = HttpConnection(args.host, args.port)
+    try:
+        before = await server_snapshot(control, args.session)
+        stop = asyncio.Event()
+        stats = {kind: KindStats() for kind in args.clients}
+        tasks = []
+        for kind, kind_stats in stats.items():
+            kind_stats.clients = clients
+            for _ in range(clients):
+                if kind == "ws":
+                    coro = ws_client(args, kind_stats, stop)
+                elif kind == "frame":
+                    coro = http_client(args, kind_stats, stop, "GET", f"/api/gesture/frame?session={args.session}", args.frame_interval)
+                else:
+                    coro = http_client(args, kind_stats, stop, "POST", "/api/keyboard/press", args.press_interval)
+                tasks.append(asyncio.create_task(coro))
+        began = time.perf_counter()
+        await asyncio.sleep(args.level_seconds)
+        stop.set()
+        seconds = time.perf_counter() - began
+        await asyncio.wait(tasks, timeout=5.0)
+        after = await server_snapshot(control, args.session)
+    finally:
+        control.close()
+    report: Dict[str, object] = {"clients": clients, "seconds": seconds}
+    report.update({kind: kind_stats.report(seconds, kind) for kind, kind_stats in stats.items()})
+    report.update(server_report(before, after, seconds, args.session))
+    return report
+
+
+def mark_degraded(levels: List[Dict[str, object]], tolerance: float) -> Optional[int]:
+    """Flag levels whose AI loop is worse than the first level's; return the last client count before that."""
+    if not levels:
+        return None
+    base = levels[0]["ai_loop"]
+    for level in levels:
+        ai = level["ai_loop"]
+        if ai["p95_ms_le"] is None:
+            slower = ai["count"] > 0  # beyond the largest histogram bucket
+        else:
+            slower = bool(base["p95_ms_le"]) and ai["p95_ms_le"] > base["p95_ms_le"] * (1.0 + tolerance)
+        starved = base["fps"] > 0 and ai["fps"] < base["fps"] / (1.0 + tolerance)
+        level["degraded"] = slower or starved
+    healthy = None
+    for level in levels:
+        if level["degraded"]:
+            break
+        healthy = level["clients"]
+    return healthy
+
+
+async def wait_ready(args: argparse.Namespace, timeout: float) -> None:
+    conn = HttpConnection(args.host, args.port)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                status, body = await conn.request("GET", "/api/ready")
+                if status == 200:
+                    return
+            except OSError:
+                body = b""
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server not ready after {timeout:.0f}s: {body.decode(errors='replace')}")
+            await asyncio.sleep(0.2)
+    finally:
+        conn.close()
+
+
+async def run_levels(args: argparse.Namespace) -> List[Dict[str, object]]:
+    await wait_ready(args, args.ready_timeout)
+    await asyncio.sleep(args.settle)
+    levels = []
+    for clients in args.levels:
+        level = await run_level(args, clients)
+        print(_summary_line(level), file=sys.stderr)
+        levels.append(level)
+        await asyncio.sleep(args.settle)
+    return levels
+
+
+def _summary_line(level: Dict[str, object]) -> str:
+    parts = [f"clients={level['clients']}"]
+    for kind in CLIENT_KINDS:
+        if kind in level:
+            r = level[kind]
+            figures = r.get("lag") or r.get("latency")
+            parts.append(f"{kind}={r['per_s']:.0f}/s p95={figures['p95_ms']:.1f}ms err={r['errors']}")
+    loop, ai = level["event_loop"], level["ai_loop"]
+    parts.append(f"loop_stalls={loop['stalls']} ai_fps={ai['fps']:.1f} ai_p95<={ai['p95_ms_le']}ms")
+    return " ".join(parts)
+
+
+class InProcessServer:
+    """The FastAPI app under uvicorn on a background thread, bound to a free loopback port."""
+
+    def __init__(self) -> None:
+        import uvicorn
+
+        from backend.main import app
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self.server.run, name="load-server", daemon=True)
+
+    def __enter__(self) -> "InProcessServer":
+        self._thread.start()
+        while not self.server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def _in_process_environment(workdir: Path) -> None:
+    # Defaults only: anything already set in the environment wins.
+    os.environ.setdefault("FRAME_SOURCE", "synthetic")
+    os.environ.setdefault("KEYBOARD_BACKEND", "null")
+    os.environ.setdefault("MAPPINGS_PATH", str(workdir / "mappings.json"))
+    os.environ.setdefault("SESSIONS_DIR", str(workdir / "sessions"))
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    if args.url:
+        target = urlsplit(args.url)
+        args.host, args.port = target.hostname or "127.0.0.1", target.port or 80
+        args.ws_base = f"ws://{args.host}:{args.port}"
+        return _report(args, asyncio.run(run_levels(args)))
+    with tempfile.TemporaryDirectory() as workdir:
+        _in_process_environment(Path(workdir))
+        with InProcessServer() as server:
+            args.host, args.port = "127.0.0.1", server.port
+            args.ws_base = f"ws://{args.host}:{args.port}"
+            return _report(args, asyncio.run(run_levels(args)))
+
+
+def _report(args: argparse.Namespace, levels: List[Dict[str, object]]) -> Dict[str, object]:
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "target": args.url or "in-process",
+            "cpus": os.cpu_count(),
+            "clients": list(args.clients),
+            "ws_mode": args.ws_mode,
+            "ws_encoding": args.ws_encoding,
+            "frame_interval_s": args.frame_interval,
+            "press_interval_s": args.press_interval,
+            "level_seconds": args.level_seconds,
+        },
+        "max_healthy_clients": mark_degraded(levels, args.tolerance),
+        "levels": levels,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="Target a running server (e.g. http://localhost:8000)")
+    parser.add_argument("--session", default="default", help="Session whose AI loop is reported")
+    parser.add_argument(
+        "--levels", type=lambda spec: [int(n) for n in spec.split(",")], default=[1, 5, 10, 25, 50],
+        help="Concurrent clients per kind at each step",
+    )
+    parser.add_argument(
+        "--clients", type=lambda spec: tuple(k for k in spec.split(",") if k), default=CLIENT_KINDS,
+        help="Client kinds to run: " + ", ".join(CLIENT_KINDS),
+    )
+    parser.add_argument("--level-seconds", type=float, default=5.0)
+    parser.add_argument("--settle", type=float, default=1.0, help="Pause before the first and after each level")
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="How long to wait for /api/ready")
+    parser.add_argument("--ws-mode", default="full", choices=("full", "delta"))
+    parser.add_argument("--ws-encoding", default="json", choices=("json", "binary"))
+    parser.add_argument("--frame-interval", type=float, default=0.1, help="Seconds between polls per frame client")
+    parser.add_argument("--press-interval", type=float, default=1.0, help="Seconds between presses per client")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed AI-loop p95/FPS change vs level 1")
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON here instead of stdout")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    unknown = set(args.clients) - set(CLIENT_KINDS)
+    if unknown:
+        raise SystemExit(f"Unknown client kinds: {', '.join(sorted(unknown))}")
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
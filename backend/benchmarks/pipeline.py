@@ -0,0 +1,463 @@
+"""Reproducible benchmarks for the vision -> gesture -> action pipeline.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.pipeline --resolutions 640x480,1920x1080 --output bench.json
+    python -m backend.benchmarks.pipeline --compare baseline.json --tolerance 0.15
+
+Each case runs in a fresh interpreter so peak RSS is attributable to it.
+Results are written as JSON; ``--compare`` exits non-zero when any case's
+p95 latency regresses by more than the tolerance against a baseline file.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.pipeline import percentile
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+DEFAULT_RESOLUTIONS = "640x480,1280x720,1920x1080"
+CASES = ("preprocess", "preprocess_batch", "frame_path", "extract_landmarks", "classify", "update_frame", "loop")
+
+
+def parse_resolutions(spec: str) -> List[Tuple[int, int]]:
+    out = []
+    for item in spec.split(","):
+        width, height = item.lower().split("x")
+        out.append((int(width), int(height)))
+    return out
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def load_frames(
+    source: str, path: Optional[str], width: int, height: int, count: int
+) -> List[np.ndarray]:
+    """Read ``count`` frames from a frame source, resized to ``width`` x ``height``."""
+    from backend.services.frame_sources import create_frame_source
+
+    src = create_frame_source(source, path=path, pacing="fast", width=width, height=height)
+    if not src.open():
+        raise RuntimeError(f"Unable to open frame source {source} {path or ''}")
+    frames = []
+    try:
+        while len(frames) < count:
+            frame = src.read()
+            if frame is None:
+                break
+            if frame.shape[1] != width or frame.shape[0] != height:
+                import cv2
+
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            frames.append(np.ascontiguousarray(frame))
+    finally:
+        src.close()
+    if not frames:
+        raise RuntimeError("Frame source produced no frames")
+    return frames
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": percentile(ordered, 50) * 1000.0,
+        "p95_ms": percentile(ordered, 95) * 1000.0,
+        "p99_ms": percentile(ordered, 99) * 1000.0,
+        "mean_ms": sum(ordered) / len(ordered) * 1000.0,
+        "max_ms": ordered[-1] * 1000.0,
+    }
+
+
+def measure(
+    fn: Callable[[np.ndarray], object],
+    frames: List[np.ndarray],
+    iterations: int,
+    warmup: int,
+    alloc_iterations: int,
+) -> Dict[str, object]:
+    """Time ``fn`` over frames, then re-run a few iterations under tracemalloc."""
+    n = len(frames)
+    for i in range(warmup):
+        fn(frames[i % n])
+
+    samples = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        fn(frames[i % n])
+        samples.append(time.perf_counter() - t)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    # Separate pass: tracemalloc slows everything down, so keep it out of the timings.
+    tracemalloc.start()
+    per_iter_peaks = []
+    base, _ = tracemalloc.get_traced_memory()
+    for i in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn(frames[i % n])
+        _, peak = tracemalloc.get_traced_memory()
+        per_iter_peaks.append(peak - before)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "latency": _latency_summary(samples),
+        "throughput_fps": iterations / wall if wall > 0 else 0.0,
+        "cpu_ms_per_frame": cpu / iterations * 1000.0,
+        "alloc": {
+            "peak_bytes_per_iter": int(np.median(per_iter_peaks)) if per_iter_peaks else 0,
+            "retained_bytes": retained - base,
+        },
+    }
+
+
+def _ListSource(frames: List[np.ndarray]):
+    """Unpaced source cycling over in-memory frames, copied like a capture device would."""
+    from backend.services.frame_sources import FrameSource, _copy_into
+
+    class ListSource(FrameSource):
+        def __init__(self) -> None:
+            super().__init__(pacing="fast")
+            self._pos = 0
+
+        def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+            frame = frames[self._pos % len(frames)]
+            self._pos += 1
+            return _copy_into(frame, out)
+
+    return ListSource()
+
+
+def bench_preprocess(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    from backend.services.vision_service import available_preprocess_paths
+
+    results = []
+    for name, fn in available_preprocess_paths().items():
+        result = measure(fn, frames, args.iterations, args.warmup, args.alloc_iterations)
+        result["name"] = f"preprocess.{name}"
+        results.append(result)
+    if "cpp" in available_preprocess_paths():
+        from backend.services.vision_service import preprocess_cpp
+
+        h, w = frames[0].shape[:2]
+        for name, out, single in (
+            ("cpp_into", np.empty((h, w, 3), np.uint8), False),
+            ("cpp_gray_into", np.empty((h, w), np.uint8), True),
+        ):
+            fn = lambda f, out=out, single=single: preprocess_cpp(f, out=out, single_channel=single)  # noqa: E731
+            result = measure(fn, frames, args.iterations, args.warmup, args.alloc_iterations)
+            result["name"] = f"preprocess.{name}"
+            results.append(result)
+    return results
+
+
+def bench_preprocess_batch(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    from backend.services.frame_sources import SyntheticSource
+    from backend.services.vision_service import VisionService
+
+    service = VisionService(source=SyntheticSource(width=16, height=16, frames=1))
+    batch = np.stack(frames)
+    iterations = max(args.iterations // len(frames), 1)
+    result = measure(lambda b: service.preprocess_batch(b), [batch], iterations, 1, min(args.alloc_iterations, 3))
+    # Report per-frame figures so the numbers line up with the single-frame cases.
+    result["name"] = "preprocess_batch"
+    result["batch_size"] = len(frames)
+    result["throughput_fps"] *= len(frames)
+    result["cpu_ms_per_frame"] /= len(frames)
+    return [result]
+
+
+def bench_frame_path(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    """Capture -> preprocess -> publish -> release, with and without buffer reuse."""
+    from backend.services.ai_loop import GestureState
+    from backend.services.frame_pool import FramePool
+    from backend.services.vision_service import VisionService
+
+    results = []
+    for name, max_free in (("pooled", 6), ("unpooled", 0)):
+        pool = FramePool(max_free=max_free)
+        service = VisionService(source=_ListSource(frames), frame_pool=pool)
+        service.start()
+        state = GestureState()
+
+        def step(_: np.ndarray, service: VisionService = service, pool: FramePool = pool) -> None:
+            raw = service.read_frame()
+            processed = service.preprocess(raw)
+            if processed is not raw:
+                pool.release(raw)
+            state.update_frame(processed, pool)
+            pool.release(processed)
+
+        result = measure(step, frames, args.iterations, args.warmup, args.alloc_iterations)
+        service.stop()
+        result["name"] = f"frame_path.{name}"
+        result["pool"] = pool.stats()
+        results.append(result)
+    return results
+
+
+def bench_extract_landmarks(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    from backend.services import vision_service
+    from backend.services.frame_sources import SyntheticSource
+    from backend.services.vision_service import VisionService
+
+    service = VisionService(source=SyntheticSource(width=16, height=16, frames=1))
+    service.start()
+    try:
+        result = measure(service.extract_landmarks, frames, args.iterations, args.warmup, args.alloc_iterations)
+    finally:
+        service.stop()
+    result["name"] = "extract_landmarks"
+    result["backend"] = "mediapipe" if vision_service.mp else "none"
+    return [result]
+
+
+def bench_classify(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    """Classifier cost per input at several batch sizes; ``--model`` adds a TFLite/ONNX backend."""
+    from backend.services.gesture_classifier import (
+        NUM_LANDMARKS,
+        POSE_LABELS,
+        LinearGestureClassifier,
+        RuleGestureClassifier,
+        feature_vector,
+    )
+    from backend.services.inference_backends import create_backend
+
+    rng = np.random.default_rng(0)
+    landmarks = rng.random((max(args.batch_sizes), NUM_LANDMARKS, 3), dtype=np.float32)
+    features = feature_vector(landmarks[:1]).shape[1]
+    backends = {
+        "rules": RuleGestureClassifier(),
+        "linear": LinearGestureClassifier(rng.standard_normal((features, len(POSE_LABELS)))),
+    }
+    if args.model:
+        backend = create_backend(args.model_kind, args.model, threads=args.model_threads, max_batch=max(args.batch_sizes))
+        if getattr(backend, "input_kind", None) is None:
+            raise RuntimeError(f"Could not load {args.model_kind} model {args.model}")
+        backends[args.model_kind] = backend
+    frame_batch = np.stack([frames[i % len(frames)] for i in range(max(args.batch_sizes))])
+
+    results = []
+    for name, backend in backends.items():
+        inputs = frame_batch if getattr(backend, "input_kind", "landmarks") == "frame" else landmarks
+        for batch in args.batch_sizes:
+            iterations = max(args.iterations // batch, 1)
+            fn = lambda b, backend=backend: backend.classify(b)  # noqa: E731
+            result = measure(fn, [inputs[:batch]], iterations, args.warmup, min(args.alloc_iterations, 5))
+            # Per-input figures, comparable across batch sizes.
+            result["name"] = f"classify.{name}.b{batch}"
+            result["batch_size"] = batch
+            result["throughput_fps"] *= batch
+            result["cpu_ms_per_frame"] /= batch
+            results.append(result)
+    return results
+
+
+def bench_update_frame(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    from backend.services.ai_loop import GestureState
+
+    state = GestureState()
+
+    def publish_and_encode(frame: np.ndarray) -> None:
+        # One attached viewer: publish, then encode the shared JPEG once.
+        state.update_frame(frame)
+        state.preview.encode()
+
+    result = measure(publish_and_encode, frames, args.iterations, args.warmup, args.alloc_iterations)
+    result["name"] = "update_frame"
+    return [result]
+
+
+def bench_loop(frames: List[np.ndarray], args: argparse.Namespace) -> List[Dict[str, object]]:
+    from backend.models.mapping_model import GestureMapping, MappingConfig
+    from backend.services.ai_loop import AILoopService, GestureBroadcaster, GestureState
+    from backend.services.keyboard_service import KeyboardService
+    from backend.services.vision_service import VisionService
+
+    loop = AILoopService(
+        vision_service=VisionService(source=_ListSource(frames)),
+        keyboard_service=KeyboardService(enabled=False),
+        mapping_config=MappingConfig(mappings=[GestureMapping(gesture="open_hand", action="space")]),
+        gesture_state=GestureState(),
+        broadcaster=GestureBroadcaster(),
+        target_fps=args.loop_fps,
+    )
+    cpu_start = time.process_time()
+    loop.start()
+    time.sleep(args.loop_seconds)
+    stats = loop.stats()
+    loop.stop()
+    cpu = time.process_time() - cpu_start
+    stages = stats["stages"]  # type: ignore[index]
+    latency = stages["latency"]  # type: ignore[index]
+    processed = max(latency["count"], 1)
+    return [
+        {
+            "name": "loop",
+            "iterations": latency["count"],
+            "latency": {
+                "p50_ms": latency["p50_ms"],
+                "p95_ms": latency["p95_ms"],
+                "p99_ms": latency["p99_ms"],
+                "ewma_ms": latency["avg_ms"],
+                "max_ms": latency["max_ms"],
+            },
+            "throughput_fps": latency["count"] / args.loop_seconds,
+            "cpu_ms_per_frame": cpu / processed * 1000.0,
+            "dropped_frames": stats["dropped"]["frames"],  # type: ignore[index]
+            "pool": loop.frame_pool.stats(),
+            "stages": stages,
+        }
+    ]
+
+
+BENCHES = {
+    "preprocess": bench_preprocess,
+    "preprocess_batch": bench_preprocess_batch,
+    "frame_path": bench_frame_path,
+    "extract_landmarks": bench_extract_landmarks,
+    "classify": bench_classify,
+    "update_frame": bench_update_frame,
+    "loop": bench_loop,
+}
+
+
+def run_case(case: str, width: int, height: int, args: argparse.Namespace) -> List[Dict[str, object]]:
+    frames = load_frames(args.source, args.path, width, height, args.frames)
+    results = BENCHES[case](frames, args)
+    rss = peak_rss_mb()
+    for result in results:
+        result["resolution"] = f"{width}x{height}"
+        result["peak_rss_mb"] = rss
+    return results
+
+
+def _run_case_isolated(payload: Tuple[str, int, int, argparse.Namespace]) -> List[Dict[str, object]]:
+    return run_case(*payload)
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    results: List[Dict[str, object]] = []
+    ctx = multiprocessing.get_context("spawn")
+    for width, height in parse_resolutions(args.resolutions):
+        for case in args.cases.split(","):
+            if args.isolate:
+                with ctx.Pool(1) as pool:
+                    results.extend(pool.apply(_run_case_isolated, ((case, width, height, args),)))
+            else:
+                results.extend(run_case(case, width, height, args))
+    return {"meta": environment(args), "results": results}
+
+
+def environment(args: argparse.Namespace) -> Dict[str, object]:
+    meta: Dict[str, object] = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "source": args.source,
+        "iterations": args.iterations,
+    }
+    try:
+        import cv2
+
+        meta["opencv"] = cv2.__version__
+    except Exception:
+        meta["opencv"] = None
+    from backend.services import vision_service
+
+    meta["mediapipe"] = bool(vision_service.mp)
+    meta["cpp_extension"] = bool(vision_service.vision)
+    return meta
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[str]:
+    """Return human-readable regressions of p95 latency beyond ``tolerance``."""
+    def key(r: Dict[str, object]) -> Tuple[object, object]:
+        return r["name"], r["resolution"]
+
+    base = {key(r): r for r in baseline["results"]}  # type: ignore[union-attr]
+    regressions = []
+    for result in current["results"]:  # type: ignore[union-attr]
+        old = base.get(key(result))
+        if not old:
+            continue
+        before, after = old["latency"]["p95_ms"], result["latency"]["p95_ms"]
+        if before > 0 and after > before * (1.0 + tolerance):
+            regressions.append(
+                f"{result['name']} @ {result['resolution']}: p95 {before:.2f} ms -> {after:.2f} ms"
+            )
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated subset of " + ", ".join(CASES))
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--source", default="synthetic", help="Frame source kind (synthetic, video, images, dump)")
+    parser.add_argument("--path", default=None, help="Path for recorded frame sources")
+    parser.add_argument("--frames", type=int, default=32, help="Frames loaded into memory per resolution")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--loop-seconds", type=float, default=5.0)
+    parser.add_argument("--loop-fps", type=int, default=1000, help="AI loop target FPS (high = unthrottled)")
+    parser.add_argument(
+        "--batch-sizes",
+        type=lambda spec: [int(b) for b in spec.split(",")],
+        default=[1, 8, 64],
+        help="Batch sizes for the classify case",
+    )
+    parser.add_argument("--model", default=None, help="TFLite/ONNX model to include in the classify case")
+    parser.add_argument("--model-kind", default="tflite", choices=("tflite", "onnx"))
+    parser.add_argument("--model-threads", type=int, default=2)
+    parser.add_argument("--no-isolate", dest="isolate", action="store_false", help="Run all cases in this process")
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON here instead of stdout")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative p95 regression")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
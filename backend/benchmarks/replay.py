@@ -0,0 +1,108 @@
+"""Replay landmark recordings through the classifier and trigger.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.replay session.glm --mappings mappings.json
+    python -m backend.benchmarks.replay session.glm --min-confidence 0.5,0.6,0.7 --required 2,3
+
+Every combination of the comma-separated trigger parameters is replayed
+and reported as JSON. ``--expect`` takes a previous report and exits
+non-zero when label agreement or the fired actions differ from it.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.models.mapping_model import MappingConfig
+from backend.services.gesture_classifier import LinearGestureClassifier, RuleGestureClassifier
+from backend.services.gesture_trigger import GestureTrigger
+from backend.services.motion_gestures import MotionGestureRecognizer
+from backend.services.recording import LandmarkReader, replay
+
+
+def _floats(spec: str) -> List[float]:
+    return [float(v) for v in spec.split(",") if v]
+
+
+def _ints(spec: str) -> List[int]:
+    return [int(v) for v in spec.split(",") if v]
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    reader = LandmarkReader(args.recording)
+    classifier = LinearGestureClassifier.load(args.classifier) if args.classifier else RuleGestureClassifier()
+    mapping_config = MappingConfig.parse_raw(args.mappings.read_text()) if args.mappings else None
+    runs = []
+    for window, required, min_confidence in itertools.product(
+        _ints(args.window), _ints(args.required), _floats(args.min_confidence)
+    ):
+        trigger = GestureTrigger(window=window, required=required, min_confidence=min_confidence)
+        motion = MotionGestureRecognizer(hold_frames=required, mirror=args.mirror) if args.motion_gestures else None
+        result = replay(reader, classifier, mapping_config, trigger, args.start, args.stop, motion)
+        runs.append(
+            {"window": window, "required": required, "min_confidence": min_confidence, **result.summary()}
+        )
+    return {
+        "recording": str(args.recording),
+        "frames": len(reader),
+        "duration_s": reader.duration(),
+        "runs": runs,
+    }
+
+
+def compare(report: Dict[str, object], expected: Dict[str, object]) -> List[str]:
+    def key(r: Dict[str, object]):
+        return (r["window"], r["required"], r["min_confidence"])
+
+    baseline = {key(r): r for r in expected.get("runs", [])}
+    problems = []
+    for r in report["runs"]:
+        base = baseline.get(key(r))
+        if base is None:
+            continue
+        if r["agreement"] < base["agreement"]:
+            problems.append(f"{key(r)}: agreement {r['agreement']:.3f} < {base['agreement']:.3f}")
+        if r["actions"] != base["actions"]:
+            problems.append(f"{key(r)}: fired {r['fired']} actions, expected {base['fired']}")
+    return problems
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path)
+    parser.add_argument("--mappings", type=Path, default=None, help="MappingConfig JSON to trigger against")
+    parser.add_argument("--classifier", type=Path, default=None, help=".npz weights for LinearGestureClassifier")
+    parser.add_argument("--window", default="5")
+    parser.add_argument("--required", default="3")
+    parser.add_argument("--min-confidence", default="0.6")
+    parser.add_argument("--motion-gestures", action="store_true", help="Also recognise swipes, circles and taps")
+    parser.add_argument("--mirror", action="store_true", help="Swap left/right for motion gestures")
+    parser.add_argument("--start", type=int, default=0, help="First record to replay")
+    parser.add_argument("--stop", type=int, default=None, help="Stop before this record")
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON here instead of stdout")
+    parser.add_argument("--expect", type=Path, default=None, help="Previous report to check for regressions")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+    if args.expect:
+        problems = compare(report, json.loads(args.expect.read_text()))
+        for line in problems:
+            print("REGRESSION " + line, file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,9 +11,55 @@ class Settings(BaseSettings):
     mappings_path: Path = Path(os.getenv("MAPPINGS_PATH", "./mappings.json"))
     use_cpp_extension: bool = False
     camera_index: int = 0
+    frame_source: str = "camera"  # camera | video | images | dump | synthetic
+    frame_source_path: Optional[Path] = None
+    frame_source_pacing: str = "realtime"  # realtime | fast | fixed
+    frame_source_fps: float = 0.0
+    frame_source_loop: bool = True
+    frame_width: int = 640
+    frame_height: int = 480
+    roi_tracking: bool = False
+    roi_input_size: int = 256
+    roi_margin: float = 0.35
+    roi_detect_width: int = 640
+    motion_gate_enabled: bool = False
+    motion_threshold: float = 0.01  # fraction of thumbnail pixels that must change
+    motion_pixel_delta: int = 12
+    motion_idle_after_s: float = 10.0
+    motion_idle_fps: float = 2.0
+    motion_refresh_s: float = 2.0
     ai_loop_fps: int = 24
+    governor_enabled: bool = False  # adapt fps/resolution/preview to hold latency_slo_ms
+    latency_slo_ms: float = 100.0  # p95 capture-to-prediction latency target
+    governor_max_fps: float = 0.0  # allow speeding up to this rate when idle; 0 = never above ai_loop_fps
+    governor_window_s: float = 1.0
+    inference_process: bool = False  # run capture + inference in a child process
+    inference_ring_slots: int = 4
+    inference_ring_frame_bytes: int = 1920 * 1080 * 3
+    max_sessions: int = 0  # 0 = one session per CPU core
+    sessions_dir: Path = Path(os.getenv("SESSIONS_DIR", "./sessions"))
+    gesture_window_frames: int = 5
+    gesture_onset_frames: int = 3
+    gesture_min_confidence: float = 0.6
+    motion_gestures_enabled: bool = False  # recognise swipes, circles and taps over the landmark history
+    motion_gestures_window: int = 48  # landmark frames and resampled steps kept per hand
+    motion_gestures_mirror: bool = False  # swap left/right so swipes follow the user on a selfie camera
+    history_capacity: int = 16384  # predictions kept for /api/gesture/history
+    history_action_capacity: int = 1024  # triggered actions kept for /api/gesture/history
+    gesture_classifier_path: Optional[Path] = None  # .npz weights for LinearGestureClassifier
+    inference_backend: str = "heuristics"  # heuristics | tflite | onnx (loads model_path)
+    inference_threads: int = 2
+    inference_batch: int = 8
+    warmup_timeout_s: float = 60.0  # how long /api/ready waits for an inference worker
+    recording_path: Optional[Path] = None  # record landmarks + predictions here (see recording.py)
+    profiler_enabled: bool = False  # start the sampling profiler at boot (toggle via /api/debug/profiler)
+    profiler_interval_ms: float = 10.0
     enable_keyboard_output: bool = True
+    keyboard_backend: str = "auto"  # auto (pynput, else keyboard) | null (no-op, for load tests)
     ws_route: str = "/ws/gestures"
+    ws_tick_ms: float = 100.0  # delta mode: batch interval
+    ws_heartbeat_s: float = 5.0  # delta mode: resend state after this long without changes
+    ws_confidence_step: float = 0.05  # delta mode: confidence change that counts as an update
 
     class Config:
         env_file = ".env"
@@ -1,17 +1,35 @@
 import asyncio
 import logging
 from pathlib import Path
+from functools import partial
+from typing import List, Optional
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.api import gesture, keyboard, mappings
+from backend.api import debug, gesture, keyboard, mappings, sessions
 from backend.config import Settings, get_settings
-from backend.models.gesture_model import GesturePrediction
 from backend.models.mapping_model import GestureMapping, MappingConfig
+from backend.models.session_model import SessionCreate
 from backend.services.ai_loop import AILoopService, GestureBroadcaster, GestureState
-from backend.services.keyboard_service import KeyboardService
-from backend.services.vision_service import VisionService
+from backend.services.frame_sources import create_frame_source
+from backend.services.gesture_stream import ENCODINGS
+from backend.services.gesture_trigger import GestureTrigger
+from backend.services.governor import LatencyGovernor
+from backend.services.inference_backends import create_backend
+from backend.services.inference_process import ProcessAILoopService
+from backend.services.keyboard_service import KeyboardService, NullController
+from backend.services.loop_monitor import EventLoopMonitor
+from backend.services.metrics import CONTENT_TYPE, render_metrics
+from backend.services.motion_gate import MotionGate
+from backend.services.motion_gestures import MotionGestureRecognizer
+from backend.services.profiler import SamplingProfiler
+from backend.services.recording import LandmarkRecorder
+from backend.services.sessions import DEFAULT_SESSION, Session, SessionManager
+from backend.services.timeline import GestureTimeline
+from backend.services.vision_service import VisionService, load_dependencies
+from backend.services.warmup import Warmup, WarmupStep
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,6 +38,8 @@ app = FastAPI(title="Local AI Vision Keyboard")
 app.include_router(gesture.router)
 app.include_router(mappings.router)
 app.include_router(keyboard.router)
+app.include_router(sessions.router)
+app.include_router(debug.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,84 +50,333 @@ app.add_middleware(
 )
 
 
+def _load_mappings(path: Path, default: MappingConfig) -> MappingConfig:
+    if path.exists():
+        return MappingConfig.parse_raw(path.read_text())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(default.json(indent=2))
+    return default
+
+
+def _build_session(
+    settings: Settings,
+    keyboard_service: KeyboardService,
+    session_id: str,
+    mapping_config: MappingConfig,
+    mappings_path: Path,
+    source_kwargs: dict,
+    use_worker: bool,
+    cpu: Optional[int] = None,
+) -> Session:
+    vision_kwargs = dict(
+        camera_index=source_kwargs["camera_index"],
+        use_cpp_extension=settings.use_cpp_extension,
+        roi_tracking=settings.roi_tracking,
+        roi_input_size=settings.roi_input_size,
+        roi_margin=settings.roi_margin,
+        roi_detect_width=settings.roi_detect_width,
+    )
+    motion_kwargs = (
+        dict(
+            threshold=settings.motion_threshold,
+            pixel_delta=settings.motion_pixel_delta,
+            idle_after_s=settings.motion_idle_after_s,
+            refresh_s=settings.motion_refresh_s,
+        )
+        if settings.motion_gate_enabled
+        else None
+    )
+    motion_gesture_kwargs = (
+        dict(
+            window=settings.motion_gestures_window,
+            # Held long enough for the trigger to see it as an onset.
+            hold_frames=settings.gesture_onset_frames,
+            mirror=settings.motion_gestures_mirror,
+        )
+        if settings.motion_gestures_enabled
+        else None
+    )
+    governor_kwargs = (
+        dict(
+            slo_ms=settings.latency_slo_ms,
+            target_fps=settings.ai_loop_fps,
+            max_fps=settings.governor_max_fps,
+            window_s=settings.governor_window_s,
+        )
+        if settings.governor_enabled
+        else None
+    )
+    backend_kwargs = dict(
+        kind=settings.inference_backend,
+        model_path=str(settings.model_path),
+        threads=settings.inference_threads,
+        max_batch=settings.inference_batch,
+        classifier_path=str(settings.gesture_classifier_path) if settings.gesture_classifier_path else None,
+    )
+    recording_path = settings.recording_path
+    if recording_path and session_id != DEFAULT_SESSION:
+        recording_path = recording_path.with_name(f"{recording_path.stem}-{session_id}{recording_path.suffix}")
+    gesture_state = GestureState(
+        timeline=GestureTimeline(settings.history_capacity, settings.history_action_capacity)
+    )
+    broadcaster = GestureBroadcaster(
+        delta_options=dict(
+            tick=settings.ws_tick_ms / 1000.0,
+            heartbeat=settings.ws_heartbeat_s,
+            confidence_step=settings.ws_confidence_step,
+        )
+    )
+    trigger = GestureTrigger(
+        window=settings.gesture_window_frames,
+        required=settings.gesture_onset_frames,
+        min_confidence=settings.gesture_min_confidence,
+    )
+    if use_worker:
+        ai_loop: AILoopService = ProcessAILoopService(
+            worker_config={
+                "source": source_kwargs,
+                "vision": vision_kwargs,
+                "backend": backend_kwargs,
+                "motion": motion_kwargs,
+                "motion_gestures": motion_gesture_kwargs,
+                "governor": governor_kwargs,
+                "idle_fps": settings.motion_idle_fps,
+                "recording_path": str(recording_path) if recording_path else None,
+                "cpu": cpu,
+            },
+            keyboard_service=keyboard_service,
+            mapping_config=mapping_config,
+            gesture_state=gesture_state,
+            broadcaster=broadcaster,
+            target_fps=settings.ai_loop_fps,
+            trigger=trigger,
+            ring_slots=settings.inference_ring_slots,
+            ring_frame_bytes=settings.inference_ring_frame_bytes,
+        )
+    else:
+        vision_service = VisionService(
+            source=create_frame_source(**source_kwargs),
+            # The model is loaded by the warm-up task, not at construction.
+            classifier_factory=partial(create_backend, **backend_kwargs),
+            motion_gestures=MotionGestureRecognizer(**motion_gesture_kwargs) if motion_gesture_kwargs else None,
+            **vision_kwargs,
+        )
+        ai_loop = AILoopService(
+            vision_service=vision_service,
+            keyboard_service=keyboard_service,
+            mapping_config=mapping_config,
+            gesture_state=gesture_state,
+            broadcaster=broadcaster,
+            target_fps=settings.ai_loop_fps,
+            trigger=trigger,
+            motion_gate=MotionGate(**motion_kwargs) if motion_kwargs else None,
+            idle_fps=settings.motion_idle_fps,
+            recorder=LandmarkRecorder(recording_path) if recording_path else None,
+            governor=LatencyGovernor(**governor_kwargs) if governor_kwargs else None,
+        )
+    return Session(
+        session_id,
+        ai_loop=ai_loop,
+        gesture_state=gesture_state,
+        broadcaster=broadcaster,
+        mappings_path=mappings_path,
+        frame_source=source_kwargs["kind"],
+        cpu=cpu,
+    )
+
+
+def _warmup_steps(settings: Settings, session: Session, start: bool) -> List[WarmupStep]:
+    """Heavy imports, model load, source open and a dummy inference, then start the loop."""
+    ai_loop = session.ai_loop
+    vision = ai_loop.vision
+    # Worker processes import MediaPipe themselves; the server only needs OpenCV.
+    steps: List[WarmupStep] = [("imports", lambda: load_dependencies(mediapipe=vision is not None))]
+    if not start:
+        return steps
+    if vision is None:
+
+        def start_worker() -> Optional[float]:
+            ai_loop.start()
+            if not ai_loop.wait_ready(timeout=settings.warmup_timeout_s):
+                raise RuntimeError(ai_loop.warmup_error or "inference worker did not become ready")
+            return ai_loop.warmup_seconds
+
+        return steps + [("worker", start_worker)]
+
+    def open_source() -> str:
+        vision.start()
+        if not vision.is_open:
+            raise RuntimeError(f"{session.frame_source} frame source did not open")
+        return session.frame_source
+
+    return steps + [
+        ("model", lambda: type(vision.load_classifier()).__name__),
+        ("source", open_source),
+        ("inference", vision.warm_up),
+        ("loop", ai_loop.start),
+    ]
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
     settings: Settings = get_settings()
-    mappings_path: Path = settings.mappings_path
-    if mappings_path.exists():
-        mapping_config = MappingConfig.parse_raw(mappings_path.read_text())
-    else:
-        default = MappingConfig(
+    mapping_config = _load_mappings(
+        settings.mappings_path,
+        MappingConfig(
             mappings=[
                 GestureMapping(gesture="open_hand", action="space", action_type="key"),
                 GestureMapping(gesture="pinch", action="ctrl+c", action_type="shortcut"),
             ]
+        ),
+    )
+    keyboard_service = KeyboardService(
+        enabled=settings.enable_keyboard_output,
+        controller=NullController() if settings.keyboard_backend == "null" else None,
+    )
+    manager = SessionManager(capacity=settings.max_sessions)
+    default = manager.add(
+        _build_session(
+            settings,
+            keyboard_service,
+            DEFAULT_SESSION,
+            mapping_config,
+            settings.mappings_path,
+            source_kwargs=dict(
+                kind=settings.frame_source,
+                path=settings.frame_source_path,
+                camera_index=settings.camera_index,
+                pacing=settings.frame_source_pacing,
+                fps=settings.frame_source_fps,
+                loop=settings.frame_source_loop,
+                width=settings.frame_width,
+                height=settings.frame_height,
+            ),
+            use_worker=settings.inference_process,
         )
-        mappings_path.write_text(default.json(indent=2))
-        mapping_config = default
-
-    gesture_state = GestureState()
-    broadcaster = GestureBroadcaster()
-    vision_service = VisionService(
-        camera_index=settings.camera_index, use_cpp_extension=settings.use_cpp_extension
     )
-    keyboard_service = KeyboardService(enabled=settings.enable_keyboard_output)
-    ai_loop = AILoopService(
-        vision_service=vision_service,
-        keyboard_service=keyboard_service,
-        mapping_config=mapping_config,
-        gesture_state=gesture_state,
-        broadcaster=broadcaster,
-        target_fps=settings.ai_loop_fps,
+    # Start only if camera index is valid (or a non-camera source is configured).
+    # Everything slow runs in the background so the server answers immediately.
+    warmup = Warmup(
+        _warmup_steps(settings, default, start=settings.frame_source != "camera" or settings.camera_index >= 0)
     )
-    # Start only if camera index is valid
-    if settings.camera_index >= 0:
-        ai_loop.start()
+    warmup.start()
+
+    def session_factory(payload: SessionCreate, cpu: Optional[int]) -> Session:
+        # Extra stations always run in their own worker process, one per core.
+        path = settings.sessions_dir / f"{payload.session_id}.json"
+        return _build_session(
+            settings,
+            keyboard_service,
+            payload.session_id,
+            _load_mappings(path, default.mapping_config),
+            path,
+            source_kwargs=dict(
+                kind=payload.frame_source,
+                path=payload.frame_source_path,
+                camera_index=payload.camera_index,
+                pacing=payload.frame_source_pacing,
+                fps=payload.frame_source_fps,
+                loop=settings.frame_source_loop,
+                width=settings.frame_width,
+                height=settings.frame_height,
+            ),
+            use_worker=True,
+            cpu=cpu,
+        )
+
+    profiler = SamplingProfiler(interval=settings.profiler_interval_ms / 1000.0)
+    if settings.profiler_enabled:
+        profiler.start()
+    loop_monitor = EventLoopMonitor()
+    loop_monitor.start()
 
     app.state.settings = settings
-    app.state.mapping_config = mapping_config
-    app.state.ai_loop = ai_loop
-    app.state.gesture_state = gesture_state
-    app.state.broadcaster = broadcaster
+    app.state.sessions = manager
+    app.state.profiler = profiler
+    app.state.loop_monitor = loop_monitor
+    app.state.warmup = warmup
+    app.state.session_factory = session_factory
+    app.state.ai_loop = default.ai_loop
+    app.state.gesture_state = default.gesture_state
+    app.state.broadcaster = default.broadcaster
     app.state.keyboard = keyboard_service
-    app.state.mappings_path = mappings_path
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
-    if hasattr(app.state, "ai_loop"):
-        app.state.ai_loop.stop()
+    if hasattr(app.state, "sessions"):
+        app.state.sessions.stop_all()
+    if hasattr(app.state, "keyboard"):
+        app.state.keyboard.stop()
+    if hasattr(app.state, "profiler"):
+        app.state.profiler.stop()
+    if hasattr(app.state, "loop_monitor"):
+        app.state.loop_monitor.stop()
 
 
 @app.websocket("/ws/gestures")
-async def gesture_stream(websocket: WebSocket):
+async def gesture_stream(
+    websocket: WebSocket, session: str = DEFAULT_SESSION, mode: str = "full", encoding: str = "json"
+):
+    """``mode=full`` sends every prediction as JSON; ``mode=delta`` sends batched changes
+    (``encoding=json`` or ``binary``, see ``gesture_stream``)."""
+    manager: SessionManager = app.state.sessions  # type: ignore[attr-defined]
+    try:
+        broadcaster: GestureBroadcaster = manager.get(session).broadcaster
+    except KeyError:
+        await websocket.close(code=1008)
+        return
+    if mode not in ("full", "delta") or encoding not in ENCODINGS:
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    broadcaster: GestureBroadcaster = app.state.broadcaster  # type: ignore[attr-defined]
-    queue: asyncio.Queue[GesturePrediction] = asyncio.Queue()
+    if mode == "delta":
+        await websocket.send_text(broadcaster.delta.hello(encoding))
+        subscription = broadcaster.delta.open(encoding)
+    else:
+        subscription = broadcaster.open_stream()
 
-    def push(pred: GesturePrediction) -> None:
+    async def watch_disconnect() -> None:
+        # Clients never send anything; receiving only surfaces the disconnect.
         try:
-            queue.put_nowait(pred)
-        except asyncio.QueueFull:
-            pass
-
-    broadcaster.subscribe(push)
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        finally:
+            subscription.close()
 
+    watcher = asyncio.create_task(watch_disconnect())
     try:
-        while True:
-            prediction = await queue.get()
-            await websocket.send_json(
-                {
-                    "label": prediction.label,
-                    "confidence": prediction.confidence,
-                    "timestamp": prediction.timestamp.isoformat(),
-                }
-            )
-    except WebSocketDisconnect:
-        logger.info("WebSocket disconnected")
+        if mode == "delta":
+            # Messages arrive pre-serialized and shared across clients.
+            async for message in subscription:
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+        else:
+            async for prediction in subscription:
+                await websocket.send_json(
+                    {
+                        "label": prediction.label,
+                        "confidence": prediction.confidence,
+                        "timestamp": prediction.timestamp.isoformat(),
+                    }
+                )
+    except (WebSocketDisconnect, RuntimeError):
+        pass
     finally:
-        # nothing to clean up because listeners are weak
-        ...
+        logger.info("WebSocket disconnected")
+        subscription.close()
+        watcher.cancel()
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    state = app.state
+    body = render_metrics(state.sessions, state.keyboard, state.profiler, state.loop_monitor)  # type: ignore[attr-defined]
+    return Response(content=body, media_type=CONTENT_TYPE)
 
 
 @app.get("/api/health")
@@ -115,6 +384,13 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/api/ready")
+async def ready() -> JSONResponse:
+    """Readiness (as opposed to liveness): 503 until warm-up has finished."""
+    status = app.state.warmup.status()  # type: ignore[attr-defined]
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 # Entry point for manual runs
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,9 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProfilerToggle(BaseModel):
+    enabled: bool
+    interval_ms: Optional[float] = Field(None, gt=0, description="Sampling interval; keeps the current one if omitted")
+    reset: bool = Field(False, description="Discard samples collected so far")
@@ -8,6 +8,7 @@ class ActionType(str, Enum):
     key = "key"
     shortcut = "shortcut"
     macro = "macro"
+    text = "text"
 
 
 class GestureMapping(BaseModel):
@@ -15,6 +16,10 @@ class GestureMapping(BaseModel):
     action: str = Field(..., description="Key or macro to trigger")
     action_type: ActionType = ActionType.key
     hold_ms: int = Field(50, description="How long to hold the key in milliseconds")
+    cooldown_ms: int = Field(500, ge=0, description="Minimum time between triggers of this mapping")
+    hold_to_repeat: bool = Field(False, description="Keep firing while the gesture is held")
+    repeat_delay_ms: int = Field(500, ge=0, description="Delay before the first hold-to-repeat fire")
+    repeat_interval_ms: int = Field(200, ge=1, description="Interval between hold-to-repeat fires")
 
 
 class MappingConfig(BaseModel):
@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, validator
+
+from backend.services.frame_sources import FILE_SOURCE_KINDS, FRAME_SOURCE_KINDS, Pacing
+
+
+class SessionCreate(BaseModel):
+    session_id: str = Field(..., regex=r"^[A-Za-z0-9_-]{1,64}$", description="Station identifier")
+    frame_source: str = Field("camera", description="camera | video | images | dump | synthetic")
+    frame_source_path: Optional[Path] = None
+    camera_index: int = 0
+    frame_source_pacing: Pacing = Pacing.realtime
+    frame_source_fps: float = 0.0
+
+    @validator("frame_source")
+    def _known_source(cls, value: str) -> str:
+        if value not in FRAME_SOURCE_KINDS:
+            raise ValueError(f"must be one of {', '.join(FRAME_SOURCE_KINDS)}")
+        return value
+
+    @validator("frame_source_path", always=True)
+    def _path_for_file_sources(cls, value: Optional[Path], values: dict) -> Optional[Path]:
+        if value is None and values.get("frame_source") in FILE_SOURCE_KINDS:
+            raise ValueError(f"required for frame_source '{values['frame_source']}'")
+        return value
+
+
+class SessionInfo(BaseModel):
+    session_id: str
+    frame_source: str
+    running: bool
+    fps: float
+    cpu: Optional[int] = None
+
+
+class SessionList(BaseModel):
+    sessions: List[SessionInfo]
+    capacity: int
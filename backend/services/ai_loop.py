@@ -3,58 +3,225 @@ import logging
 import threading
 import time
 from collections import deque
-from typing import Callable, Deque, Optional
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 
-try:
-    import cv2
-except Exception:
-    cv2 = None
+import numpy as np
 
 from backend.models.gesture_model import GesturePrediction
 from backend.models.mapping_model import GestureMapping, MappingConfig
+from backend.services.frame_pool import FramePool
+from backend.services.gesture_stream import DeltaStream
+from backend.services.gesture_trigger import GestureTrigger
+from backend.services.governor import LatencyGovernor, QualityLevel
 from backend.services.keyboard_service import KeyboardService
+from backend.services.mapping_engine import MappingTable
+from backend.services.motion_gate import MotionGate
+from backend.services.pipeline import LatestSlot, StageStats
+from backend.services.preview import PreviewHub
+from backend.services.recording import LandmarkRecorder
+from backend.services.timeline import GestureTimeline
 from backend.services.vision_service import VisionService
 
 logger = logging.getLogger(__name__)
 
 
 class GestureState:
-    def __init__(self) -> None:
+    def __init__(self, preview: Optional[PreviewHub] = None, timeline: Optional[GestureTimeline] = None) -> None:
         self.latest: Optional[GesturePrediction] = None
         self.enabled: bool = True
-        self.last_frame_jpeg: Optional[bytes] = None
+        self.preview = preview or PreviewHub()
+        self.timeline = timeline or GestureTimeline()
 
     def update(self, prediction: GesturePrediction) -> None:
         self.latest = prediction
+        self.timeline.record_prediction(prediction.label, prediction.confidence)
 
     def toggle(self, enabled: bool) -> None:
         self.enabled = enabled
 
-    def update_frame(self, frame) -> None:
-        """Store latest frame as JPEG bytes for preview."""
-        if cv2 is None or frame is None:
+    def update_frame(self, frame, pool: Optional[FramePool] = None) -> None:
+        """Publish latest frame for preview; encoding is deferred to viewers."""
+        if frame is None:
             return
-        ok, encoded = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-        if ok:
-            self.last_frame_jpeg = encoded.tobytes()
+        self.preview.publish(frame, pool)
+
+    @property
+    def last_frame_jpeg(self) -> Optional[bytes]:
+        encoded = self.preview.encode()
+        return encoded[1] if encoded else None
+
+
+class GestureSubscription:
+    """Bounded per-client buffer fed from any thread and drained on one event loop.
+
+    The buffer is a ring: when the client falls behind, the oldest pending
+    prediction is dropped, and a prediction with the same label as the newest
+    pending one replaces it in place (latest-value conflation).
+    """
+
+    def __init__(
+        self,
+        broadcaster: "GestureBroadcaster",
+        loop: asyncio.AbstractEventLoop,
+        maxsize: int = 8,
+    ) -> None:
+        self._broadcaster = broadcaster
+        self._loop = loop
+        self._buffer: Deque[Tuple[float, GesturePrediction]] = deque()
+        self._maxsize = max(maxsize, 1)
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+        self._wake_scheduled = False
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+
+    def push(self, prediction: GesturePrediction) -> None:
+        """Thread-safe enqueue; wakes the consumer's loop at most once per batch."""
+        if self.closed:
+            return
+        with self._lock:
+            if self._buffer and self._buffer[-1][1].label == prediction.label:
+                self._buffer[-1] = (time.monotonic(), prediction)
+                self.conflated += 1
+            else:
+                if len(self._buffer) >= self._maxsize:
+                    self._buffer.popleft()
+                    self.dropped += 1
+                self._buffer.append((time.monotonic(), prediction))
+            if self._wake_scheduled:
+                return
+            self._wake_scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:  # loop closed underneath us
+            self.close()
+
+    def _wake(self) -> None:
+        with self._lock:
+            self._wake_scheduled = False
+        self._ready.set()
+
+    async def get(self) -> GesturePrediction:
+        """Next prediction; raises ``StopAsyncIteration`` once closed."""
+        while True:
+            with self._lock:
+                if self._buffer:
+                    self.delivered += 1
+                    return self._buffer.popleft()[1]
+                self._ready.clear()
+            if self.closed:
+                raise StopAsyncIteration
+            await self._ready.wait()
+
+    def __aiter__(self) -> "GestureSubscription":
+        return self
+
+    async def __anext__(self) -> GesturePrediction:
+        return await self.get()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._broadcaster._remove(self)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            pending = len(self._buffer)
+            lag = time.monotonic() - self._buffer[0][0] if pending else 0.0
+        return {
+            "pending": pending,
+            "lag_ms": lag * 1000.0,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
 
 
 class GestureBroadcaster:
-    def __init__(self) -> None:
-        self._listeners: Deque[Callable[[GesturePrediction], None]] = deque()
+    """Fan-out hub for predictions emitted on the AI loop thread.
+
+    ``subscribe`` registers a synchronous callback run on the emitting thread;
+    ``open_stream`` returns an async subscription bound to the caller's event
+    loop, and ``delta`` serves change-only batched streams (see
+    ``gesture_stream``). All are removed explicitly, so disconnected clients
+    do not leak.
+    """
 
-    def subscribe(self, fn: Callable[[GesturePrediction], None]) -> None:
-        self._listeners.append(fn)
+    def __init__(self, stream_buffer: int = 8, delta_options: Optional[Dict[str, float]] = None) -> None:
+        self._lock = threading.Lock()
+        self._listeners: Tuple[Callable[[GesturePrediction], None], ...] = ()
+        self._streams: Tuple[GestureSubscription, ...] = ()
+        self._stream_buffer = stream_buffer
+        self.delta = DeltaStream(self, **(delta_options or {}))
+
+    def subscribe(self, fn: Callable[[GesturePrediction], None]) -> Callable[[], None]:
+        """Register a synchronous listener; returns a function that unsubscribes it."""
+        with self._lock:
+            self._listeners = self._listeners + (fn,)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                self._listeners = tuple(l for l in self._listeners if l is not fn)
+
+        return unsubscribe
+
+    def open_stream(self, maxsize: Optional[int] = None) -> GestureSubscription:
+        """Create a subscription drained on the currently running event loop."""
+        subscription = GestureSubscription(
+            self, asyncio.get_running_loop(), maxsize or self._stream_buffer
+        )
+        with self._lock:
+            self._streams = self._streams + (subscription,)
+        return subscription
+
+    def _remove(self, subscription: GestureSubscription) -> None:
+        with self._lock:
+            self._streams = tuple(s for s in self._streams if s is not subscription)
 
     def emit(self, prediction: GesturePrediction) -> None:
-        for listener in list(self._listeners):
+        # Snapshot tuples are replaced, never mutated, so iteration needs no lock.
+        for listener in self._listeners:
             try:
                 listener(prediction)
             except Exception as exc:  # pragma: no cover - guard
                 logger.warning("Gesture listener failed: %s", exc)
+        for subscription in self._streams:
+            subscription.push(prediction)
+
+    def subscriber_count(self) -> int:
+        return len(self._streams)
+
+    def stats(self) -> Dict[str, object]:
+        streams = self._streams
+        return {
+            "listeners": len(self._listeners),
+            "subscribers": len(streams),
+            "per_subscriber": [s.stats() for s in streams],
+            "delta": self.delta.stats(),
+        }
 
 
 class AILoopService:
+    """Runs capture and inference as independent stages.
+
+    Capture hands frames to inference through a latest-wins slot, so
+    throughput is bounded by the slowest stage rather than the sum of both and
+    stale frames are dropped instead of queued. Key actuation is handed to the
+    ``KeyboardService`` worker and preview encoding to ``PreviewHub`` viewers,
+    so neither blocks this loop. An optional ``LatencyGovernor`` adjusts frame
+    rate, resolution, inference input size and preview publishing to keep
+    frame latency under its SLO.
+    """
+
+    STAGES = ("pacing", "capture", "preprocess", "inference", "broadcast", "latency")
+
     def __init__(
         self,
         vision_service: VisionService,
@@ -63,74 +230,205 @@ class AILoopService:
         gesture_state: GestureState,
         broadcaster: GestureBroadcaster,
         target_fps: int = 12,
+        trigger: Optional[GestureTrigger] = None,
+        motion_gate: Optional[MotionGate] = None,
+        idle_fps: float = 2.0,
+        recorder: Optional[LandmarkRecorder] = None,
+        governor: Optional[LatencyGovernor] = None,
     ) -> None:
         self.vision = vision_service
         self.keyboard = keyboard_service
-        self.mapping_config = mapping_config
+        # Swapped wholesale by update_mappings; the loop reads it once per frame, lock-free.
+        self.mapping_table: MappingTable = keyboard_service.compile_table(mapping_config, strict=False)
         self.gesture_state = gesture_state
         self.broadcaster = broadcaster
         self.target_fps = target_fps
-        self._thread: Optional[threading.Thread] = None
+        self.trigger = trigger or GestureTrigger()
+        self.motion_gate = motion_gate
+        self.idle_fps = idle_fps
+        self.recorder = recorder
+        self.governor = governor
+        self._threads: List[threading.Thread] = []
         self._stop_event = threading.Event()
         self._last_label: Optional[str] = None
+        # Frames are pooled: each stage releases what it no longer needs (see FramePool).
+        self.frame_pool = vision_service.frame_pool if vision_service is not None else FramePool()
+        # A None frame means "scene unchanged": reuse the previous prediction.
+        self._frame_slot: LatestSlot[Tuple[float, Optional[np.ndarray]]] = LatestSlot(
+            on_drop=lambda item: self.frame_pool.release(item[1])
+        )
+        self._stats: Dict[str, StageStats] = {name: StageStats() for name in self.STAGES}
+        self._frame_interval = StageStats()
+        self._last_output: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """True once the loop is running; the process variant also waits for worker warm-up."""
+        return self.running
 
     def start(self) -> None:
-        if self._thread and self._thread.is_alive():
+        if self.running:
             return
         self._stop_event.clear()
+        self._frame_slot.reopen()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
         self.vision.start()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        self._threads = [
+            threading.Thread(target=target, name=f"ai-loop-{name}", daemon=True)
+            for name, target in (
+                ("capture", self._capture_loop),
+                ("inference", self._inference_loop),
+            )
+        ]
+        for thread in self._threads:
+            thread.start()
 
     def stop(self) -> None:
         self._stop_event.set()
-        if self._thread:
-            self._thread.join(timeout=2)
+        self._frame_slot.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
         self.vision.stop()
+        if self.recorder is not None:
+            self.recorder.flush()
 
-    def _run_loop(self) -> None:
-        interval = 1.0 / max(self.target_fps, 1)
+    def _capture_fps(self) -> float:
+        return self.governor.level.fps if self.governor is not None else float(self.target_fps)
+
+    def _capture_loop(self) -> None:
         while not self._stop_event.is_set():
-            start = time.time()
+            start = time.monotonic()
+            fps = self._capture_fps()
+            interval = 1.0 / max(fps, 1.0)
             frame = self.vision.read_frame()
+            # File sources sleep in their pacer; that is not capture work.
+            captured_at = time.monotonic()
+            waited = self.vision.pacing_wait
+            self._stats["capture"].record(captured_at - start - waited)
             if frame is None:
                 time.sleep(interval)
                 continue
-            frame = self.vision.preprocess(frame)
-            self.gesture_state.update_frame(frame)
-            label, conf = self.vision.extract_landmarks(frame)
+            self._stats["pacing"].record(waited)
+            if self.motion_gate is not None and not self.motion_gate.check(frame):
+                self.frame_pool.release(frame)
+                self._frame_slot.put((captured_at, None))
+            else:
+                with self._stats["preprocess"].time():
+                    processed = self.vision.preprocess(frame)
+                if processed is not frame:
+                    self.frame_pool.release(frame)
+                self._frame_slot.put((captured_at, processed))
+            idle = self.motion_gate is not None and self.motion_gate.idle
+            # A governor slowdown paces even sources that otherwise set their own rate.
+            if self.vision.source_paced and not idle and fps >= self.target_fps:
+                continue
+            period = 1.0 / max(self.idle_fps, 0.1) if idle else interval
+            elapsed = time.monotonic() - start
+            time.sleep(max(period - elapsed, 0))
+
+    def _inference_loop(self) -> None:
+        while not self._stop_event.is_set():
+            item = self._frame_slot.get(timeout=0.5)
+            if item is None:
+                continue
+            captured_at, frame = item
+            if frame is None:
+                if self.gesture_state.latest is not None:
+                    self._apply_mapping(self.gesture_state.latest)
+                continue
+            try:
+                if self.governor is None or self.governor.level.preview:
+                    self.gesture_state.update_frame(frame, self.frame_pool)
+                with self._stats["inference"].time():
+                    label, conf = self.vision.extract_landmarks(frame)
+            finally:
+                self.frame_pool.release(frame)
+            if self.recorder is not None:
+                self.recorder.write(captured_at, label, conf, self.vision.last_landmarks)
             prediction = GesturePrediction(label=label, confidence=conf)
             self.gesture_state.update(prediction)
-            self.broadcaster.emit(prediction)
+            with self._stats["broadcast"].time():
+                self.broadcaster.emit(prediction)
             if label != self._last_label:
                 logger.info("Gesture changed: %s (%.2f)", label, conf)
                 self._last_label = label
             self._apply_mapping(prediction)
-            elapsed = time.time() - start
-            sleep_time = max(interval - elapsed, 0)
-            time.sleep(sleep_time)
+            now = time.monotonic()
+            self._stats["latency"].record(now - captured_at)
+            if self._last_output is not None:
+                self._frame_interval.record(now - self._last_output)
+            self._last_output = now
+            if self.governor is not None:
+                level = self.governor.record(now - captured_at)
+                if level is not None:
+                    self._apply_quality(level)
+
+    def _apply_quality(self, level: QualityLevel) -> None:
+        self.vision.set_quality(level.frame_scale, level.input_scale)
+
+    def governor_stats(self) -> Optional[Dict[str, object]]:
+        return self.governor.stats() if self.governor is not None else None
 
     def _apply_mapping(self, prediction: GesturePrediction) -> None:
         if not self.gesture_state.enabled:
+            self.trigger.reset()
             return
-        mapping_index = self.mapping_config.to_index()
-        mapping: Optional[GestureMapping] = mapping_index.get(prediction.label)
+        table = self.mapping_table
+        mapping: Optional[GestureMapping] = self.trigger.update(
+            prediction.label, prediction.confidence, table.index
+        )
         if not mapping:
             return
-        self.keyboard.press_action(mapping)
+        self.gesture_state.timeline.record_action(mapping.gesture, prediction.confidence)
+        self.keyboard.press_compiled(table.compiled[mapping.gesture])
 
-    def update_mappings(self, config: MappingConfig) -> None:
-        self.mapping_config = config
+    def stats(self) -> Dict[str, object]:
+        """Per-stage timings, achieved FPS, queue depths and drop counters."""
+        interval = self._frame_interval.snapshot()["avg_ms"]
+        return {
+            "target_fps": self.target_fps,
+            "fps": 1000.0 / interval if interval > 0 else 0.0,
+            "stages": {name: stats.snapshot() for name, stats in self._stats.items()},
+            "governor": self.governor_stats(),
+            "queues": {"frames": self._frame_slot.depth()},
+            "dropped": {"frames": self._frame_slot.dropped},
+            "vision": self.vision.stats(),
+            "motion": self.motion_gate.stats() if self.motion_gate is not None else None,
+            "preview": self.gesture_state.preview.stats(),
+            "history": self.gesture_state.timeline.stats(),
+            "triggers": {
+                "active": self.trigger.active,
+                "fired": self.trigger.triggered,
+                "suppressed": self.trigger.suppressed,
+            },
+            "actuation": self.keyboard.stats(),
+            "broadcast": self.broadcaster.stats(),
+        }
 
-    async def stream_predictions(self):
-        q: asyncio.Queue[GesturePrediction] = asyncio.Queue()
+    def histograms(self) -> Dict[str, Dict[str, object]]:
+        """Lifetime latency histograms per stage, for the metrics endpoint."""
+        return {name: stats.histogram() for name, stats in self._stats.items()}
 
-        def push(pred: GesturePrediction) -> None:
-            try:
-                q.put_nowait(pred)
-            except asyncio.QueueFull:
-                pass
+    @property
+    def mapping_config(self) -> MappingConfig:
+        return self.mapping_table.config
 
-        self.broadcaster.subscribe(push)
-        while True:
-            yield await q.get()
+    def update_mappings(self, config: MappingConfig) -> None:
+        """Compile ``config`` and swap it in.
+
+        Raises ``MappingValidationError``, keeping the current table, if any mapping is invalid.
+        """
+        self.mapping_table = self.keyboard.compile_table(config, version=self.mapping_table.version + 1)
+
+    async def stream_predictions(self):
+        subscription = self.broadcaster.open_stream()
+        try:
+            async for prediction in subscription:
+                yield prediction
+        finally:
+            subscription.close()
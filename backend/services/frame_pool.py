@@ -0,0 +1,96 @@
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+Key = Tuple[Tuple[int, ...], str]
+
+
+class FramePool:
+    """Reference-counted, reusable frame buffers keyed by shape and dtype.
+
+    ``acquire`` hands out a buffer holding one reference. A consumer that keeps
+    the frame past the call it received it in ``retain``s it, and every holder
+    ``release``s it when done; the last release puts the buffer back on the
+    free list for the next capture instead of leaving it to the allocator.
+    ``retain``/``release`` ignore arrays the pool doesn't own, so callers can
+    pass any frame through without checking where it came from. A buffer that
+    is dropped without being released is simply garbage-collected.
+    """
+
+    def __init__(self, max_free: int = 6) -> None:
+        self.max_free = max_free
+        # Re-entrant: a finalizer can run from a GC pass triggered inside the lock.
+        self._lock = threading.RLock()
+        self._free: Dict[Key, List[np.ndarray]] = {}
+        # Reference counts of outstanding buffers by id(); a finalizer drops the
+        # entry if a buffer is collected unreleased, before its id can be reused.
+        self._refs: Dict[int, int] = {}
+        self.allocated = 0
+        self.reused = 0
+        self.discarded = 0
+        self.lost = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype: np.dtype = np.uint8) -> np.ndarray:
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                array = free.pop()
+                self.reused += 1
+            else:
+                array = None
+                self.allocated += 1
+        if array is None:
+            array = np.empty(shape, dtype=dtype)
+            weakref.finalize(array, self._forget, id(array))
+        with self._lock:
+            self._refs[id(array)] = 1
+        return array
+
+    def _forget(self, key: int) -> None:
+        with self._lock:
+            if self._refs.pop(key, None) is not None:
+                self.lost += 1
+
+    def acquire_like(self, frame: np.ndarray) -> np.ndarray:
+        return self.acquire(frame.shape, frame.dtype)
+
+    def owns(self, array: Optional[np.ndarray]) -> bool:
+        return array is not None and id(array) in self._refs
+
+    def retain(self, array: Optional[np.ndarray]) -> None:
+        if array is None:
+            return
+        with self._lock:
+            if id(array) in self._refs:
+                self._refs[id(array)] += 1
+
+    def release(self, array: Optional[np.ndarray]) -> None:
+        if array is None:
+            return
+        with self._lock:
+            refs = self._refs.get(id(array))
+            if refs is None:
+                return
+            if refs > 1:
+                self._refs[id(array)] = refs - 1
+                return
+            del self._refs[id(array)]
+            free = self._free.setdefault((array.shape, array.dtype.str), [])
+            if len(free) < self.max_free:
+                free.append(array)
+            else:
+                self.discarded += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "allocated": self.allocated,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "lost": self.lost,
+                "outstanding": len(self._refs),
+                "free": sum(len(v) for v in self._free.values()),
+            }
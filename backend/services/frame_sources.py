@@ -0,0 +1,325 @@
+import logging
+import time
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+from backend.services.lazy_import import LazyModule
+
+logger = logging.getLogger(__name__)
+
+cv2 = LazyModule("cv2")
+
+FRAME_SOURCE_KINDS = ("camera", "video", "images", "dump", "synthetic")
+# Kinds that read from ``path``.
+FILE_SOURCE_KINDS = ("video", "images", "dump")
+
+
+class Pacing(str, Enum):
+    realtime = "realtime"  # honour the source's native frame rate
+    fast = "fast"  # deliver frames as fast as they are read
+    fixed = "fixed"  # deliver frames at an explicit rate
+
+
+class Pacer:
+    def __init__(self, mode: Pacing, fps: float) -> None:
+        self.mode = mode
+        self.fps = fps
+        self._next = 0.0
+
+    def wait(self) -> float:
+        """Sleep until the next frame is due; returns the seconds slept."""
+        if self.mode == Pacing.fast or self.fps <= 0:
+            return 0.0
+        now = time.perf_counter()
+        waited = 0.0
+        if self._next > now:
+            waited = self._next - now
+            time.sleep(waited)
+            now = self._next
+        # Don't try to catch up after a stall; resume pacing from now.
+        self._next = max(self._next + 1.0 / self.fps, now)
+        return waited
+
+
+def _copy_into(frame: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    if out is not None and out.shape == frame.shape and out.dtype == frame.dtype:
+        np.copyto(out, frame)
+        return out
+    return np.array(frame)
+
+
+class FrameSource:
+    """Base class for anything that yields BGR ``uint8`` frames.
+
+    ``paced`` tells the AI loop whether the source already controls timing;
+    when it does, the loop reads as fast as the source delivers.
+    ``last_wait`` is how long the last ``read`` slept in its pacer.
+    """
+
+    paced = True
+
+    def __init__(self, pacing: Pacing = Pacing.realtime, fps: float = 0.0, loop: bool = True) -> None:
+        self.pacing = Pacing(pacing)
+        self.fps = fps
+        self.loop = loop
+        self._pacer = Pacer(self.pacing, fps)
+        self.last_wait = 0.0
+
+    def open(self) -> bool:
+        self._pacer = Pacer(self.pacing, self.fps or self.native_fps())
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def native_fps(self) -> float:
+        return 30.0
+
+    def read(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Next frame, written into ``out`` when the source can (check ``frame is out``)."""
+        frame = self._next_frame(out)
+        if frame is None and self.loop and self._rewind():
+            frame = self._next_frame(out)
+        self.last_wait = self._pacer.wait() if frame is not None else 0.0
+        return frame
+
+    def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def _rewind(self) -> bool:
+        return False
+
+
+class CameraSource(FrameSource):
+    """Live capture device; in realtime mode the camera itself paces delivery."""
+
+    def __init__(self, index: int = 0, pacing: Pacing = Pacing.realtime, fps: float = 0.0) -> None:
+        super().__init__(pacing=pacing, fps=fps, loop=False)
+        self.index = index
+        self.cap = None
+        self.paced = self.pacing == Pacing.fixed
+
+    def open(self) -> bool:
+        if not cv2:
+            logger.error("OpenCV is required to start the camera")
+            return False
+        if self.index < 0:
+            logger.info("Camera index < 0; skipping capture start")
+            return False
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            logger.error("Unable to open camera %s", self.index)
+            self.cap = None
+            return False
+        return super().open()
+
+    def close(self) -> None:
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def native_fps(self) -> float:
+        return 0.0
+
+    def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if not self.cap:
+            return None
+        # OpenCV decodes straight into ``out`` when its shape and dtype match.
+        ret, frame = self.cap.read(out) if out is not None else self.cap.read()
+        return frame if ret else None
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: Union[str, Path], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.cap = None
+
+    def open(self) -> bool:
+        if not cv2:
+            logger.error("OpenCV is required to read video files")
+            return False
+        self.cap = cv2.VideoCapture(str(self.path))
+        if not self.cap.isOpened():
+            logger.error("Unable to open video %s", self.path)
+            self.cap = None
+            return False
+        return super().open()
+
+    def close(self) -> None:
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def native_fps(self) -> float:
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap else 0.0
+        return fps if fps and fps > 0 else 30.0
+
+    def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if not self.cap:
+            return None
+        # OpenCV decodes straight into ``out`` when its shape and dtype match.
+        ret, frame = self.cap.read(out) if out is not None else self.cap.read()
+        return frame if ret else None
+
+    def _rewind(self) -> bool:
+        return bool(self.cap and self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0))
+
+
+class ImageDirectorySource(FrameSource):
+    """Sorted image files (``.png``/``.jpg``/...) or ``.npy`` frames in a directory."""
+
+    IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp"}
+
+    def __init__(self, path: Union[str, Path], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self._files: List[Path] = []
+        self._pos = 0
+
+    def open(self) -> bool:
+        suffixes = self.IMAGE_SUFFIXES | {".npy"} if cv2 else {".npy"}
+        try:
+            self._files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in suffixes)
+        except OSError as exc:
+            logger.error("Unable to list frames in %s: %s", self.path, exc)
+            return False
+        if not self._files:
+            logger.error("No frames found in %s", self.path)
+            return False
+        self._pos = 0
+        return super().open()
+
+    def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        while self._pos < len(self._files):
+            path = self._files[self._pos]
+            self._pos += 1
+            try:
+                frame = np.load(path) if path.suffix.lower() == ".npy" else cv2.imread(str(path))
+            except (OSError, ValueError):
+                frame = None
+            if frame is not None:
+                return frame
+            logger.warning("Skipping unreadable frame %s", path)
+        return None
+
+    def _rewind(self) -> bool:
+        self._pos = 0
+        return bool(self._files)
+
+
+class FrameDumpSource(FrameSource):
+    """Memory-mapped ``.npy`` stack of shape (N, H, W, C); frames are paged in on read."""
+
+    def __init__(self, path: Union[str, Path], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self._frames: Optional[np.ndarray] = None
+        self._pos = 0
+
+    def open(self) -> bool:
+        try:
+            frames = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError) as exc:
+            logger.error("Unable to load frame dump %s: %s", self.path, exc)
+            return False
+        if not isinstance(frames, np.ndarray):
+            frames.close()  # an .npz archive
+            frames = None
+        if frames is None or frames.ndim != 4 or frames.dtype != np.uint8:
+            logger.error("Expected uint8 (N, H, W, C) frame dump in %s", self.path)
+            return False
+        self._frames = frames
+        self._pos = 0
+        return super().open()
+
+    def close(self) -> None:
+        self._frames = None
+
+    def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if self._frames is None or self._pos >= len(self._frames):
+            return None
+        frame = _copy_into(self._frames[self._pos], out)
+        self._pos += 1
+        return frame
+
+    def _rewind(self) -> bool:
+        self._pos = 0
+        return self._frames is not None and len(self._frames) > 0
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames (moving blob over a gradient), no hardware needed."""
+
+    def __init__(self, width: int = 640, height: int = 480, frames: int = 64, seed: int = 0, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.width = width
+        self.height = height
+        self.count = max(frames, 1)
+        self.seed = seed
+        self._frames: List[np.ndarray] = []
+        self._pos = 0
+
+    def open(self) -> bool:
+        rng = np.random.default_rng(self.seed)
+        ys, xs = np.mgrid[0 : self.height, 0 : self.width]
+        base = ((xs * 255) // max(self.width - 1, 1)).astype(np.uint8)
+        radius2 = (min(self.width, self.height) // 8) ** 2
+        self._frames = []
+        for i in range(self.count):
+            phase = 2 * np.pi * i / self.count
+            cx = self.width / 2 + self.width / 4 * np.cos(phase)
+            cy = self.height / 2 + self.height / 4 * np.sin(phase)
+            blob = ((xs - cx) ** 2 + (ys - cy) ** 2) < radius2
+            frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            frame[..., 0] = base
+            frame[..., 1] = base[:, ::-1]
+            frame[..., 2] = rng.integers(0, 16, size=(self.height, self.width), dtype=np.uint8)
+            frame[blob] = (90, 160, 220)
+            self._frames.append(frame)
+        self._pos = 0
+        return super().open()
+
+    def close(self) -> None:
+        self._frames = []
+
+    def _next_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if self._pos >= len(self._frames):
+            return None
+        frame = _copy_into(self._frames[self._pos], out)
+        self._pos += 1
+        return frame
+
+    def _rewind(self) -> bool:
+        self._pos = 0
+        return bool(self._frames)
+
+
+def create_frame_source(
+    kind: str = "camera",
+    path: Optional[Union[str, Path]] = None,
+    camera_index: int = 0,
+    pacing: Union[str, Pacing] = Pacing.realtime,
+    fps: float = 0.0,
+    loop: bool = True,
+    width: int = 640,
+    height: int = 480,
+) -> FrameSource:
+    """Build a frame source from settings-style parameters."""
+    pacing = Pacing(pacing)
+    if kind == "camera":
+        return CameraSource(camera_index, pacing=pacing, fps=fps)
+    if kind == "synthetic":
+        return SyntheticSource(width=width, height=height, pacing=pacing, fps=fps, loop=loop)
+    if path is None:
+        raise ValueError(f"Frame source '{kind}' requires a path")
+    if kind == "video":
+        return VideoFileSource(path, pacing=pacing, fps=fps, loop=loop)
+    if kind == "images":
+        return ImageDirectorySource(path, pacing=pacing, fps=fps, loop=loop)
+    if kind == "dump":
+        return FrameDumpSource(path, pacing=pacing, fps=fps, loop=loop)
+    raise ValueError(f"Unknown frame source '{kind}'")
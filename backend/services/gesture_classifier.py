@@ -0,0 +1,224 @@
+import threading
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+# Static hand poses, as classified from a single frame's landmarks.
+POSE_LABELS: Tuple[str, ...] = (
+    "unknown",
+    "pinch",
+    "thumbs_up",
+    "thumbs_down",
+    "point",
+    "fist",
+    "open_hand",
+)
+# Movements recognised over a landmark history (see ``motion_gestures``).
+MOTION_LABELS: Tuple[str, ...] = ("swipe_left", "swipe_right", "swipe_up", "swipe_down", "circle", "tap")
+# Compact numeric ids for gesture labels; index 0 is always "unknown".
+GESTURE_LABELS: Tuple[str, ...] = POSE_LABELS + MOTION_LABELS
+LABEL_IDS: Dict[str, int] = {label: i for i, label in enumerate(GESTURE_LABELS)}
+
+
+class LabelTable:
+    """``GESTURE_LABELS`` ids, extended on first sight of a label a custom model emits.
+
+    Lookups of known labels are a lock-free dict read; a label is appended to
+    ``labels`` before its id is published, so ``labels[id]`` is always valid.
+    """
+
+    def __init__(self) -> None:
+        self.labels: List[str] = list(GESTURE_LABELS)
+        self._ids: Dict[str, int] = dict(LABEL_IDS)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def id(self, label: str) -> int:
+        label_id = self._ids.get(label)
+        if label_id is None:
+            with self._lock:
+                label_id = self._ids.get(label)
+                if label_id is None:
+                    self.labels.append(label)
+                    label_id = self._ids[label] = len(self.labels) - 1
+        return label_id
+
+
+# Shared by the gesture stream and timeline so both report the same ids.
+LABEL_TABLE = LabelTable()
+
+NUM_LANDMARKS = 21
+WRIST, THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP = 0, 4, 8, 12, 16, 20
+FINGER_TIPS = np.array([INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP])
+FINGER_BASES = np.array([5, 9, 13, 17])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+
+
+def landmarks_to_array(hands: Sequence) -> np.ndarray:
+    """Convert MediaPipe ``multi_hand_landmarks`` into a (hands, 21, 3) float32 array."""
+    return np.array(
+        [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in hands], dtype=np.float32
+    ).reshape(-1, NUM_LANDMARKS, 3)
+
+
+def extract_features(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-hand features for landmarks shaped (..., 21, 3); every value has shape (...)."""
+    lm = np.asarray(landmarks, dtype=np.float32)
+    wrist = lm[..., WRIST, :]
+    thumb = lm[..., THUMB_TIP, :]
+    index = lm[..., INDEX_TIP, :]
+    tips = lm[..., FINGER_TIPS, :]
+    bases = lm[..., FINGER_BASES, :]
+    pips = lm[..., FINGER_PIPS, :]
+
+    extended = tips[..., 1] < bases[..., 1] - 0.02  # (..., 4) index, middle, ring, pinky
+    pinch_dist = np.abs(thumb[..., 0] - index[..., 0]) + np.abs(thumb[..., 1] - index[..., 1])
+
+    # Bend angle at each PIP joint (0 = straight finger, pi = folded back on itself).
+    a = bases - pips
+    b = tips - pips
+    cos = (a * b).sum(-1) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1) + 1e-6)
+    bend = np.pi - np.arccos(np.clip(cos, -1.0, 1.0))
+
+    palm = np.linalg.norm(lm[..., 9, :2] - wrist[..., :2], axis=-1) + 1e-6
+    spread = np.linalg.norm(tips[..., :2] - wrist[..., None, :2], axis=-1) / palm[..., None]
+
+    return {
+        "pinch_dist": pinch_dist,
+        "thumb_up": thumb[..., 1] < wrist[..., 1] - 0.05,
+        "thumb_down": thumb[..., 1] > wrist[..., 1] + 0.08,
+        "index_ext": extended[..., 0],
+        "middle_ext": extended[..., 1],
+        "ring_ext": extended[..., 2],
+        "pinky_ext": extended[..., 3],
+        "extended_count": extended.sum(-1),
+        "bend": bend,
+        "spread": spread,
+    }
+
+
+def feature_vector(landmarks: np.ndarray) -> np.ndarray:
+    """Continuous (..., 13) feature matrix for linear models."""
+    f = extract_features(landmarks)
+    return np.concatenate(
+        [
+            f["pinch_dist"][..., None],
+            f["bend"],
+            f["spread"],
+            f["extended_count"][..., None].astype(np.float32),
+            f["thumb_up"][..., None].astype(np.float32),
+            f["thumb_down"][..., None].astype(np.float32),
+            np.ones_like(f["pinch_dist"])[..., None],
+        ],
+        axis=-1,
+    ).astype(np.float32)
+
+
+# Boolean predicates derived from features, referenced by name in the rule table.
+PREDICATES = (
+    "pinch_close",
+    "thumb_up",
+    "thumb_down",
+    "index_ext",
+    "middle_ext",
+    "ring_ext",
+    "pinky_ext",
+    "few_extended",
+    "many_extended",
+)
+
+# First matching rule wins; unmatched hands fall back to ("unknown", 0.4).
+# Each rule lists the predicates that must hold (True) or must not (False).
+DEFAULT_RULES: Tuple[Tuple[str, float, Dict[str, bool]], ...] = (
+    ("pinch", 0.85, {"pinch_close": True, "index_ext": True}),
+    ("thumbs_up", 0.75, {"thumb_up": True, "index_ext": False, "middle_ext": False}),
+    ("thumbs_down", 0.75, {"thumb_down": True, "index_ext": False, "middle_ext": False}),
+    ("point", 0.7, {"index_ext": True, "middle_ext": False, "ring_ext": False, "pinky_ext": False}),
+    ("fist", 0.65, {"few_extended": True, "pinch_close": False}),
+    ("open_hand", 0.65, {"many_extended": True}),
+)
+FALLBACK_CONFIDENCE = 0.4
+
+
+def predicate_matrix(landmarks: np.ndarray) -> np.ndarray:
+    """(N, len(PREDICATES)) boolean matrix for landmarks shaped (N, 21, 3)."""
+    f = extract_features(landmarks)
+    columns = {
+        "pinch_close": f["pinch_dist"] < 0.1,
+        "thumb_up": f["thumb_up"],
+        "thumb_down": f["thumb_down"],
+        "index_ext": f["index_ext"],
+        "middle_ext": f["middle_ext"],
+        "ring_ext": f["ring_ext"],
+        "pinky_ext": f["pinky_ext"],
+        "few_extended": f["extended_count"] <= 1,
+        "many_extended": f["extended_count"] >= 3,
+    }
+    return np.stack([columns[name] for name in PREDICATES], axis=-1)
+
+
+class RuleGestureClassifier:
+    """Table-driven classifier evaluated for many hands at once.
+
+    Rules compile into a (rules, predicates) "care" mask and expected value
+    matrix; a hand matches a rule when every cared-about predicate equals
+    the expected value, and the first matching rule wins.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, float, Dict[str, bool]]] = DEFAULT_RULES) -> None:
+        self.rules = tuple(rules)
+        index = {name: i for i, name in enumerate(PREDICATES)}
+        self._care = np.zeros((len(self.rules), len(PREDICATES)), dtype=bool)
+        self._expect = np.zeros_like(self._care)
+        for r, (_, _, required) in enumerate(self.rules):
+            for name, value in required.items():
+                self._care[r, index[name]] = True
+                self._expect[r, index[name]] = value
+        self._label_ids = np.array([LABEL_IDS[label] for label, _, _ in self.rules] + [0], dtype=np.int16)
+        self._confidences = np.array(
+            [conf for _, conf, _ in self.rules] + [FALLBACK_CONFIDENCE], dtype=np.float32
+        )
+
+    def classify(self, landmarks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (label_ids int16, confidences float32), each shaped (N,)."""
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+        preds = predicate_matrix(landmarks)  # (N, P)
+        ok = ~self._care[None] | (preds[:, None, :] == self._expect[None])  # (N, R, P)
+        matches = ok.all(-1)  # (N, R)
+        # Append an always-true fallback column so argmax picks it when nothing matched.
+        matches = np.concatenate([matches, np.ones((len(landmarks), 1), dtype=bool)], axis=1)
+        first = matches.argmax(axis=1)
+        return self._label_ids[first], self._confidences[first]
+
+
+class LinearGestureClassifier:
+    """Softmax-linear model over ``feature_vector``; weights shaped (features, labels)."""
+
+    def __init__(self, weights: np.ndarray, labels: Sequence[str] = POSE_LABELS) -> None:
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.labels = tuple(labels)
+        self._label_ids = np.array([LABEL_TABLE.id(label) for label in self.labels], dtype=np.int16)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LinearGestureClassifier":
+        data = np.load(path)
+        return cls(data["weights"], [str(label) for label in data["labels"]])
+
+    def classify(self, landmarks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        x = feature_vector(np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3))
+        logits = x @ self.weights
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return self._label_ids[best], probs[np.arange(len(best)), best].astype(np.float32)
+
+
+GestureClassifier = Union[RuleGestureClassifier, LinearGestureClassifier]
+
+
+def label_names(label_ids: np.ndarray) -> List[str]:
+    return [LABEL_TABLE.labels[i] for i in label_ids]
@@ -0,0 +1,256 @@
+"""Change-only, batched gesture stream shared by every delta-mode WebSocket client.
+
+Predictions are diffed once, on the emitting thread: an update is recorded
+only when the label changes or the confidence moves by ``confidence_step``
+since the last update. Every ``tick`` a single task turns the pending
+updates into one batch message per encoding and hands the same str/bytes
+object to every subscriber; when nothing changed for ``heartbeat`` seconds
+it sends the current state instead.
+
+Updates carry absolute values (``seq, label_id, confidence, unix_ms``), so
+a client that drops a message only misses history, never state. Label ids
+index the ``labels`` list sent in the ``hello`` (and ``labels`` messages
+when a new label appears).
+
+Binary messages are little-endian: a ``<BH`` header (type, count) followed
+by ``count`` ``<IHfd`` records (seq, label id, confidence, unix seconds).
+"""
+
+import asyncio
+import json
+import logging
+import struct
+import threading
+from collections import deque
+from datetime import timezone
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from backend.models.gesture_model import GesturePrediction
+from backend.services.gesture_classifier import LABEL_TABLE, LabelTable
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ("json", "binary")
+MSG_BATCH = 1
+MSG_HEARTBEAT = 2
+HEADER = struct.Struct("<BH")
+UPDATE = struct.Struct("<IHfd")
+
+# seq, label id, confidence, unix seconds
+Update = Tuple[int, int, float, float]
+Message = Union[str, bytes]
+
+
+def _json_update(update: Update) -> list:
+    seq, label, conf, ts = update
+    return [seq, label, round(conf, 3), int(ts * 1000)]
+
+
+def encode_json(kind: int, updates: List[Update]) -> str:
+    return json.dumps(
+        {
+            "type": "batch" if kind == MSG_BATCH else "heartbeat",
+            "updates": [_json_update(update) for update in updates],
+        },
+        separators=(",", ":"),
+    )
+
+
+def encode_binary(kind: int, updates: List[Update]) -> bytes:
+    out = bytearray(HEADER.size + UPDATE.size * len(updates))
+    HEADER.pack_into(out, 0, kind, len(updates))
+    for i, update in enumerate(updates):
+        UPDATE.pack_into(out, HEADER.size + i * UPDATE.size, *update)
+    return bytes(out)
+
+
+ENCODERS: Dict[str, Callable[[int, List[Update]], Message]] = {"json": encode_json, "binary": encode_binary}
+
+
+class DeltaSubscriber:
+    """One client's queue of pre-serialized messages; lives on the server's event loop."""
+
+    def __init__(self, stream: "DeltaStream", encoding: str, maxsize: int) -> None:
+        self.stream = stream
+        self.encoding = encoding
+        self._queue: Deque[Message] = deque()
+        self._maxsize = max(maxsize, 1)
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def offer(self, message: Message) -> None:
+        if len(self._queue) >= self._maxsize:
+            # Updates are absolute, so the oldest message is safe to lose.
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(message)
+        self._ready.set()
+
+    async def get(self) -> Message:
+        while not self._queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        self.delivered += 1
+        return self._queue.popleft()
+
+    def __aiter__(self) -> "DeltaSubscriber":
+        return self
+
+    async def __anext__(self) -> Message:
+        return await self.get()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._ready.set()
+        self.stream._remove(self)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "encoding": self.encoding,
+            "pending": len(self._queue),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class DeltaStream:
+    def __init__(
+        self,
+        broadcaster,
+        tick: float = 0.1,
+        heartbeat: float = 5.0,
+        confidence_step: float = 0.05,
+        queue_size: int = 32,
+        labels: Optional[LabelTable] = None,
+    ) -> None:
+        self._broadcaster = broadcaster
+        self.tick = tick
+        self.heartbeat = heartbeat
+        self.confidence_step = confidence_step
+        self.queue_size = queue_size
+        self.label_table = labels or LABEL_TABLE
+        self._labels_sent = len(self.label_table)
+        self._lock = threading.Lock()
+        self._pending: List[Update] = []
+        self._last: Optional[Update] = None
+        self._seq = 0
+        self._subscribers: Tuple[DeltaSubscriber, ...] = ()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.suppressed = 0
+        self.batches = 0
+        self.heartbeats = 0
+
+    def _on_prediction(self, prediction: GesturePrediction) -> None:
+        """Broadcaster listener (AI loop thread): record the prediction if it changed."""
+        last = self._last
+        label_id = self.label_table.id(prediction.label)
+        if (
+            last is not None
+            and last[1] == label_id
+            and abs(last[2] - prediction.confidence) < self.confidence_step
+        ):
+            self.suppressed += 1
+            return
+        timestamp = prediction.timestamp.replace(tzinfo=timezone.utc).timestamp()
+        with self._lock:
+            self._seq += 1
+            update = (self._seq, label_id, float(prediction.confidence), timestamp)
+            self._last = update
+            self._pending.append(update)
+        self.updates += 1
+
+    def hello(self, encoding: str) -> str:
+        """Per-connection handshake (always JSON text): label table, timing and current state."""
+        last = self._last
+        return json.dumps(
+            {
+                "type": "hello",
+                "mode": "delta",
+                "encoding": encoding,
+                "labels": self.label_table.labels,
+                "tick_ms": self.tick * 1000.0,
+                "heartbeat_ms": self.heartbeat * 1000.0,
+                "state": _json_update(last) if last else None,
+            },
+            separators=(",", ":"),
+        )
+
+    def open(self, encoding: str = "json") -> DeltaSubscriber:
+        """Subscribe on the running event loop; the first subscriber starts the ticker."""
+        if encoding not in ENCODERS:
+            raise ValueError(f"Unknown encoding {encoding!r}")
+        subscriber = DeltaSubscriber(self, encoding, self.queue_size)
+        self._subscribers = self._subscribers + (subscriber,)
+        if self._task is None or self._task.done():
+            self._unsubscribe = self._broadcaster.subscribe(self._on_prediction)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscriber
+
+    def _remove(self, subscriber: DeltaSubscriber) -> None:
+        self._subscribers = tuple(s for s in self._subscribers if s is not subscriber)
+        if not self._subscribers:
+            # Nobody listening: stop diffing predictions and ticking.
+            if self._unsubscribe is not None:
+                self._unsubscribe()
+                self._unsubscribe = None
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+            with self._lock:
+                self._pending = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+        while True:
+            await asyncio.sleep(self.tick)
+            with self._lock:
+                updates, self._pending = self._pending, []
+            # Read after taking the batch: every id in it is already in the table.
+            labels = self.label_table.labels
+            if len(labels) > self._labels_sent:
+                self._labels_sent = len(labels)
+                self._fanout_all(json.dumps({"type": "labels", "labels": labels}, separators=(",", ":")))
+            now = loop.time()
+            if updates:
+                kind = MSG_BATCH
+                self.batches += 1
+            elif now - last_sent >= self.heartbeat:
+                kind = MSG_HEARTBEAT
+                updates = [self._last] if self._last is not None else []
+                self.heartbeats += 1
+            else:
+                continue
+            last_sent = now
+            self._fanout(kind, updates)
+
+    def _fanout(self, kind: int, updates: List[Update]) -> None:
+        # Serialized at most once per encoding, then shared by every subscriber.
+        messages: Dict[str, Message] = {}
+        for subscriber in self._subscribers:
+            message = messages.get(subscriber.encoding)
+            if message is None:
+                message = messages[subscriber.encoding] = ENCODERS[subscriber.encoding](kind, updates)
+            subscriber.offer(message)
+
+    def _fanout_all(self, message: Message) -> None:
+        for subscriber in self._subscribers:
+            subscriber.offer(message)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "subscribers": len(self._subscribers),
+            "updates": self.updates,
+            "suppressed": self.suppressed,
+            "batches": self.batches,
+            "heartbeats": self.heartbeats,
+            "per_subscriber": [s.stats() for s in self._subscribers],
+        }
@@ -0,0 +1,91 @@
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Mapping, Optional, Tuple
+
+from backend.models.mapping_model import GestureMapping
+
+
+class GestureTrigger:
+    """Edge-triggered gesture state machine.
+
+    A label becomes *active* once it is seen in ``required`` of the last
+    ``window`` frames with at least ``min_confidence``; the matching mapping
+    fires on that frame (no extra delay). While the label stays active the
+    mapping only fires again if it opts into hold-to-repeat. Each mapping's
+    ``cooldown_ms`` suppresses re-triggering after a fire; ``suppressed``
+    counts the onsets it rejected.
+    """
+
+    def __init__(self, window: int = 5, required: int = 3, min_confidence: float = 0.6) -> None:
+        self.window = max(window, 1)
+        self.required = min(max(required, 1), self.window)
+        self.min_confidence = min_confidence
+        self._history: Deque[Optional[str]] = deque(maxlen=self.window)
+        self._counts: Counter = Counter()
+        self.active: Optional[str] = None
+        self._next_repeat = 0.0
+        self._last_fired: Dict[str, float] = {}
+        self.triggered = 0
+        self.suppressed = 0
+
+    def reset(self) -> None:
+        self._history.clear()
+        self._counts.clear()
+        self.active = None
+
+    def update(
+        self,
+        label: str,
+        confidence: float,
+        mappings: Mapping[str, GestureMapping],
+        now: Optional[float] = None,
+    ) -> Optional[GestureMapping]:
+        """Feed one frame; return the mapping to fire on this frame, if any."""
+        now = time.monotonic() if now is None else now
+        self._push(label if confidence >= self.min_confidence else None)
+
+        onset = False
+        if self.active is not None and self._counts[self.active] < self.required:
+            self.active = None
+        if self.active is None:
+            candidate, count = self._leader()
+            if candidate is not None and count >= self.required:
+                self.active = candidate
+                onset = True
+
+        mapping = mappings.get(self.active) if self.active is not None else None
+        fire = False
+        if mapping is not None:
+            if onset:
+                since_last = now - self._last_fired.get(mapping.gesture, float("-inf"))
+                fire = since_last >= mapping.cooldown_ms / 1000.0
+                if fire:
+                    self._next_repeat = now + mapping.repeat_delay_ms / 1000.0
+                else:
+                    # A hold that starts inside the cooldown doesn't repeat either.
+                    self._next_repeat = float("inf")
+                    self.suppressed += 1
+            elif mapping.hold_to_repeat and now >= self._next_repeat:
+                fire = True
+                self._next_repeat = now + max(mapping.repeat_interval_ms, 1) / 1000.0
+        if not fire:
+            return None
+        self._last_fired[mapping.gesture] = now
+        self.triggered += 1
+        return mapping
+
+    def _push(self, label: Optional[str]) -> None:
+        if len(self._history) == self._history.maxlen:
+            evicted = self._history[0]
+            if evicted is not None:
+                self._counts[evicted] -= 1
+        self._history.append(label)
+        if label is not None:
+            self._counts[label] += 1
+
+    def _leader(self) -> Tuple[Optional[str], int]:
+        best, best_count = None, 0
+        for label, count in self._counts.items():
+            if count > best_count:
+                best, best_count = label, count
+        return best, best_count
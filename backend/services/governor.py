@@ -0,0 +1,149 @@
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+from backend.services.pipeline import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class QualityLevel(NamedTuple):
+    name: str
+    fps: float
+    preview: bool  # publish frames for preview encoding
+    frame_scale: float  # processing resolution relative to the captured frame
+    input_scale: float  # inference input size relative to the configured size
+
+
+def build_levels(target_fps: float, max_fps: float = 0.0) -> List[QualityLevel]:
+    """Quality ladder from best to cheapest.
+
+    Opportunistic extra frame rate goes first, then preview encoding, then
+    inference input size and processing resolution, and frame rate last.
+    """
+    target = max(float(target_fps), 1.0)
+    levels = []
+    if max_fps > target:
+        levels.append(QualityLevel("boost", float(max_fps), True, 1.0, 1.0))
+    levels += [
+        QualityLevel("full", target, True, 1.0, 1.0),
+        QualityLevel("no_preview", target, False, 1.0, 1.0),
+        QualityLevel("small_input", target, False, 1.0, 0.75),
+        QualityLevel("reduced_resolution", target, False, 0.75, 0.75),
+        QualityLevel("low_resolution", target, False, 0.5, 0.5),
+        QualityLevel("reduced_fps", max(target / 2, 1.0), False, 0.5, 0.5),
+        QualityLevel("minimum", max(target / 4, 1.0), False, 0.5, 0.5),
+    ]
+    return levels
+
+
+class LatencyGovernor:
+    """Steps along a quality ladder to keep end-to-end frame latency under an SLO.
+
+    ``record`` is fed the capture-to-result latency of every processed frame.
+    Once per ``window_s`` the window's p95 is compared with ``slo_ms``: above
+    it the governor drops one level; below ``low_water * slo_ms`` for
+    ``recover_windows`` windows in a row it climbs one level. An upgrade that
+    has to be undone in the very next window doubles the windows required
+    before that upgrade is tried again, so a level that cannot hold the SLO
+    is not retried every few seconds. Every change is kept in ``decisions``.
+    """
+
+    def __init__(
+        self,
+        slo_ms: float = 100.0,
+        target_fps: float = 24.0,
+        max_fps: float = 0.0,
+        window_s: float = 1.0,
+        low_water: float = 0.6,
+        recover_windows: int = 3,
+        min_samples: int = 3,
+        history: int = 50,
+    ) -> None:
+        self.slo_ms = slo_ms
+        self.window_s = window_s
+        self.low_water = low_water
+        self.recover_windows = recover_windows
+        self.min_samples = min_samples
+        self.levels = build_levels(target_fps, max_fps)
+        self.index = next(i for i, level in enumerate(self.levels) if level.name == "full")
+        self.decisions: Deque[Dict[str, object]] = deque(maxlen=history)
+        self._window: List[float] = []
+        self._window_start: Optional[float] = None
+        self._good_windows = 0
+        self._recover_needed = recover_windows
+        self._upgraded = False  # the last window ended with an upgrade
+        self.last_p95_ms = 0.0
+        self.windows = 0
+        self.changes = 0
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.levels[self.index]
+
+    def record(self, latency: float, now: Optional[float] = None) -> Optional[QualityLevel]:
+        """Add one frame's latency (seconds); returns the new level when it changes."""
+        now = time.monotonic() if now is None else now
+        if self._window_start is None:
+            self._window_start = now
+        self._window.append(latency)
+        if now - self._window_start < self.window_s or len(self._window) < self.min_samples:
+            return None
+        samples = sorted(self._window)
+        self._window = []
+        self._window_start = now
+        self.windows += 1
+        self.last_p95_ms = percentile(samples, 95) * 1000.0
+        return self._evaluate(self.last_p95_ms, len(samples))
+
+    def _evaluate(self, p95_ms: float, samples: int) -> Optional[QualityLevel]:
+        upgraded, self._upgraded = self._upgraded, False
+        if p95_ms > self.slo_ms:
+            self._good_windows = 0
+            if upgraded:
+                self._recover_needed = min(self._recover_needed * 2, 64)
+            if self.index == len(self.levels) - 1:
+                return None
+            return self._change(self.index + 1, f"p95 {p95_ms:.1f} ms over SLO", p95_ms, samples)
+        if upgraded:
+            self._recover_needed = self.recover_windows  # the new level held
+        if p95_ms >= self.slo_ms * self.low_water:
+            self._good_windows = 0
+            return None
+        self._good_windows += 1
+        if self._good_windows < self._recover_needed or self.index == 0:
+            return None
+        self._good_windows = 0
+        self._upgraded = True
+        return self._change(self.index - 1, f"p95 {p95_ms:.1f} ms under {self.low_water:.0%} of SLO", p95_ms, samples)
+
+    def _change(self, index: int, reason: str, p95_ms: float, samples: int) -> QualityLevel:
+        previous = self.level
+        self.index = index
+        self.changes += 1
+        self.decisions.append(
+            {
+                "at": time.time(),
+                "from": previous.name,
+                "to": self.level.name,
+                "reason": reason,
+                "p95_ms": p95_ms,
+                "samples": samples,
+            }
+        )
+        logger.info("Governor: %s -> %s (%s)", previous.name, self.level.name, reason)
+        return self.level
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "slo_ms": self.slo_ms,
+            "level": self.level._asdict(),
+            "level_index": self.index,
+            "levels": [level.name for level in self.levels],
+            "p95_ms": self.last_p95_ms,
+            "windows": self.windows,
+            "changes": self.changes,
+            "recover_windows": self._recover_needed,
+            "decisions": list(self.decisions),
+        }
@@ -0,0 +1,245 @@
+"""Pluggable gesture inference backends for ``VisionService``.
+
+A backend classifies a batch of inputs into (label ids, confidences).
+``input_kind`` says what it consumes:
+
+* ``"landmarks"`` - (N, 21, 3) MediaPipe landmarks; MediaPipe still finds the hand
+* ``"frame"`` - (N, H, W, 3) BGR frames; MediaPipe is skipped entirely
+
+The rule/linear classifiers in ``gesture_classifier`` are landmark backends
+already. TFLite and ONNX Runtime models run on the CPU with a fixed thread
+count and a preallocated input tensor sized for ``max_batch``, which is
+filled in place and invoked once per chunk.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.services.gesture_classifier import (
+    LABEL_TABLE,
+    NUM_LANDMARKS,
+    POSE_LABELS,
+    GestureClassifier,
+    LinearGestureClassifier,
+    RuleGestureClassifier,
+)
+from backend.services.lazy_import import LazyModule
+from backend.services.pipeline import StageStats
+
+logger = logging.getLogger(__name__)
+
+cv2 = LazyModule("cv2")
+tflite_runtime = LazyModule("tflite_runtime.interpreter")
+tensorflow = LazyModule("tensorflow")
+ort = LazyModule("onnxruntime")
+
+BACKENDS = ("heuristics", "tflite", "onnx")
+
+
+def load_labels(model_path: Union[str, Path]) -> Tuple[str, ...]:
+    """Labels from ``<model>.labels.txt`` (one per line), else ``POSE_LABELS``."""
+    path = Path(model_path).with_suffix(".labels.txt")
+    if path.exists():
+        return tuple(line.strip() for line in path.read_text().splitlines() if line.strip())
+    return POSE_LABELS
+
+
+class ModelBackend:
+    """Shared batching, input preparation and output decoding for model backends.
+
+    Subclasses set ``input_shape`` (without the batch axis), ``input_dtype``
+    and ``self._input`` (a preallocated ``(max_batch, *input_shape)`` array,
+    ideally a view of the runtime's own input tensor), and implement ``_run(n)``
+    returning the (n, labels) output for the first ``n`` rows.
+    """
+
+    name = "model"
+    input_kind = "landmarks"
+
+    def __init__(self, labels: Sequence[str], max_batch: int) -> None:
+        self.labels = tuple(labels)
+        self.max_batch = max(max_batch, 1)
+        # Classes a custom model adds beyond GESTURE_LABELS get ids of their own.
+        self._label_ids = np.array([LABEL_TABLE.id(label) for label in self.labels], dtype=np.int16)
+        self.input_shape: Tuple[int, ...] = ()
+        self.input_dtype = np.float32
+        self._input: Optional[np.ndarray] = None
+        self.invoke_stats = StageStats()
+
+    def _detect_kind(self) -> None:
+        if len(self.input_shape) == 3 and self.input_shape[-1] in (1, 3):
+            self.input_kind = "frame"
+        elif int(np.prod(self.input_shape)) == NUM_LANDMARKS * 3:
+            self.input_kind = "landmarks"
+        else:
+            raise ValueError(f"Unsupported model input shape {self.input_shape}")
+
+    def _fill(self, row: int, item: np.ndarray) -> None:
+        dst = self._input[row]
+        if self.input_kind == "landmarks":
+            dst[...] = np.asarray(item, dtype=np.float32).reshape(dst.shape)
+            return
+        height, width, channels = self.input_shape
+        if item.shape[0] != height or item.shape[1] != width:
+            item = cv2.resize(item, (width, height), interpolation=cv2.INTER_AREA)
+        if channels == 1 and item.ndim == 3:
+            item = cv2.cvtColor(item, cv2.COLOR_BGR2GRAY)[..., None]
+        elif channels == 3:
+            item = item[..., ::-1]  # models are trained on RGB
+        if self.input_dtype == np.uint8:
+            dst[...] = item
+        else:
+            np.multiply(item, 1.0 / 255.0, out=dst, casting="unsafe")
+
+    def _run(self, n: int) -> np.ndarray:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def classify(self, inputs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (label_ids int16, confidences float32) for a batch of inputs."""
+        total = len(inputs)
+        label_ids = np.zeros(total, dtype=np.int16)
+        confidences = np.zeros(total, dtype=np.float32)
+        for start in range(0, total, self.max_batch):
+            n = min(self.max_batch, total - start)
+            for row in range(n):
+                self._fill(row, inputs[start + row])
+            with self.invoke_stats.time():
+                scores = np.asarray(self._run(n), dtype=np.float32).reshape(n, -1)
+            if scores.min() < 0 or not np.allclose(scores.sum(axis=1), 1.0, atol=1e-3):
+                scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+                scores /= scores.sum(axis=1, keepdims=True)
+            best = scores.argmax(axis=1)
+            label_ids[start : start + n] = self._label_ids[best]
+            confidences[start : start + n] = scores[np.arange(n), best]
+        return label_ids, confidences
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.name,
+            "input_kind": self.input_kind,
+            "input_shape": list(self.input_shape),
+            "max_batch": self.max_batch,
+            "invoke": self.invoke_stats.snapshot(),
+        }
+
+
+class TFLiteBackend(ModelBackend):
+    name = "tflite"
+
+    def __init__(
+        self,
+        model_path: Union[str, Path],
+        threads: int = 2,
+        max_batch: int = 8,
+        labels: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tflite_runtime:
+            interpreter_cls = tflite_runtime.Interpreter
+        elif tensorflow:
+            interpreter_cls = tensorflow.lite.Interpreter
+        else:
+            raise RuntimeError("TFLite backend needs tflite-runtime or tensorflow")
+        super().__init__(labels or load_labels(model_path), max_batch)
+        self._interpreter = interpreter_cls(model_path=str(model_path), num_threads=threads)
+        detail = self._interpreter.get_input_details()[0]
+        self._input_index = detail["index"]
+        self._output_index = self._interpreter.get_output_details()[0]["index"]
+        self.input_shape = tuple(int(d) for d in detail["shape"][1:])
+        self.input_dtype = np.dtype(detail["dtype"]).type
+        self._detect_kind()
+        self._batched = True
+        self._batch = 1  # batch size the input tensor is currently allocated for
+        try:
+            self._resize(self.max_batch)
+        except (RuntimeError, ValueError):
+            # Fixed batch-1 model: invoke once per row from a one-row staging buffer.
+            self._batched = False
+            self._interpreter.allocate_tensors()
+        self._input = np.zeros((self.max_batch, *self.input_shape), dtype=self.input_dtype)
+
+    def _resize(self, n: int) -> None:
+        self._interpreter.resize_tensor_input(self._input_index, [n, *self.input_shape])
+        self._interpreter.allocate_tensors()
+        self._batch = n
+
+    def _run(self, n: int) -> np.ndarray:
+        interpreter = self._interpreter
+        if self._batched:
+            # Reallocate only when the batch size changes; the live loop stays at one row.
+            if n != self._batch:
+                self._resize(n)
+            interpreter.set_tensor(self._input_index, self._input[:n])
+            interpreter.invoke()
+            return interpreter.get_tensor(self._output_index)[:n]
+        outputs = []
+        for row in range(n):
+            interpreter.set_tensor(self._input_index, self._input[row : row + 1])
+            interpreter.invoke()
+            outputs.append(interpreter.get_tensor(self._output_index)[0])
+        return np.stack(outputs)
+
+
+class OnnxBackend(ModelBackend):
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_path: Union[str, Path],
+        threads: int = 2,
+        max_batch: int = 8,
+        labels: Optional[Sequence[str]] = None,
+    ) -> None:
+        if not ort:
+            raise RuntimeError("ONNX backend needs onnxruntime")
+        super().__init__(labels or load_labels(model_path), max_batch)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self._session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        meta = self._session.get_inputs()[0]
+        self._input_name = meta.name
+        self.input_shape = tuple(int(d) if isinstance(d, int) else 1 for d in meta.shape[1:])
+        self.input_dtype = np.uint8 if meta.type == "tensor(uint8)" else np.float32
+        self._batched = not isinstance(meta.shape[0], int) or meta.shape[0] != 1
+        self._detect_kind()
+        self._input = np.zeros((self.max_batch, *self.input_shape), dtype=self.input_dtype)
+
+    def _run(self, n: int) -> np.ndarray:
+        if self._batched:
+            return self._session.run(None, {self._input_name: self._input[:n]})[0]
+        return np.concatenate(
+            [self._session.run(None, {self._input_name: self._input[row : row + 1]})[0] for row in range(n)]
+        )
+
+
+InferenceBackend = Union[GestureClassifier, ModelBackend]
+
+
+def create_backend(
+    kind: str = "heuristics",
+    model_path: Optional[Union[str, Path]] = None,
+    threads: int = 2,
+    max_batch: int = 8,
+    classifier_path: Optional[Union[str, Path]] = None,
+) -> InferenceBackend:
+    """Build the configured backend; falls back to the heuristics if a model can't load."""
+    if kind in ("tflite", "onnx"):
+        backend_cls = TFLiteBackend if kind == "tflite" else OnnxBackend
+        try:
+            backend = backend_cls(model_path, threads=threads, max_batch=max_batch)
+            logger.info("Loaded %s model %s (%s input %s)", kind, model_path, backend.input_kind, backend.input_shape)
+            return backend
+        except Exception as exc:
+            logger.error("Could not load %s model %s, using heuristics: %s", kind, model_path, exc)
+    elif kind != "heuristics":
+        logger.error("Unknown inference backend %r, using heuristics", kind)
+    if classifier_path:
+        return LinearGestureClassifier.load(classifier_path)
+    return RuleGestureClassifier()
@@ -0,0 +1,466 @@
+"""Run capture + inference in a child process, away from the server's GIL.
+
+The worker sends a small tuple per prediction over a one-way pipe and, only
+while the preview has viewers, writes the processed frame into a
+``SharedFrameRing`` (no pickling). The FastAPI process only consumes
+predictions: it updates ``GestureState``, broadcasts, applies mappings and,
+when someone is watching the preview, copies the matching frame out of
+shared memory.
+"""
+
+import logging
+import multiprocessing
+import os
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from backend.models.gesture_model import GesturePrediction
+from backend.models.mapping_model import MappingConfig
+from backend.services.ai_loop import AILoopService, GestureBroadcaster, GestureState
+from backend.services.frame_pool import FramePool
+from backend.services.gesture_trigger import GestureTrigger
+from backend.services.keyboard_service import KeyboardService
+from backend.services.pipeline import StageStats
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("<qiiid")  # seq, height, width, channels, captured_at
+_HEADER_SIZE = 32
+
+
+class SharedFrameRing:
+    """Fixed-size ring of frame slots in shared memory, guarded by per-slot seqlocks.
+
+    The single writer marks a slot's sequence number -1 while copying a
+    frame in; readers copy the frame out and accept it only if the sequence
+    number is unchanged afterwards.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, frame_bytes: int, owner: bool) -> None:
+        self.shm = shm
+        self.slots = slots
+        self.frame_bytes = frame_bytes
+        self.slot_size = _HEADER_SIZE + frame_bytes
+        self._owner = owner
+        self._seq = 0
+
+    @classmethod
+    def create(cls, slots: int, frame_bytes: int) -> "SharedFrameRing":
+        shm = shared_memory.SharedMemory(create=True, size=slots * (_HEADER_SIZE + frame_bytes))
+        ring = cls(shm, slots, frame_bytes, owner=True)
+        for slot in range(slots):
+            _HEADER.pack_into(shm.buf, slot * ring.slot_size, 0, 0, 0, 0, 0.0)
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, slots: int, frame_bytes: int) -> "SharedFrameRing":
+        return cls(shared_memory.SharedMemory(name=name), slots, frame_bytes, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, frame: np.ndarray, captured_at: float) -> int:
+        """Copy ``frame`` into the next slot; returns its sequence number (0 if it does not fit)."""
+        if frame.nbytes > self.frame_bytes or frame.dtype != np.uint8:
+            return 0
+        self._seq += 1
+        offset = (self._seq % self.slots) * self.slot_size
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        _HEADER.pack_into(self.shm.buf, offset, -1, height, width, channels, captured_at)
+        dst = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset + _HEADER_SIZE)
+        np.copyto(dst, frame)
+        _HEADER.pack_into(self.shm.buf, offset, self._seq, height, width, channels, captured_at)
+        return self._seq
+
+    def read(self, seq: int, pool: Optional[FramePool] = None) -> Optional[np.ndarray]:
+        """Copy out frame ``seq`` if it is still in the ring and was not overwritten mid-read.
+
+        With ``pool`` the copy lands in a pooled buffer the caller must release.
+        """
+        if seq <= 0:
+            return None
+        offset = (seq % self.slots) * self.slot_size
+        current, height, width, channels, _ = _HEADER.unpack_from(self.shm.buf, offset)
+        if current != seq:
+            return None
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        src = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset + _HEADER_SIZE)
+        frame = pool.acquire(shape) if pool is not None else np.empty(shape, dtype=np.uint8)
+        np.copyto(frame, src)
+        if _HEADER.unpack_from(self.shm.buf, offset)[0] != seq:
+            if pool is not None:
+                pool.release(frame)
+            return None
+        return frame
+
+    def close(self) -> None:
+        self.shm.close()
+        if self._owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:  # pragma: no cover - already gone
+                pass
+
+
+def run_worker(
+    config: Dict[str, Any], ring_name: str, slots: int, frame_bytes: int, conn, stop_event, preview_wanted
+) -> None:
+    """Child-process entry point: capture, preprocess and classify until told to stop.
+
+    Frames are copied into the ring only while ``preview_wanted`` is set. A
+    worker that cannot build its pipeline from ``config``, open its source or
+    warm up reports ``("fatal", message)`` and exits instead of sending ``ready``.
+    """
+    logging.basicConfig(level=logging.INFO)
+    cpu = config.get("cpu")
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        # One core per session worker; keep OpenCV from fanning out over the others.
+        os.sched_setaffinity(0, {cpu % (os.cpu_count() or 1)})
+        try:
+            import cv2
+
+            cv2.setNumThreads(1)
+        except Exception:  # pragma: no cover - dependency guard
+            pass
+    from backend.services.frame_sources import create_frame_source
+    from backend.services.governor import LatencyGovernor
+    from backend.services.inference_backends import create_backend
+    from backend.services.motion_gate import MotionGate
+    from backend.services.motion_gestures import MotionGestureRecognizer
+    from backend.services.recording import LandmarkRecorder
+    from backend.services.vision_service import VisionService
+
+    vision = recorder = None
+    try:
+        vision = VisionService(
+            source=create_frame_source(**config["source"]),
+            classifier=create_backend(**config.get("backend", {})),
+            motion_gestures=MotionGestureRecognizer(**config["motion_gestures"])
+            if config.get("motion_gestures")
+            else None,
+            **config.get("vision", {}),
+        )
+        gate = MotionGate(**config["motion"]) if config.get("motion") else None
+        governor = LatencyGovernor(**config["governor"]) if config.get("governor") else None
+        recorder = LandmarkRecorder(config["recording_path"]) if config.get("recording_path") else None
+        vision.start()
+        warmup = vision.warm_up() if vision.is_open else None
+    except Exception as exc:
+        # Restarting cannot fix a bad config; tell the parent to give up.
+        logger.exception("Inference worker failed to start")
+        if vision is not None:
+            vision.stop()
+        if recorder is not None:
+            recorder.close()
+        try:
+            conn.send(("fatal", f"{type(exc).__name__}: {exc}"))
+        finally:
+            conn.close()
+        return
+    ring = SharedFrameRing.attach(ring_name, slots, frame_bytes)
+    stats = {name: StageStats() for name in ("pacing", "capture", "preprocess", "inference", "ring")}
+    target_fps = config.get("target_fps", 24)
+    idle_interval = 1.0 / max(config.get("idle_fps", 2.0), 0.1)
+    last_stats = time.monotonic()
+
+    try:
+        if vision.is_open:
+            conn.send(("ready", warmup, None))
+        else:
+            conn.send(("ready", None, "frame source did not open"))
+        while not stop_event.is_set():
+            start = time.monotonic()
+            fps = governor.level.fps if governor is not None else float(target_fps)
+            interval = 1.0 / max(fps, 1.0)
+            frame = vision.read_frame()
+            # File sources sleep in their pacer; that is not capture work.
+            captured_at = time.monotonic()
+            waited = vision.pacing_wait
+            stats["capture"].record(captured_at - start - waited)
+            if frame is None:
+                time.sleep(interval)
+                continue
+            stats["pacing"].record(waited)
+            pool = vision.frame_pool
+            if gate is not None and not gate.check(frame):
+                pool.release(frame)
+                conn.send(("skip", captured_at))
+            else:
+                with stats["preprocess"].time():
+                    processed = vision.preprocess(frame)
+                if processed is not frame:
+                    pool.release(frame)
+                with stats["inference"].time():
+                    label, conf = vision.extract_landmarks(processed)
+                if recorder is not None:
+                    recorder.write(captured_at, label, conf, vision.last_landmarks)
+                seq = 0  # no frame for the preview
+                if preview_wanted.is_set() and (governor is None or governor.level.preview):
+                    with stats["ring"].time():
+                        seq = ring.write(processed, captured_at)
+                pool.release(processed)
+                conn.send(("prediction", seq, label, conf, captured_at))
+                if governor is not None:
+                    level = governor.record(time.monotonic() - captured_at)
+                    if level is not None:
+                        vision.set_quality(level.frame_scale, level.input_scale)
+            now = time.monotonic()
+            if now - last_stats >= 1.0:
+                last_stats = now
+                conn.send(
+                    (
+                        "stats",
+                        {
+                            "stages": {name: s.snapshot() for name, s in stats.items()},
+                            "histograms": {name: s.histogram() for name, s in stats.items()},
+                            "vision": vision.stats(),
+                            "motion": gate.stats() if gate is not None else None,
+                            "governor": governor.stats() if governor is not None else None,
+                        },
+                    )
+                )
+            idle = gate is not None and gate.idle
+            if vision.source_paced and not idle and fps >= target_fps:
+                continue
+            period = idle_interval if idle else interval
+            time.sleep(max(period - (time.monotonic() - start), 0))
+    except (BrokenPipeError, EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        vision.stop()
+        if recorder is not None:
+            recorder.close()
+        ring.close()
+        conn.close()
+
+
+class ProcessAILoopService(AILoopService):
+    """``AILoopService`` whose capture and inference run in a supervised child process.
+
+    ``worker_config`` must be picklable: ``source`` holds ``create_frame_source``
+    kwargs, ``vision`` holds ``VisionService`` kwargs, plus optional
+    ``backend`` (``create_backend`` kwargs), ``motion`` (``MotionGate`` kwargs),
+    ``motion_gestures`` (``MotionGestureRecognizer`` kwargs), ``governor``
+    (``LatencyGovernor`` kwargs), ``target_fps``, ``idle_fps``, ``recording_path`` and ``cpu`` (pin the
+    worker to that core). A worker that dies is restarted with exponential backoff,
+    unless it reported a fatal startup error (``fatal_error``).
+    """
+
+    STAGES = ("latency",)
+
+    def __init__(
+        self,
+        worker_config: Dict[str, Any],
+        keyboard_service: KeyboardService,
+        mapping_config: MappingConfig,
+        gesture_state: GestureState,
+        broadcaster: GestureBroadcaster,
+        target_fps: int = 12,
+        trigger: Optional[GestureTrigger] = None,
+        ring_slots: int = 4,
+        ring_frame_bytes: int = 1920 * 1080 * 3,
+    ) -> None:
+        super().__init__(
+            # The VisionService lives in the worker process.
+            vision_service=None,  # type: ignore[arg-type]
+            keyboard_service=keyboard_service,
+            mapping_config=mapping_config,
+            gesture_state=gesture_state,
+            broadcaster=broadcaster,
+            target_fps=target_fps,
+            trigger=trigger,
+        )
+        self.worker_config = dict(worker_config, target_fps=target_fps)
+        self.ring_slots = ring_slots
+        self.ring_frame_bytes = ring_frame_bytes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._worker_stop = None
+        # Set while the preview has viewers; the worker skips ring writes otherwise.
+        self._preview_wanted = self._ctx.Event()
+        self._ring: Optional[SharedFrameRing] = None
+        self._worker_stats: Dict[str, Any] = {}
+        self._ready = threading.Event()
+        self.warmup_seconds: Optional[float] = None
+        self.warmup_error: Optional[str] = None
+        self.fatal_error: Optional[str] = None
+        self.restarts = 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self.fatal_error = None
+        self._ring = SharedFrameRing.create(self.ring_slots, self.ring_frame_bytes)
+        self._spawn()
+        self._threads = [threading.Thread(target=self._result_loop, name="ai-loop-results", daemon=True)]
+        self._threads[0].start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        self._reap()
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the worker has opened its source, loaded its model and run a warm-up inference."""
+        return self._ready.wait(timeout) and self.warmup_error is None
+
+    def _spawn(self) -> None:
+        self._ready.clear()
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        self._worker_stop = self._ctx.Event()
+        self._process = self._ctx.Process(
+            target=run_worker,
+            args=(
+                self.worker_config,
+                self._ring.name,
+                self.ring_slots,
+                self.ring_frame_bytes,
+                sender,
+                self._worker_stop,
+                self._preview_wanted,
+            ),
+            name="inference-worker",
+            daemon=True,
+        )
+        self._process.start()
+        sender.close()
+        self._conn = receiver
+
+    def _reap(self) -> None:
+        if self._worker_stop is not None:
+            self._worker_stop.set()
+        if self._process is not None:
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=1)
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _result_loop(self) -> None:
+        backoff = 0.5
+        while not self._stop_event.is_set():
+            if self._process is None or not self._process.is_alive():
+                self._drain()
+                if self.fatal_error is not None:
+                    logger.error("Inference worker cannot start, not restarting: %s", self.fatal_error)
+                    self._reap()
+                    return
+                code = self._process.exitcode if self._process is not None else None
+                logger.warning("Inference worker exited (code %s); restarting in %.1fs", code, backoff)
+                self._reap()
+                if self._stop_event.wait(backoff):
+                    return
+                backoff = min(backoff * 2, 10.0)
+                self.restarts += 1
+                self._spawn()
+                continue
+            try:
+                if not self._conn.poll(0.5):
+                    continue
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                self._process.join(timeout=1)
+                continue
+            backoff = 0.5
+            self._handle(message)
+
+    def _drain(self) -> None:
+        """Handle whatever a dead worker sent before exiting (such as a fatal error)."""
+        try:
+            while self._conn is not None and self._conn.poll(0):
+                self._handle(self._conn.recv())
+        except (EOFError, OSError):
+            pass
+
+    def _handle(self, message: tuple) -> None:
+        kind = message[0]
+        if kind == "prediction":
+            _, seq, label, conf, captured_at = message
+            preview = self.gesture_state.preview
+            if preview.viewers > 0:
+                if not self._preview_wanted.is_set():
+                    self._preview_wanted.set()
+            elif self._preview_wanted.is_set():
+                self._preview_wanted.clear()
+            if preview.viewers > 0 and self._ring is not None:
+                frame = self._ring.read(seq, self.frame_pool)
+                if frame is not None:
+                    self.gesture_state.update_frame(frame, self.frame_pool)
+                    self.frame_pool.release(frame)
+            prediction = GesturePrediction(label=label, confidence=conf)
+            self.gesture_state.update(prediction)
+            self.broadcaster.emit(prediction)
+            if label != self._last_label:
+                logger.info("Gesture changed: %s (%.2f)", label, conf)
+                self._last_label = label
+            self._apply_mapping(prediction)
+            now = time.monotonic()
+            self._stats["latency"].record(now - captured_at)
+            if self._last_output is not None:
+                self._frame_interval.record(now - self._last_output)
+            self._last_output = now
+        elif kind == "skip":
+            if self.gesture_state.latest is not None:
+                self._apply_mapping(self.gesture_state.latest)
+        elif kind == "stats":
+            self._worker_stats = message[1]
+        elif kind == "ready":
+            _, self.warmup_seconds, self.warmup_error = message
+            if self.warmup_error:
+                logger.error("Inference worker warm-up failed: %s", self.warmup_error)
+            self._ready.set()
+        elif kind == "fatal":
+            self.fatal_error = self.warmup_error = message[1]
+            self._ready.set()
+
+    def governor_stats(self) -> Optional[Dict[str, object]]:
+        return self._worker_stats.get("governor")
+
+    def histograms(self) -> Dict[str, Dict[str, object]]:
+        return dict(self._worker_stats.get("histograms", {}), latency=self._stats["latency"].histogram())
+
+    def stats(self) -> Dict[str, object]:
+        interval = self._frame_interval.snapshot()["avg_ms"]
+        worker = self._worker_stats
+        return {
+            "target_fps": self.target_fps,
+            "fps": 1000.0 / interval if interval > 0 else 0.0,
+            "stages": dict(worker.get("stages", {}), latency=self._stats["latency"].snapshot()),
+            "governor": self.governor_stats(),
+            "worker": {
+                "pid": self._process.pid if self._process is not None else None,
+                "alive": bool(self._process is not None and self._process.is_alive()),
+                "restarts": self.restarts,
+                "ready": self._ready.is_set(),
+                "error": self.fatal_error,
+            },
+            "vision": worker.get("vision"),
+            "motion": worker.get("motion"),
+            "preview": self.gesture_state.preview.stats(),
+            "history": self.gesture_state.timeline.stats(),
+            "frame_pool": self.frame_pool.stats(),  # preview copies out of the ring
+            "triggers": {
+                "active": self.trigger.active,
+                "fired": self.trigger.triggered,
+                "suppressed": self.trigger.suppressed,
+            },
+            "actuation": self.keyboard.stats(),
+            "broadcast": self.broadcaster.stats(),
+        }
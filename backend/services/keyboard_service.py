@@ -1,20 +1,165 @@
+import asyncio
 import logging
+import threading
 import time
-from typing import Iterable, List, Optional
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Hashable, Optional, Sequence, Set
 
-from backend.models.mapping_model import ActionType, GestureMapping
+from backend.models.mapping_model import GestureMapping, MappingConfig
+from backend.services.mapping_engine import (
+    CompiledMapping,
+    MappingTable,
+    Step,
+    compile_table,
+    parse_action,
+    plan_steps,
+)
+from backend.services.pipeline import StageStats
 
 logger = logging.getLogger(__name__)
 
 
+class _PendingAction:
+    __slots__ = ("key", "steps", "future")
+
+    def __init__(self, key: Hashable, steps: Sequence[Step], future: "Future[bool]") -> None:
+        self.key = key
+        self.steps = steps
+        self.future = future
+
+
+class ActuationEngine:
+    """Background worker that plays key press/release steps on a timeline.
+
+    Actions run one at a time in submission order; the caller only enqueues.
+    The pending queue is bounded and rejects new work when full, and an action
+    identical to one already waiting is coalesced onto the existing future.
+    Cancelling releases any keys held by the action in progress.
+    """
+
+    def __init__(self, execute: Callable[[str, Hashable], None], max_pending: int = 16) -> None:
+        self._execute = execute
+        self._max_pending = max_pending
+        self._pending: Deque[_PendingAction] = deque()
+        self._by_key: Dict[Hashable, _PendingAction] = {}
+        self._cond = threading.Condition()
+        self._interrupt = threading.Event()
+        self._stop = False
+        self._held: Set[Hashable] = set()
+        self.coalesced = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.stats = StageStats()
+        self._thread = threading.Thread(target=self._run, name="keyboard-actuation", daemon=True)
+        self._thread.start()
+
+    def submit(self, key: Hashable, steps: Sequence[Step]) -> Optional["Future[bool]"]:
+        """Queue an action; returns a future resolved when it has played, or None if full."""
+        with self._cond:
+            existing = self._by_key.get(key)
+            if existing is not None and not existing.future.cancelled():
+                self.coalesced += 1
+                return existing.future
+            if len(self._pending) >= self._max_pending or self._stop:
+                self.dropped += 1
+                return None
+            action = _PendingAction(key, steps, Future())
+            self._pending.append(action)
+            self._by_key[key] = action
+            self._cond.notify()
+            return action.future
+
+    def cancel_all(self) -> int:
+        """Drop every pending action and interrupt the one in progress."""
+        with self._cond:
+            pending = list(self._pending)
+            self._pending.clear()
+            self._by_key.clear()
+            self._interrupt.set()
+        for action in pending:
+            action.future.cancel()
+        self.cancelled += len(pending)
+        return len(pending)
+
+    def backlog(self) -> int:
+        return len(self._pending)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self.cancel_all()
+        self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                action = self._pending.popleft()
+                if self._by_key.get(action.key) is action:
+                    del self._by_key[action.key]
+                self._interrupt.clear()
+            if not action.future.set_running_or_notify_cancel():
+                continue
+            with self.stats.time():
+                completed = self._play(action.steps)
+            action.future.set_result(completed)
+
+    def _play(self, steps: Sequence[Step]) -> bool:
+        start = time.monotonic()
+        try:
+            for offset, kind, key in steps:
+                delay = start + offset - time.monotonic()
+                if delay > 0 and self._interrupt.wait(delay):
+                    return False
+                if self._interrupt.is_set():
+                    return False
+                self._step(kind, key)
+            return True
+        finally:
+            for key in list(self._held):
+                self._step("release", key)
+
+    def _step(self, kind: str, key: Hashable) -> None:
+        try:
+            self._execute(kind, key)
+        except Exception as exc:  # pragma: no cover - hardware specific
+            logger.error("Failed to %s key %s: %s", kind, key, exc)
+        if kind == "press":
+            self._held.add(key)
+        elif kind == "release":
+            self._held.discard(key)
+
+
+class NullController:
+    """Keyboard backend that only counts key events; for load tests and headless runs."""
+
+    def __init__(self) -> None:
+        self.pressed = 0
+        self.released = 0
+
+    def press(self, key: Hashable) -> None:
+        self.pressed += 1
+
+    def release(self, key: Hashable) -> None:
+        self.released += 1
+
+
 class KeyboardService:
-    def __init__(self, enabled: bool = True) -> None:
+    def __init__(self, enabled: bool = True, max_pending: int = 16, controller: Optional[object] = None) -> None:
+        """``controller`` replaces the pynput/``keyboard`` backend (e.g. ``NullController``)."""
         self.enabled = enabled
-        self._controller = None
+        self._controller = controller
         self._keyboard_lib = None
         self._Key: Optional[object] = None  # pynput Key enumeration
         self._alias = {}
-        self._load_backend()
+        if controller is None:
+            self._load_backend()
+        self._engine = ActuationEngine(self._execute_step, max_pending=max_pending)
 
     def _load_backend(self) -> None:
         try:
@@ -54,52 +199,87 @@ class KeyboardService:
                 logger.warning("Keyboard control unavailable: %s", exc)
                 self.enabled = False
 
-    def press_action(self, mapping: GestureMapping) -> None:
+    def compile(self, mapping: GestureMapping) -> CompiledMapping:
+        """Parse and resolve a mapping once; raises ``MappingValidationError`` for bad keys."""
+        steps = plan_steps(
+            parse_action(mapping.action_type, mapping.action),
+            max(mapping.hold_ms / 1000.0, 0),
+            self.resolve_key,
+            self._supports_press_release(),
+        )
+        return CompiledMapping(mapping, (mapping.action_type, mapping.action, mapping.hold_ms), steps)
+
+    def compile_table(self, config: MappingConfig, strict: bool = True, version: int = 0) -> MappingTable:
+        return compile_table(config, self.compile, strict=strict, version=version)
+
+    def press_compiled(self, compiled: CompiledMapping) -> Optional["Future[bool]"]:
+        """Schedule a pre-compiled mapping on the actuation worker without blocking the caller."""
         if not self.enabled or not self._controller:
             logger.debug("Keyboard output disabled or unavailable")
-            return
-
-        if mapping.action_type == ActionType.key:
-            self._press_key(mapping.action)
-        elif mapping.action_type == ActionType.shortcut:
-            sequence = [part.strip() for part in mapping.action.split("+") if part.strip()]
-            self._press_combo(sequence)
-        elif mapping.action_type == ActionType.macro:
-            sequence = [part.strip() for part in mapping.action.split(",") if part.strip()]
-            for key in sequence:
-                self._press_key(key, hold_ms=mapping.hold_ms)
-        else:  # pragma: no cover - future proof
-            logger.warning("Unknown action type: %s", mapping.action_type)
-
-    def _resolve_key(self, key: str):
-        if self._Key:
-            return self._alias.get(key.lower(), key)
-        return key
+            return None
+        if not compiled.steps:
+            return None
+        future = self._engine.submit(compiled.key, compiled.steps)
+        if future is None:
+            logger.warning("Actuation queue full; dropping %s", compiled.mapping.action)
+        return future
 
-    def _press_key(self, key: str, hold_ms: int = 50) -> None:
-        try:
-            if hasattr(self._controller, "press") and hasattr(self._controller, "release"):
-                resolved = self._resolve_key(key)
-                self._controller.press(resolved)
-                time.sleep(max(hold_ms / 1000.0, 0))
-                self._controller.release(resolved)
-            else:
-                # keyboard lib
-                self._controller.send(key)
-        except Exception as exc:  # pragma: no cover - hardware specific
-            logger.error("Failed to press key %s: %s", key, exc)
+    def press_action(self, mapping: GestureMapping) -> Optional["Future[bool]"]:
+        """Compile and schedule an ad-hoc mapping; the AI loop uses ``press_compiled``."""
+        return self.press_compiled(self.compile(mapping))
 
-    def _press_combo(self, keys: Iterable[str]) -> None:
-        keys_list: List[str] = list(keys)
-        logger.debug("Pressing combo: %s", "+".join(keys_list))
+    async def press_action_async(self, mapping: GestureMapping) -> bool:
+        """Await completion of a mapping; False if dropped, cancelled or disabled."""
+        return await self.press_compiled_async(self.compile(mapping))
+
+    async def press_compiled_async(self, compiled: CompiledMapping) -> bool:
+        future = self.press_compiled(compiled)
+        if future is None:
+            return False
         try:
-            if hasattr(self._controller, "press"):
-                resolved = [self._resolve_key(k) for k in keys_list]
-                for key in resolved:
-                    self._controller.press(key)
-                for key in reversed(resolved):
-                    self._controller.release(key)
-            else:
-                self._controller.send("+".join(keys_list))
-        except Exception as exc:  # pragma: no cover
-            logger.error("Failed to press combo %s: %s", keys_list, exc)
+            # The future may be shared with coalesced callers; a caller going away must
+            # only stop its own wait, not cancel the action for everyone else.
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return False
+            raise
+
+    def cancel_pending(self) -> int:
+        return self._engine.cancel_all()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backlog": self._engine.backlog(),
+            "coalesced": self._engine.coalesced,
+            "dropped": self._engine.dropped,
+            "cancelled": self._engine.cancelled,
+            "timing": self._engine.stats.snapshot(),
+        }
+
+    def histograms(self) -> Dict[str, Dict[str, object]]:
+        return {"actuation": self._engine.stats.histogram()}
+
+    def stop(self) -> None:
+        self._engine.stop()
+
+    def _supports_press_release(self) -> bool:
+        return hasattr(self._controller, "press") and hasattr(self._controller, "release")
+
+    def resolve_key(self, key: str) -> Hashable:
+        """Map a key name to the backend's key object (pynput ``Key`` or a plain name)."""
+        if len(key) == 1:
+            return key
+        name = key.lower()
+        if self._Key:
+            return self._alias.get(name) or getattr(self._Key, name, name)
+        return name
+
+    def _execute_step(self, kind: str, key: Hashable) -> None:
+        if kind == "press":
+            self._controller.press(key)
+        elif kind == "release":
+            self._controller.release(key)
+        else:
+            # keyboard lib
+            self._controller.send(key)
@@ -0,0 +1,57 @@
+import importlib
+import logging
+import threading
+from types import ModuleType
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access or truth test.
+
+    ``if not cv2:`` replaces the old ``cv2 is None`` import guard and is False
+    when the import fails. Attributes are cached on the proxy once read, so
+    hot-path lookups like ``cv2.resize`` cost no more than on the module.
+    """
+
+    def __init__(self, name: str, check: Optional[Callable[[ModuleType], bool]] = None) -> None:
+        self._name = name
+        self._check = check
+        self._module: Optional[ModuleType] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Optional[ModuleType]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        module = importlib.import_module(self._name)
+                        if self._check is not None and not self._check(module):
+                            raise ImportError(f"{self._name} is not the expected module")
+                        self._module = module
+                    except Exception as exc:
+                        logger.info("%s not available: %s", self._name, exc)
+                    self._loaded = True
+        return self._module
+
+    def __bool__(self) -> bool:
+        return self._load() is not None
+
+    def __getattr__(self, attr: str):
+        module = self._load()
+        if module is None:
+            raise AttributeError(f"{self._name} is not available")
+        value = getattr(module, attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "missing" if self._loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def preload(**modules: LazyModule) -> Dict[str, bool]:
+    """Import the given proxies now; returns which ones are available."""
+    return {name: bool(module) for name, module in modules.items()}
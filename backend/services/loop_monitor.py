@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from backend.services.pipeline import StageStats
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopMonitor:
+    """Measures how long the server's event loop is blocked.
+
+    A task sleeps for ``interval`` and records how late it wakes up. On an
+    idle loop the lag is well under a millisecond. Anything slower means a
+    coroutine, or a synchronous call inside one, held the loop for that long,
+    and every request and WebSocket send waited behind it. Wake-ups later
+    than ``threshold`` count as stalls.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.02) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = StageStats()
+        self.stalls = 0
+        self.blocked = 0.0  # seconds of lag beyond the threshold
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start probing the running event loop."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            began = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - began - self.interval, 0.0)
+            self.lag.record(lag)
+            if lag > self.threshold:
+                self.stalls += 1
+                self.blocked += lag
+                logger.debug("Event loop blocked for %.1f ms", lag * 1000.0)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000.0,
+            "threshold_ms": self.threshold * 1000.0,
+            "lag": self.lag.snapshot(),
+            "stalls": self.stalls,
+            "blocked_ms": self.blocked * 1000.0,
+        }
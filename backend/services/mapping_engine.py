@@ -0,0 +1,234 @@
+"""Compile gesture mappings into immutable, pre-resolved action plans.
+
+Actions are parsed and their keys resolved once, when mappings are loaded
+or replaced, instead of on every trigger. Macro actions are comma-separated
+steps:
+
+* ``a`` or ``ctrl+shift+t`` - tap a key or chord for ``hold_ms``
+* ``wait:150`` - pause for 150 ms
+* ``down:shift`` / ``up:shift`` - press or release a key without releasing/pressing it
+* ``text:hello`` - type text; quote it (``text:"a, b"``) to include commas
+"""
+
+import logging
+import types
+from typing import Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from backend.models.mapping_model import ActionType, GestureMapping, MappingConfig
+
+logger = logging.getLogger(__name__)
+
+# (offset in seconds from action start, "press" | "release" | "send", resolved key)
+Step = Tuple[float, str, Hashable]
+
+# Delay between characters typed by ``text:`` steps and ``text`` actions.
+TEXT_INTERVAL = 0.01
+
+NAMED_KEYS = frozenset(
+    [
+        "space", "enter", "return", "tab", "esc", "escape", "backspace", "delete", "insert",
+        "home", "end", "page_up", "page_down", "left", "right", "up", "down",
+        "ctrl", "control", "ctrl_l", "ctrl_r", "alt", "alt_l", "alt_r", "alt_gr",
+        "shift", "shift_l", "shift_r", "cmd", "cmd_l", "cmd_r", "win", "super",
+        "caps_lock", "num_lock", "scroll_lock", "print_screen", "pause", "menu",
+        "media_play_pause", "media_next", "media_previous",
+        "media_volume_up", "media_volume_down", "media_volume_mute",
+    ]
+    + [f"f{i}" for i in range(1, 21)]
+)
+
+Op = Tuple[str, Union[Tuple[str, ...], str, float]]
+
+
+class MappingValidationError(ValueError):
+    def __init__(self, errors: Sequence[str]) -> None:
+        super().__init__("; ".join(errors))
+        self.errors = list(errors)
+
+
+def is_valid_key(name: str) -> bool:
+    return len(name) == 1 or name.lower() in NAMED_KEYS
+
+
+def _split_macro(action: str) -> List[str]:
+    """Split on commas outside double quotes."""
+    parts, current, quoted = [], [], False
+    for ch in action:
+        if ch == '"':
+            quoted = not quoted
+            current.append(ch)
+        elif ch == "," and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _chord(spec: str) -> Tuple[str, ...]:
+    """Split a chord on "+"; two empty parts in a row are the plus key itself.
+
+    ``+`` and ``ctrl++`` give ``("+",)`` and ``("ctrl", "+")``. A stray
+    separator (``ctrl+``) keeps its empty part so validation reports it.
+    """
+    parts = [k.strip() for k in spec.split("+")]
+    keys: List[str] = []
+    i = 0
+    while i < len(parts):
+        if not parts[i] and i + 1 < len(parts) and not parts[i + 1]:
+            keys.append("+")
+            i += 2
+        else:
+            keys.append(parts[i])
+            i += 1
+    return tuple(keys)
+
+
+def parse_action(action_type: ActionType, action: str) -> List[Op]:
+    """Parse an action into ops; raises ``MappingValidationError`` on bad syntax or keys."""
+    errors: List[str] = []
+    ops: List[Op] = []
+    if action_type == ActionType.text:
+        if not action:
+            raise MappingValidationError(["empty action"])
+        return [("text", action)]
+    if action_type == ActionType.key:
+        ops.append(("tap", (action.strip(),)))
+        tokens = []
+    elif action_type == ActionType.shortcut:
+        ops.append(("chord", _chord(action)))
+        tokens = []
+    else:
+        tokens = _split_macro(action)
+
+    for token in tokens:
+        head, sep, arg = token.partition(":")
+        head = head.strip().lower() if sep else ""
+        if head == "wait":
+            value = arg.strip()
+            value = value[:-2] if value.endswith("ms") else value
+            try:
+                ms = float(value)
+            except ValueError:
+                errors.append(f"invalid delay '{arg}'")
+                continue
+            if ms < 0:
+                errors.append(f"negative delay '{arg}'")
+                continue
+            ops.append(("wait", ms / 1000.0))
+        elif head in ("down", "up"):
+            ops.append((head, arg.strip()))
+        elif head == "text":
+            text = arg.strip()
+            if len(text) >= 2 and text[0] == text[-1] == '"':
+                text = text[1:-1]
+            ops.append(("text", text))
+        else:
+            ops.append(("tap", _chord(token)))
+
+    for kind, arg in ops:
+        keys = arg if kind in ("tap", "chord") else (arg,) if kind in ("down", "up") else ()
+        if kind in ("tap", "chord", "down", "up") and not all(keys or ("",)):
+            errors.append(f"empty key in '{action}'")
+            continue
+        for key in keys:
+            if not is_valid_key(key):
+                errors.append(f"unknown key '{key}'")
+    if not ops and not errors:
+        errors.append("empty action")
+    if errors:
+        raise MappingValidationError(errors)
+    return ops
+
+
+def plan_steps(
+    ops: List[Op],
+    hold: float,
+    resolve: Callable[[str], Hashable],
+    press_release: bool = True,
+) -> Tuple[Step, ...]:
+    """Lay ops out on a timeline; keys are resolved here, once."""
+    steps: List[Step] = []
+    t = 0.0
+    for kind, arg in ops:
+        if kind == "wait":
+            t += arg
+        elif kind == "text":
+            for ch in arg:
+                if press_release:
+                    key = resolve(ch)
+                    steps.append((t, "press", key))
+                    steps.append((t, "release", key))
+                else:
+                    steps.append((t, "send", ch))
+                t += TEXT_INTERVAL
+        elif not press_release:
+            if kind in ("tap", "chord"):
+                steps.append((t, "send", "+".join(arg)))
+                t += hold if kind == "tap" else 0.0
+        elif kind == "down":
+            steps.append((t, "press", resolve(arg)))
+        elif kind == "up":
+            steps.append((t, "release", resolve(arg)))
+        else:
+            keys = [resolve(k) for k in arg]
+            # Shortcuts press and release immediately; taps hold for ``hold``.
+            release_at = t if kind == "chord" else t + hold
+            steps.extend((t, "press", k) for k in keys)
+            steps.extend((release_at, "release", k) for k in reversed(keys))
+            t = release_at
+    return tuple(steps)
+
+
+class CompiledMapping(NamedTuple):
+    mapping: GestureMapping
+    key: Hashable  # coalescing key for the actuation queue
+    steps: Tuple[Step, ...]
+
+
+class MappingTable:
+    """Immutable gesture -> mapping lookup with pre-compiled action plans.
+
+    Tables are never mutated; replacing the whole table is a single
+    reference assignment, so the AI loop reads it without a lock.
+    """
+
+    def __init__(self, config: MappingConfig, compiled: Dict[str, CompiledMapping], version: int = 0) -> None:
+        self.config = config
+        self.version = version
+        self.compiled: Mapping[str, CompiledMapping] = types.MappingProxyType(dict(compiled))
+        self.index: Mapping[str, GestureMapping] = types.MappingProxyType(
+            {label: c.mapping for label, c in compiled.items()}
+        )
+
+    def get(self, gesture: str) -> Optional[CompiledMapping]:
+        return self.compiled.get(gesture)
+
+    def __len__(self) -> int:
+        return len(self.compiled)
+
+
+def compile_table(
+    config: MappingConfig,
+    compile_mapping: Callable[[GestureMapping], CompiledMapping],
+    strict: bool = True,
+    version: int = 0,
+) -> MappingTable:
+    """Compile every mapping; with ``strict`` any invalid one rejects the whole config.
+
+    Non-strict compilation (used for mappings read at startup) logs and skips
+    invalid entries so a bad file cannot keep the service from starting.
+    """
+    compiled: Dict[str, CompiledMapping] = {}
+    errors: List[str] = []
+    for mapping in config.mappings:
+        try:
+            compiled[mapping.gesture] = compile_mapping(mapping)
+        except MappingValidationError as exc:
+            errors.extend(f"{mapping.gesture}: {error}" for error in exc.errors)
+    if errors and strict:
+        raise MappingValidationError(errors)
+    for error in errors:
+        logger.warning("Skipping invalid mapping %s", error)
+    return MappingTable(config, compiled, version)
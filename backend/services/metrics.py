@@ -0,0 +1,171 @@
+"""Prometheus text exposition for the gesture pipeline.
+
+Everything here is read from the ``stats()``/``histograms()`` counters the
+services keep anyway, so a scrape costs one pass over them and the hot
+path pays nothing extra beyond ``StageStats.record``.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.services.keyboard_service import KeyboardService
+from backend.services.loop_monitor import EventLoopMonitor
+from backend.services.profiler import SamplingProfiler
+from backend.services.sessions import SessionManager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsWriter:
+    """Collects samples grouped by metric family and renders them in order."""
+
+    def __init__(self, prefix: str = "gesture_") -> None:
+        self.prefix = prefix
+        self._families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def _family(self, name: str, kind: str, help_text: str) -> List[str]:
+        name = self.prefix + name
+        if name not in self._families:
+            self._families[name] = (kind, help_text, [])
+        return self._families[name][2]
+
+    def gauge(self, name: str, help_text: str, value: Optional[float], labels: Labels = ()) -> None:
+        if value is None:
+            return
+        self._family(name, "gauge", help_text).append(
+            f"{self.prefix}{name}{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def counter(self, name: str, help_text: str, value: Optional[float], labels: Labels = ()) -> None:
+        if value is None:
+            return
+        self._family(name + "_total", "counter", help_text).append(
+            f"{self.prefix}{name}_total{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def histogram(self, name: str, help_text: str, histogram: Dict[str, object], labels: Labels = ()) -> None:
+        lines = self._family(name, "histogram", help_text)
+        full = self.prefix + name
+        for bound, count in histogram["buckets"]:
+            lines.append(f"{full}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {count}")
+        lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+        lines.append(f"{full}_count{_format_labels(labels)} {histogram['count']}")
+
+    def render(self) -> str:
+        out: List[str] = []
+        for name, (kind, help_text, lines) in self._families.items():
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+def _sum(values: Iterable[float]) -> float:
+    return float(sum(values))
+
+
+def render_metrics(
+    sessions: SessionManager,
+    keyboard: KeyboardService,
+    profiler: Optional[SamplingProfiler] = None,
+    loop_monitor: Optional[EventLoopMonitor] = None,
+) -> str:
+    w = MetricsWriter()
+    for session in sessions.sessions():
+        loop = session.ai_loop
+        stats = loop.stats()
+        labels: Labels = (("session", session.session_id),)
+        for stage, histogram in loop.histograms().items():
+            w.histogram(
+                "stage_duration_seconds",
+                "Per-stage pipeline latency; stage=latency is capture to prediction.",
+                histogram,
+                labels + (("stage", stage),),
+            )
+        preview = session.gesture_state.preview
+        encode = preview.encode_stats.histogram()
+        w.histogram("preview_encode_seconds", "JPEG encode time per preview variant.", encode, labels)
+        w.gauge("running", "1 while the session's AI loop is running.", 1.0 if loop.running else 0.0, labels)
+        w.gauge("fps", "Achieved predictions per second.", stats["fps"], labels)
+        w.gauge("target_fps", "Configured AI loop rate.", stats["target_fps"], labels)
+        queued = stats.get("queues", {}).get("frames")
+        dropped = stats.get("dropped", {}).get("frames")
+        w.gauge("frame_queue_depth", "Frames waiting for inference.", queued, labels)
+        w.counter("frames_dropped", "Frames replaced before inference picked them up.", dropped, labels)
+        w.gauge("preview_viewers", "Connected preview streams.", preview.viewers, labels)
+        w.counter("preview_encoded", "Preview frames encoded.", preview.encoded, labels)
+
+        broadcast = stats["broadcast"]
+        per_subscriber = broadcast["per_subscriber"]
+        subscribers = "Open gesture stream subscriptions by mode (full or delta)."
+        w.gauge("ws_subscribers", subscribers, broadcast["subscribers"], labels + (("mode", "full"),))
+        w.gauge("ws_subscribers", subscribers, broadcast["delta"]["subscribers"], labels + (("mode", "delta"),))
+        pending = _sum(s["pending"] for s in per_subscriber)
+        lag = max((s["lag_ms"] for s in per_subscriber), default=0.0) / 1000.0
+        ws_dropped = _sum(s["dropped"] for s in per_subscriber)
+        w.gauge("ws_pending", "Predictions buffered across subscriptions.", pending, labels)
+        w.gauge("ws_max_lag_seconds", "Age of the oldest undelivered prediction.", lag, labels)
+        w.counter("ws_dropped", "Predictions dropped for slow subscribers.", ws_dropped, labels)
+
+        triggers = stats["triggers"]
+        w.counter("triggers_fired", "Mappings fired by the gesture trigger.", triggers["fired"], labels)
+        w.counter("triggers_suppressed", "Triggers suppressed by cooldown.", triggers["suppressed"], labels)
+
+        motion = stats.get("motion")
+        if motion:
+            w.counter("motion_skipped", "Frames skipped by the motion gate.", motion["skipped"], labels)
+            w.gauge("motion_idle", "1 while the motion gate is idle.", 1.0 if motion["idle"] else 0.0, labels)
+
+        governor = stats.get("governor")
+        if governor:
+            w.gauge("governor_level", "Governor quality level index (0 = best).", governor["level_index"], labels)
+            w.gauge("governor_fps", "Capture rate chosen by the governor.", governor["level"]["fps"], labels)
+            w.gauge("governor_p95_seconds", "Governor's last window p95 latency.", governor["p95_ms"] / 1000.0, labels)
+            w.counter("governor_changes", "Quality level changes by the governor.", governor["changes"], labels)
+
+        vision = stats.get("vision")
+        if vision and vision.get("roi_tracking"):
+            w.counter("roi_hits", "Frames tracked inside the ROI.", vision["roi_hits"], labels)
+            w.counter("roi_misses", "ROI frames that lost the hand.", vision["roi_misses"], labels)
+        motion_gestures = vision.get("motion_gestures") if vision else None
+        if motion_gestures:
+            for gesture, count in motion_gestures["matches"].items():
+                w.counter("motion_gestures", "Motion gestures recognised.", count, labels + (("gesture", gesture),))
+        worker = stats.get("worker")
+        if worker:
+            alive = 1.0 if worker["alive"] else 0.0
+            w.gauge("worker_up", "1 while the inference worker process is alive.", alive, labels)
+            w.counter("worker_restarts", "Inference worker restarts.", worker["restarts"], labels)
+
+    actuation = keyboard.stats()
+    timing = keyboard.histograms()["actuation"]
+    w.histogram("actuation_duration_seconds", "Time to play one key action.", timing)
+    w.gauge("actuation_backlog", "Key actions queued for the actuation worker.", actuation["backlog"])
+    w.counter("actuation_coalesced", "Key actions merged into an already queued one.", actuation["coalesced"])
+    w.counter("actuation_dropped", "Key actions dropped because the queue was full.", actuation["dropped"])
+    w.counter("actuation_cancelled", "Key actions cancelled before playing.", actuation["cancelled"])
+    if profiler is not None:
+        w.gauge("profiler_running", "1 while the sampling profiler is on.", 1.0 if profiler.running else 0.0)
+    if loop_monitor is not None:
+        lag = loop_monitor.lag.histogram()
+        w.histogram("event_loop_lag_seconds", "How late the event loop woke a sleeping probe task.", lag)
+        w.counter("event_loop_stalls", "Event loop wake-ups later than the stall threshold.", loop_monitor.stalls)
+    return w.render()
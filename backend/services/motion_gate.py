@@ -0,0 +1,95 @@
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.services.lazy_import import LazyModule
+
+cv2 = LazyModule("cv2")
+
+
+class MotionGate:
+    """Cheap change detector used to skip inference on static scenes.
+
+    Frames are reduced to a tiny grayscale thumbnail and compared with the
+    thumbnail of the last frame that was let through. A frame counts as
+    motion when more than ``threshold`` of its pixels moved by more than
+    ``pixel_delta`` grey levels. Comparing against the last *processed*
+    frame (rather than the previous one) also catches slow drift. A frame is
+    let through every ``refresh_s`` regardless, and after ``idle_after_s``
+    without motion the gate reports ``idle`` so callers can poll slowly.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.01,
+        pixel_delta: int = 12,
+        sample_width: int = 64,
+        idle_after_s: float = 10.0,
+        refresh_s: float = 2.0,
+    ) -> None:
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.sample_width = sample_width
+        self.idle_after_s = idle_after_s
+        self.refresh_s = refresh_s
+        self._reference: Optional[np.ndarray] = None
+        self._last_pass = 0.0
+        self._last_motion = time.monotonic()
+        self._last_check: Optional[float] = None
+        self.idle = False
+        self.checked = 0
+        self.skipped = 0
+        self.idle_seconds = 0.0
+
+    def reset(self) -> None:
+        self._reference = None
+        self._last_motion = time.monotonic()
+        self._last_check = None
+        self.idle = False
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        if cv2:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+            size = (self.sample_width, max(int(height * self.sample_width / width), 1))
+            return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+        step = max(width // self.sample_width, 1)
+        small = frame[::step, ::step]
+        return (small.mean(axis=2) if small.ndim == 3 else small).astype(np.int16)
+
+    def check(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """Return True when ``frame`` should be processed."""
+        now = time.monotonic() if now is None else now
+        if self.idle and self._last_check is not None:
+            self.idle_seconds += now - self._last_check
+        self._last_check = now
+        self.checked += 1
+
+        thumb = self.thumbnail(frame)
+        reference = self._reference
+        moved = (
+            reference is None
+            or reference.shape != thumb.shape
+            or np.count_nonzero(np.abs(thumb - reference) > self.pixel_delta) > self.threshold * thumb.size
+        )
+        if moved:
+            self._last_motion = now
+            self.idle = False
+        elif now - self._last_motion >= self.idle_after_s:
+            self.idle = True
+
+        if moved or now - self._last_pass >= self.refresh_s:
+            self._reference = thumb
+            self._last_pass = now
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "idle": self.idle,
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "idle_seconds": self.idle_seconds,
+        }
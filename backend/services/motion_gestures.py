@@ -0,0 +1,390 @@
+import math
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.gesture_classifier import FINGER_BASES, INDEX_TIP, NUM_LANDMARKS, WRIST
+
+PALM_POINTS = np.array([WRIST, *FINGER_BASES])
+# Resampling step per channel: palm in frame widths, index in hand sizes (wrist to middle base).
+CHANNEL_STEPS = {"palm": 0.03, "index": 0.08}
+# DTW cost of matching one more observation to the same template step.
+REPEAT_PENALTY = 0.05
+
+
+class MotionTemplate(NamedTuple):
+    label: str
+    directions: np.ndarray  # (steps, 2) unit vectors in image coordinates (y points down)
+    channel: str = "palm"  # palm: hand centre; index: index tip relative to the palm
+    max_distance: float = 0.2  # mean DTW cost per template step: 0 = exact, 1 = opposite
+    min_straightness: float = 0.0  # chord / path length over the match
+    min_turn: float = 0.0  # |net turning| over the match, radians
+    max_turn: float = math.inf
+
+
+def swipe_template(label: str, direction: Tuple[float, float], steps: int = 8, **kwargs) -> MotionTemplate:
+    unit = np.asarray(direction, dtype=np.float32)
+    unit /= np.linalg.norm(unit)
+    kwargs = {"min_straightness": 0.85, "max_turn": math.pi / 6, **kwargs}
+    return MotionTemplate(label, np.tile(unit, (steps, 1)), **kwargs)
+
+
+def circle_templates(label: str = "circle", steps: int = 12, phases: int = 4, **kwargs) -> List[MotionTemplate]:
+    """Three-quarter turns in both directions, starting at ``phases`` evenly spaced headings.
+
+    Any full circle contains one of them whatever heading it starts at.
+    """
+    kwargs = {"min_turn": 1.25 * math.pi, "max_distance": 0.25, **kwargs}
+    templates = []
+    for sign in (1.0, -1.0):  # clockwise on screen, then anticlockwise
+        for phase in range(phases):
+            angles = 2 * math.pi * phase / phases + sign * 1.5 * math.pi * np.arange(steps) / steps
+            directions = np.stack([np.cos(angles), np.sin(angles)], axis=1).astype(np.float32)
+            templates.append(MotionTemplate(label, directions, **kwargs))
+    return templates
+
+
+def tap_template(label: str = "tap", steps: int = 3, **kwargs) -> MotionTemplate:
+    """Index tip dips towards the palm and comes back."""
+    directions = np.array([(0.0, 1.0)] * steps + [(0.0, -1.0)] * steps, dtype=np.float32)
+    kwargs = {"channel": "index", "max_distance": 0.15, "min_turn": 0.75 * math.pi, **kwargs}
+    return MotionTemplate(label, directions, **kwargs)
+
+
+DEFAULT_TEMPLATES: Tuple[MotionTemplate, ...] = (
+    swipe_template("swipe_left", (-1.0, 0.0)),
+    swipe_template("swipe_right", (1.0, 0.0)),
+    swipe_template("swipe_up", (0.0, -1.0)),
+    swipe_template("swipe_down", (0.0, 1.0)),
+    *circle_templates(),
+    tap_template(),
+)
+
+
+class _TemplateBank:
+    """One channel's templates stacked into a zero-padded (templates, max_steps, 2) array."""
+
+    def __init__(self, templates: Sequence[MotionTemplate]) -> None:
+        self.templates = list(templates)
+        self.lengths = np.array([len(t.directions) for t in self.templates], dtype=np.int64)
+        self.width = int(self.lengths.max())
+        self.directions = np.zeros((len(self.templates), self.width, 2), dtype=np.float32)
+        for k, template in enumerate(self.templates):
+            self.directions[k, : self.lengths[k]] = template.directions
+        self.max_distance = np.array([t.max_distance for t in self.templates], dtype=np.float32)
+
+
+class _Channel:
+    """A tracked point resampled into fixed-length steps, each one observation.
+
+    Observation ``j``'s time sits at ``times[j % window]``; the anchor after ``j``
+    observations and the turning accumulated by then sit at ``j % window`` of
+    ``anchors`` and ``turning``, so spans of up to ``window - 2`` observations
+    are O(1) lookups. ``cost``/``start`` hold the streaming subsequence DTW
+    (SPRING) column of every template: the best cost of matching the template
+    prefix up to each step against a run of observations ending at the
+    newest one, and where that run started. Every template step consumes at
+    least one observation, so a match always covers the template's length;
+    an observation repeated on the same step costs ``REPEAT_PENALTY`` extra
+    so the shortest fitting run wins.
+    """
+
+    def __init__(self, bank: _TemplateBank, step: float, window: int, smoothing: float) -> None:
+        self.bank = bank
+        self.step = step
+        self.window = window
+        self.smoothing = smoothing
+        self.count = 0
+        self.point: Optional[np.ndarray] = None  # exponentially smoothed position
+        self.anchor: Optional[np.ndarray] = None
+        self.direction: Optional[np.ndarray] = None
+        self.last_time = 0.0
+        self.times = np.zeros(window, dtype=np.float64)
+        self.anchors = np.zeros((window, 2), dtype=np.float32)
+        self.turning = np.zeros(window, dtype=np.float64)
+        shape = (len(bank.templates), bank.width + 1)
+        self.cost = np.full(shape, np.inf, dtype=np.float32)
+        self.start = np.zeros(shape, dtype=np.int64)
+        self._next_cost = np.empty_like(self.cost)
+        self._next_start = np.empty_like(self.start)
+
+    def reset_matches(self) -> None:
+        self.cost.fill(np.inf)
+
+    def advance(
+        self, point: np.ndarray, now: float, max_gap: float, max_duration: float
+    ) -> Optional[Tuple[MotionTemplate, float]]:
+        if self.point is None:
+            self.point = point.copy()
+            self.anchor = point.copy()
+            self.anchors[0] = point
+            return None
+        self.point += (1.0 - self.smoothing) * (point - self.point)
+        point = self.point
+        offset = point - self.anchor
+        distance = float(np.hypot(offset[0], offset[1]))
+        steps = int(distance / self.step)
+        if not steps:
+            return None
+        if now - self.last_time > max_gap:
+            self.reset_matches()  # a pause ends whatever was being drawn
+            self.direction = None
+        unit = offset / distance
+        best = None
+        for _ in range(min(steps, 4)):
+            self.anchor += unit * self.step
+            match = self._observe(unit, now, max_duration)
+            if match is not None and (best is None or match[1] < best[1]):
+                best = match
+        if steps > 4:
+            self.anchor = point.copy()  # tracking jump: don't invent the path in between
+        self.last_time = now
+        return best
+
+    def _observe(self, unit: np.ndarray, now: float, max_duration: float) -> Optional[Tuple[MotionTemplate, float]]:
+        j = self.count
+        w = self.window
+        turn = 0.0
+        if self.direction is not None:
+            cross = self.direction[0] * unit[1] - self.direction[1] * unit[0]
+            turn = math.atan2(cross, float(self.direction @ unit))
+        self.direction = unit
+        self.times[j % w] = now
+        self.turning[(j + 1) % w] = self.turning[j % w] + turn
+        self.anchors[(j + 1) % w] = self.anchor
+        self.count = j + 1
+
+        # One SPRING column per template: O(template steps) whatever the history length.
+        bank = self.bank
+        step_cost = (1.0 - bank.directions @ unit) * 0.5  # (templates, width)
+        prev_cost, prev_start = self.cost, self.start
+        prev_cost[:, 0] = 0.0
+        prev_start[:, 0] = j  # a match may begin at this observation
+        cost, start = self._next_cost, self._next_start
+        cost[:, 0] = 0.0
+        start[:, 0] = j
+        advance = prev_cost[:, :-1]
+        repeat = prev_cost[:, 1:] + REPEAT_PENALTY
+        stay = repeat < advance
+        cost[:, 1:] = step_cost + np.where(stay, repeat, advance)
+        start[:, 1:] = np.where(stay, prev_start[:, 1:], prev_start[:, :-1])
+        self.cost, self._next_cost = cost, prev_cost
+        self.start, self._next_start = start, prev_start
+
+        rows = np.arange(len(bank.templates))
+        mean_cost = cost[rows, bank.lengths] / bank.lengths
+        match = None
+        for k in np.flatnonzero(mean_cost <= bank.max_distance):
+            s = int(start[k, bank.lengths[k]])
+            span = j - s + 1
+            if span > w - 2 or now - self.times[s % w] > max_duration:
+                continue
+            template = bank.templates[k]
+            turning = abs(self.turning[(j + 1) % w] - self.turning[(s + 1) % w])
+            if not template.min_turn <= turning <= template.max_turn:
+                continue
+            chord = self.anchors[(j + 1) % w] - self.anchors[s % w]
+            if float(np.hypot(chord[0], chord[1])) < template.min_straightness * span * self.step:
+                continue
+            if match is None or mean_cost[k] < match[1]:
+                match = (template, float(mean_cost[k]))
+        return match
+
+    def span_features(self, observations: int) -> Dict[str, float]:
+        """Displacement, path length and turning over the last ``observations`` steps."""
+        n = min(observations, self.count, self.window - 1)
+        end, begin = self.count % self.window, (self.count - n) % self.window
+        chord = self.anchors[end] - self.anchors[begin]
+        path = n * self.step
+        # The first step's turn came from outside the span.
+        turning = float(self.turning[end] - self.turning[(self.count - n + 1) % self.window]) if n > 1 else 0.0
+        return {
+            "dx": float(chord[0]),
+            "dy": float(chord[1]),
+            "path": path,
+            "turning": turning,
+            "curvature": turning / path if path else 0.0,
+        }
+
+
+class _HandTrack:
+    def __init__(self, banks: Dict[str, _TemplateBank], window: int, smoothing: float, now: float) -> None:
+        self.landmarks = np.zeros((window, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.frames = 0
+        self.palm: Optional[np.ndarray] = None
+        self.last_seen = now
+        self.velocity = np.zeros(2, dtype=np.float32)
+        self.channels = {
+            name: _Channel(bank, CHANNEL_STEPS[name], window, smoothing) for name, bank in banks.items()
+        }
+
+
+class MotionGestureRecognizer:
+    """Dynamic gestures (swipes, circles, taps) from a per-hand landmark history.
+
+    Each hand keeps its last ``window`` landmark arrays in a ring, a smoothed
+    palm velocity, and two tracked points: the palm centre, and the index tip
+    relative to the palm in hand sizes. A point's path is resampled into
+    fixed-length steps and every step direction is one observation; prefix
+    sums of turning angle and the anchor positions make displacement, path
+    length and curvature over any recent span O(1). Each observation
+    advances a streaming subsequence DTW over all registered templates of
+    that point, one column per template, so a frame costs the same however
+    long the history is. A match must also finish within ``max_duration_s``
+    and pass the template's straightness and turning limits. Its label is then reported for ``hold_frames`` frames so
+    ``GestureTrigger`` sees it long enough to fire.
+    """
+
+    def __init__(
+        self,
+        templates: Sequence[MotionTemplate] = DEFAULT_TEMPLATES,
+        window: int = 48,
+        hold_frames: int = 3,
+        max_hands: int = 2,
+        max_gap_s: float = 0.3,
+        max_duration_s: float = 1.5,
+        mirror: bool = False,
+        smoothing: float = 0.5,
+        velocity_alpha: float = 0.3,
+    ) -> None:
+        self.window = max(int(window), 8)
+        self.hold_frames = max(int(hold_frames), 1)
+        self.max_hands = max(int(max_hands), 1)
+        self.max_gap_s = max_gap_s
+        self.max_duration_s = max_duration_s
+        self.mirror = mirror  # flip x so labels follow the user's left/right on a selfie camera
+        self.smoothing = min(max(smoothing, 0.0), 0.95)  # weight of the previous point against landmark jitter
+        self.velocity_alpha = velocity_alpha
+        self.templates: List[MotionTemplate] = []
+        self._banks: Dict[str, _TemplateBank] = {}
+        self._tracks: List[_HandTrack] = []
+        self._held: Optional[Tuple[str, float]] = None
+        self._hold_left = 0
+        self.observations = 0
+        self.matches: Counter = Counter()
+        for template in templates:
+            self.register(template)
+
+    def register(self, template: MotionTemplate) -> None:
+        """Add a template; hands already tracked start matching it from scratch."""
+        if template.channel not in CHANNEL_STEPS:
+            raise ValueError(f"unknown motion channel {template.channel!r}")
+        self.templates.append(template)
+        self._banks = {
+            channel: _TemplateBank([t for t in self.templates if t.channel == channel])
+            for channel in CHANNEL_STEPS
+            if any(t.channel == channel for t in self.templates)
+        }
+        self._tracks = []
+
+    @property
+    def labels(self) -> List[str]:
+        return list(dict.fromkeys(t.label for t in self.templates))
+
+    def reset(self) -> None:
+        self._tracks = []
+        self._held = None
+        self._hold_left = 0
+
+    def update(self, hands: Optional[np.ndarray], now: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """Feed one frame's (hands, 21, 3) landmarks, or None; returns the held (label, confidence), if any."""
+        now = time.monotonic() if now is None else now
+        if hands is not None and len(hands):
+            for track, landmarks, points in self._assign(np.asarray(hands, dtype=np.float32)[: self.max_hands], now):
+                match = self._advance(track, landmarks, points, now)
+                if match is not None:
+                    template, cost = match
+                    self._held = (template.label, 1.0 - 0.5 * cost / template.max_distance)
+                    self._hold_left = self.hold_frames
+                    self.matches[template.label] += 1
+        self._tracks = [t for t in self._tracks if now - t.last_seen <= self.max_gap_s]
+        if self._hold_left <= 0:
+            return None
+        self._hold_left -= 1
+        return self._held
+
+    def _assign(self, hands: np.ndarray, now: float) -> List[Tuple[_HandTrack, np.ndarray, np.ndarray]]:
+        """Pair each hand with the nearest unclaimed track by palm position, else start a new one."""
+        free = list(self._tracks)
+        pairs = []
+        for landmarks in hands:
+            points = landmarks[:, :2].copy()
+            if self.mirror:
+                points[:, 0] = -points[:, 0]
+            palm = points[PALM_POINTS].mean(axis=0)
+            track = min(
+                (t for t in free if t.palm is not None),
+                key=lambda t: float(np.abs(t.palm - palm).sum()),
+                default=None,
+            )
+            if track is None or float(np.abs(track.palm - palm).sum()) > 0.3:
+                track = _HandTrack(self._banks, self.window, self.smoothing, now)
+                if len(self._tracks) >= self.max_hands:
+                    stalest = min(self._tracks, key=lambda t: t.last_seen)
+                    self._tracks.remove(stalest)
+                    if stalest in free:
+                        free.remove(stalest)
+                self._tracks.append(track)
+            else:
+                free.remove(track)
+            pairs.append((track, landmarks, points))
+        return pairs
+
+    def _advance(
+        self, track: _HandTrack, landmarks: np.ndarray, points: np.ndarray, now: float
+    ) -> Optional[Tuple[MotionTemplate, float]]:
+        track.landmarks[track.frames % self.window] = landmarks
+        track.frames += 1
+        palm = points[PALM_POINTS].mean(axis=0)
+        if track.palm is not None:
+            dt = now - track.last_seen
+            if dt > 0:
+                a = self.velocity_alpha
+                track.velocity = (1 - a) * track.velocity + a * (palm - track.palm) / dt
+        track.palm, track.last_seen = palm, now
+        size = float(np.hypot(*(points[9] - points[WRIST]))) + 1e-6
+        targets = {"palm": palm, "index": (points[INDEX_TIP] - palm) / size}
+        best = None
+        for name, channel in track.channels.items():
+            before = channel.count
+            match = channel.advance(targets[name], now, self.max_gap_s, self.max_duration_s)
+            self.observations += channel.count - before
+            if match is not None:
+                channel.reset_matches()  # so the rest of the same stroke isn't matched again
+                if best is None or match[1] < best[1]:
+                    best = match
+        return best
+
+    def history(self, hand: int = 0) -> Optional[np.ndarray]:
+        """The hand's recent landmarks, oldest first, as a (frames, 21, 3) copy."""
+        if hand >= len(self._tracks):
+            return None
+        track = self._tracks[hand]
+        n = min(track.frames, self.window)
+        order = np.arange(track.frames - n, track.frames) % self.window
+        return track.landmarks[order]
+
+    def features(self, hand: int = 0) -> Optional[Dict[str, float]]:
+        """Palm velocity (per second) and displacement, path length and curvature over the window."""
+        if hand >= len(self._tracks):
+            return None
+        track = self._tracks[hand]
+        features = {"vx": float(track.velocity[0]), "vy": float(track.velocity[1])}
+        features["speed"] = math.hypot(features["vx"], features["vy"])
+        palm = track.channels.get("palm")
+        if palm is not None:
+            features.update(palm.span_features(self.window))
+        return features
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "templates": len(self.templates),
+            "labels": self.labels,
+            "hands": len(self._tracks),
+            "observations": self.observations,
+            "matches": dict(self.matches),
+            "held": self._held[0] if self._hold_left > 0 and self._held else None,
+            "features": self.features(0),
+        }
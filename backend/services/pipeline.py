@@ -0,0 +1,149 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Histogram upper bounds in seconds, from sub-millisecond stages up to a stalled frame.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+class LatestSlot(Generic[T]):
+    """Single-item hand-off where a newer item replaces an unconsumed one.
+
+    ``on_drop`` is called (outside the lock) with every item that is replaced
+    or discarded unconsumed, e.g. to return a pooled frame.
+    """
+
+    def __init__(self, on_drop: Optional[Callable[[T], None]] = None) -> None:
+        self._cond = threading.Condition()
+        self._item: Optional[T] = None
+        self._has_item = False
+        self._closed = False
+        self._on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item: T) -> None:
+        with self._cond:
+            replaced, old = self._has_item, self._item
+            if replaced:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._cond.notify()
+        if replaced and self._on_drop is not None:
+            self._on_drop(old)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[T]:
+        with self._cond:
+            if not self._has_item and not self._closed:
+                self._cond.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        with self._cond:
+            discarded, old = self._has_item, self._item
+            self._closed = False
+            self._item = None
+            self._has_item = False
+        if discarded and self._on_drop is not None:
+            self._on_drop(old)
+
+    def depth(self) -> int:
+        return 1 if self._has_item else 0
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (``q`` in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(math.ceil(q / 100.0 * len(sorted_values)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[rank]
+
+
+class StageStats:
+    """Running timing figures for one pipeline stage (seconds).
+
+    Keeps an EWMA plus the most recent ``window`` samples for percentiles,
+    and lifetime per-bucket counts for Prometheus-style histograms.
+    """
+
+    _ALPHA = 0.1
+
+    def __init__(self, window: int = 512, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.buckets = tuple(buckets)
+        self._bucket_counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.avg = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += elapsed
+            self._bucket_counts[bisect.bisect_left(self.buckets, elapsed)] += 1
+            self._samples.append(elapsed)
+            self.last = elapsed
+            self.avg = elapsed if self.count == 1 else self.avg + self._ALPHA * (elapsed - self.avg)
+            if elapsed > self.max:
+                self.max = elapsed
+
+    def time(self) -> "_StageTimer":
+        return _StageTimer(self)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples)
+            snapshot = {
+                "count": self.count,
+                "last_ms": self.last * 1000.0,
+                "avg_ms": self.avg * 1000.0,
+                "max_ms": self.max * 1000.0,
+            }
+        for q in (50, 95, 99):
+            snapshot[f"p{q}_ms"] = percentile(samples, q) * 1000.0
+        return snapshot
+
+    def histogram(self) -> Dict[str, object]:
+        """Cumulative bucket counts (seconds), plus sum and count, since creation."""
+        with self._lock:
+            counts = list(self._bucket_counts)
+            total, count = self.total, self.count
+        cumulative = []
+        running = 0
+        for bound, n in zip(self.buckets + (math.inf,), counts):
+            running += n
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+class _StageTimer:
+    def __init__(self, stats: StageStats) -> None:
+        self._stats = stats
+        self._start = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stats.record(time.perf_counter() - self._start)
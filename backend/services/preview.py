@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.services.frame_pool import FramePool
+from backend.services.lazy_import import LazyModule
+from backend.services.pipeline import StageStats
+
+logger = logging.getLogger(__name__)
+
+cv2 = LazyModule("cv2")
+
+MJPEG_BOUNDARY = "frame"
+
+
+class _Variant:
+    __slots__ = ("lock", "seq", "data", "resized")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.seq = -1
+        self.data: Optional[bytes] = None
+        self.resized: Optional[np.ndarray] = None  # reused downscale target
+
+
+class PreviewHub:
+    """Holds the latest processed frame and JPEG-encodes it only on demand.
+
+    Publishing a frame just swaps a reference. Each (width, quality) variant
+    of a frame is encoded at most once and shared by every viewer asking for
+    it, so with no viewers attached no encoding work is done at all.
+    """
+
+    def __init__(self, default_quality: int = 70) -> None:
+        self.default_quality = default_quality
+        self._frame: Optional[np.ndarray] = None
+        self._pool: Optional[FramePool] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._variants: Dict[Tuple[int, int], _Variant] = {}
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self.viewers = 0
+        self.encoded = 0
+        self.encode_stats = StageStats()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, frame: np.ndarray, pool: Optional[FramePool] = None) -> None:
+        """Make ``frame`` the latest; a pooled frame is retained until replaced."""
+        if pool is not None:
+            pool.retain(frame)
+        with self._lock:
+            old, old_pool = self._frame, self._pool
+            self._frame, self._pool = frame, pool
+            self._seq += 1
+            waiters = list(self._waiters)
+        if old_pool is not None:
+            old_pool.release(old)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # pragma: no cover - loop already closed
+                pass
+
+    def encode(self, width: int = 0, quality: Optional[int] = None) -> Optional[Tuple[int, bytes]]:
+        """Return ``(seq, jpeg)`` for the latest frame, encoding it if not cached."""
+        if not cv2:
+            return None
+        quality = int(min(max(quality or self.default_quality, 10), 95))
+        key = (max(int(width), 0), quality)
+        with self._lock:
+            frame, pool, seq = self._frame, self._pool, self._seq
+            variant = self._variants.setdefault(key, _Variant())
+            if pool is not None:
+                # Keep the buffer from being recycled while it is encoded.
+                pool.retain(frame)
+        if frame is None:
+            return None
+        try:
+            with variant.lock:
+                if variant.seq != seq:
+                    with self.encode_stats.time():
+                        data = self._encode(frame, key[0], quality, variant)
+                    if data is None:
+                        return None
+                    variant.seq, variant.data = seq, data
+                    self.encoded += 1
+                return variant.seq, variant.data  # type: ignore[return-value]
+        finally:
+            if pool is not None:
+                pool.release(frame)
+
+    @staticmethod
+    def _encode(frame: np.ndarray, width: int, quality: int, variant: _Variant) -> Optional[bytes]:
+        if width and frame.shape[1] > width:
+            height = max(int(frame.shape[0] * width / frame.shape[1]), 1)
+            shape = (height, width) + frame.shape[2:]
+            if variant.resized is None or variant.resized.shape != shape:
+                variant.resized = np.empty(shape, dtype=frame.dtype)
+            frame = cv2.resize(frame, (width, height), dst=variant.resized, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        return encoded.tobytes() if ok else None
+
+    async def stream(
+        self, width: int = 0, quality: Optional[int] = None, max_fps: float = 0.0
+    ) -> AsyncIterator[bytes]:
+        """Yield JPEG bytes for each new frame while the caller stays attached."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        last_seq = -1
+        with self._lock:
+            self._waiters.add(waiter)
+            self.viewers += 1
+        try:
+            while True:
+                if self._seq == last_seq:
+                    event.clear()
+                    if self._seq == last_seq:
+                        await event.wait()
+                started = loop.time()
+                result = await asyncio.to_thread(self.encode, width, quality)
+                if result is None:
+                    last_seq = self._seq
+                    continue
+                last_seq, data = result
+                yield data
+                if min_interval:
+                    await asyncio.sleep(max(min_interval - (loop.time() - started), 0))
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+                self.viewers -= 1
+
+    async def mjpeg(
+        self, width: int = 0, quality: Optional[int] = None, max_fps: float = 0.0
+    ) -> AsyncIterator[bytes]:
+        """``multipart/x-mixed-replace`` body parts for ``stream``."""
+        async for data in self.stream(width, quality, max_fps):
+            yield (
+                b"--" + MJPEG_BOUNDARY.encode() + b"\r\n"
+                b"Content-Type: image/jpeg\r\n"
+                b"Content-Length: " + str(len(data)).encode() + b"\r\n\r\n" + data + b"\r\n"
+            )
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "viewers": self.viewers,
+            "encoded": self.encoded,
+            "encode": self.encode_stats.snapshot(),
+        }
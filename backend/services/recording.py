@@ -0,0 +1,308 @@
+"""Compact landmark recordings: what the model saw, without the video.
+
+A recording is a small JSON header followed by fixed-width records, one
+per processed frame (about 270 bytes with two hands). ``LandmarkReader``
+memory-maps the records, so each field is a column view that can be
+sliced or streamed without reading the whole file. ``replay`` feeds a
+recording back through a classifier and ``GestureTrigger`` as fast as
+NumPy allows.
+"""
+
+import json
+import logging
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from backend.models.mapping_model import MappingConfig
+from backend.services.gesture_classifier import (
+    GESTURE_LABELS,
+    LABEL_TABLE,
+    NUM_LANDMARKS,
+    GestureClassifier,
+    RuleGestureClassifier,
+)
+from backend.services.gesture_trigger import GestureTrigger
+from backend.services.motion_gestures import MotionGestureRecognizer
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GLMREC1\n"
+MAX_HANDS = 2
+
+# Landmarks are normalised image coordinates, so float16 keeps ~1e-3 precision at half the size.
+RECORD_DTYPE = np.dtype(
+    [
+        ("t", "<f8"),  # seconds since the recording started
+        ("label", "<i2"),  # index into the header's labels (LABEL_TABLE ids when recorded)
+        ("confidence", "<f4"),
+        ("hands", "u1"),
+        ("landmarks", "<f2", (MAX_HANDS, NUM_LANDMARKS, 3)),
+    ]
+)
+
+
+class LandmarkRecorder:
+    """Append per-frame landmarks and predictions to a recording file.
+
+    Records are buffered and written whole, so a crash loses at most the
+    unflushed tail; readers ignore a trailing partial record. An existing
+    recording at ``path`` is kept, renamed after its last write time
+    (``bench.glm`` becomes ``bench-20240501-093000.glm``).
+    Timestamps should come from ``time.monotonic``, like the AI loops use.
+
+    Labels are stored as ``LABEL_TABLE`` ids. The header's label list is
+    padded so it can be rewritten in place when a custom model adds labels
+    mid-recording.
+    """
+
+    HEADER_RESERVE = 4096  # spare header bytes for labels added after opening
+
+    def __init__(self, path: Union[str, Path], flush_every: int = 64) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rotated_to = _rotate(self.path)
+        self._created = time.time()
+        self._labels: List[str] = []
+        self._header_size = 0
+        self._dropped: Set[str] = set()  # labels that no longer fit in the header
+        self._file = open(self.path, "wb")
+        self._write_header()
+        self._buffer = np.zeros(flush_every, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self._t0: Optional[float] = None
+        self.frames = 0
+
+    def write(
+        self,
+        timestamp: float,
+        label: str,
+        confidence: float,
+        landmarks: Optional[np.ndarray] = None,
+    ) -> None:
+        """Record one frame; ``landmarks`` is a (hands, 21, 3) array or None."""
+        if self._t0 is None:
+            self._t0 = timestamp
+        record = self._buffer[self._pending]
+        record["t"] = timestamp - self._t0
+        label_id = LABEL_TABLE.id(label)
+        if label_id >= len(self._labels) and not self._write_header():
+            if label not in self._dropped:
+                logger.warning("Recording header of %s is full; storing %r as unknown", self.path, label)
+                self._dropped.add(label)
+            label_id = 0
+        record["label"] = label_id
+        record["confidence"] = confidence
+        hands = 0 if landmarks is None else min(len(landmarks), MAX_HANDS)
+        record["hands"] = hands
+        record["landmarks"] = 0
+        if hands:
+            record["landmarks"][:hands] = landmarks[:hands]
+        self._pending += 1
+        self.frames += 1
+        if self._pending == len(self._buffer):
+            self.flush()
+
+    def _write_header(self) -> bool:
+        """Write the header with the current ``LABEL_TABLE`` labels; False if they no longer fit."""
+        labels = list(LABEL_TABLE.labels)
+        header = json.dumps({"version": 1, "labels": labels, "created": self._created}).encode()
+        if not self._header_size:
+            self._header_size = len(header) + self.HEADER_RESERVE
+            self._file.write(MAGIC + struct.pack("<I", self._header_size) + header.ljust(self._header_size))
+        elif len(header) <= self._header_size:
+            end = self._file.tell()
+            self._file.seek(len(MAGIC) + 4)
+            self._file.write(header.ljust(self._header_size))
+            self._file.seek(end)
+        else:
+            return False
+        self._labels = labels
+        return True
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write(self._buffer[: self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def _rotate(path: Path) -> Optional[Path]:
+    """Move a file at ``path`` aside so a new recording does not truncate it.
+
+    Returns the new name, or None when there was nothing worth keeping (no
+    file, or a recording without any frames).
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + 4)
+    if head[: len(MAGIC)] == MAGIC and len(head) == len(MAGIC) + 4:
+        (size,) = struct.unpack("<I", head[len(MAGIC) :])
+        if stat.st_size < len(MAGIC) + 4 + size + RECORD_DTYPE.itemsize:
+            return None
+    elif not stat.st_size:
+        return None
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(stat.st_mtime))
+    target = path.with_name(f"{path.stem}-{stamp}{path.suffix}")
+    n = 1
+    while target.exists():
+        target = path.with_name(f"{path.stem}-{stamp}-{n}{path.suffix}")
+        n += 1
+    path.rename(target)
+    return target
+
+
+class LandmarkReader:
+    """Memory-mapped view over a recording; fields are exposed as columns."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a landmark recording")
+            (size,) = struct.unpack("<I", f.read(4))
+            self.header: Dict[str, object] = json.loads(f.read(size))
+        offset = len(MAGIC) + 4 + size
+        count = (self.path.stat().st_size - offset) // RECORD_DTYPE.itemsize
+        self.records = (
+            np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+            if count
+            else np.zeros(0, dtype=RECORD_DTYPE)
+        )
+        # Map recorded ids through the file's own label table in case GESTURE_LABELS changed.
+        labels = self.header.get("labels", GESTURE_LABELS)
+        self._remap = np.array([LABEL_TABLE.id(label) for label in labels], dtype=np.int16)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index) -> np.ndarray:
+        return self.records[index]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.records["t"]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._remap[self.records["label"]]
+
+    @property
+    def confidences(self) -> np.ndarray:
+        return self.records["confidence"]
+
+    @property
+    def hands(self) -> np.ndarray:
+        return self.records["hands"]
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        return self.records["landmarks"]
+
+    def chunks(self, size: int = 4096) -> Iterator[np.ndarray]:
+        """Stream the recording in record slices of ``size``."""
+        for start in range(0, len(self.records), size):
+            yield self.records[start : start + size]
+
+    def duration(self) -> float:
+        return float(self.records["t"][-1]) if len(self.records) else 0.0
+
+
+class ReplayResult:
+    def __init__(
+        self,
+        label_ids: np.ndarray,
+        confidences: np.ndarray,
+        fired: List[Tuple[float, str, str]],
+        recorded: np.ndarray,
+        elapsed: float,
+        duration: float,
+    ) -> None:
+        self.label_ids = label_ids
+        self.confidences = confidences
+        self.fired = fired
+        self.recorded = recorded
+        self.elapsed = elapsed
+        self.duration = duration
+
+    def summary(self) -> Dict[str, object]:
+        frames = len(self.label_ids)
+        return {
+            "frames": frames,
+            "agreement": float((self.label_ids == self.recorded).mean()) if frames else 1.0,
+            "fired": len(self.fired),
+            "actions": [{"t": t, "gesture": g, "action": a} for t, g, a in self.fired],
+            "elapsed_s": self.elapsed,
+            "speedup": self.duration / self.elapsed if self.elapsed > 0 else 0.0,
+        }
+
+
+def replay(
+    reader: LandmarkReader,
+    classifier: Optional[GestureClassifier] = None,
+    mapping_config: Optional[MappingConfig] = None,
+    trigger: Optional[GestureTrigger] = None,
+    start: int = 0,
+    stop: Optional[int] = None,
+    motion: Optional[MotionGestureRecognizer] = None,
+) -> ReplayResult:
+    """Re-classify a recording and run the result through the trigger.
+
+    Classification is one vectorized call over every frame with a hand;
+    the trigger then steps through the frames on the recorded clock, so
+    cooldowns and hold-to-repeat behave as they did live. With ``motion``
+    the landmarks are also stepped through the recognizer, and a motion
+    gesture replaces the static label while it is held.
+    """
+    began = time.perf_counter()
+    classifier = classifier or RuleGestureClassifier()
+    trigger = trigger or GestureTrigger()
+    mappings = (mapping_config or MappingConfig()).to_index()
+    records = reader.records[start:stop]
+
+    label_ids = np.zeros(len(records), dtype=np.int16)
+    confidences = np.zeros(len(records), dtype=np.float32)
+    seen = np.flatnonzero(records["hands"] > 0)
+    if len(seen):
+        ids, confs = classifier.classify(records["landmarks"][seen, 0].astype(np.float32))
+        label_ids[seen] = ids
+        confidences[seen] = confs
+    if motion is not None:
+        motion.reset()
+        for i in range(len(records)):
+            hands = int(records["hands"][i])
+            landmarks = records["landmarks"][i, :hands].astype(np.float32) if hands else None
+            held = motion.update(landmarks, float(records["t"][i]))
+            if held is not None:
+                label_ids[i] = LABEL_TABLE.id(held[0])
+                confidences[i] = held[1]
+
+    fired: List[Tuple[float, str, str]] = []
+    if mappings:
+        timestamps = records["t"]
+        for i in range(len(records)):
+            label = LABEL_TABLE.labels[label_ids[i]]
+            mapping = trigger.update(label, float(confidences[i]), mappings, float(timestamps[i]))
+            if mapping is not None:
+                fired.append((float(timestamps[i]), mapping.gesture, mapping.action))
+
+    duration = float(records["t"][-1] - records["t"][0]) if len(records) > 1 else 0.0
+    return ReplayResult(
+        label_ids,
+        confidences,
+        fired,
+        reader.labels[start:stop],
+        time.perf_counter() - began,
+        duration,
+    )
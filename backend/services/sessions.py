@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from backend.models.mapping_model import MappingConfig
+from backend.services.ai_loop import AILoopService, GestureBroadcaster, GestureState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION = "default"
+
+
+class Session:
+    """One station: its own loop, gesture state, broadcaster and mappings."""
+
+    def __init__(
+        self,
+        session_id: str,
+        ai_loop: AILoopService,
+        gesture_state: GestureState,
+        broadcaster: GestureBroadcaster,
+        mappings_path: Path,
+        frame_source: str = "camera",
+        cpu: Optional[int] = None,
+    ) -> None:
+        self.session_id = session_id
+        self.ai_loop = ai_loop
+        self.gesture_state = gesture_state
+        self.broadcaster = broadcaster
+        self.mappings_path = mappings_path
+        self.frame_source = frame_source
+        self.cpu = cpu
+
+    @property
+    def mapping_config(self) -> MappingConfig:
+        return self.ai_loop.mapping_config
+
+    def update_mappings(self, config: MappingConfig) -> None:
+        self.ai_loop.update_mappings(config)
+
+    def stop(self) -> None:
+        self.ai_loop.stop()
+
+    def info(self) -> Dict[str, object]:
+        stats = self.ai_loop.stats()
+        return {
+            "session_id": self.session_id,
+            "frame_source": self.frame_source,
+            "running": self.ai_loop.running,
+            "fps": stats["fps"],
+            "cpu": self.cpu,
+        }
+
+
+SessionFactory = Callable[[str, Optional[int]], Session]
+
+
+class SessionExistsError(ValueError):
+    """A session with this id is already registered or being built."""
+
+
+class SessionCapacityError(RuntimeError):
+    """Every session slot is taken."""
+
+
+class SessionManager:
+    """Registry of sessions, capped at ``capacity`` (defaults to the core count).
+
+    Each session built by the factory gets a CPU slot, handed out lowest
+    first and reused once its session is removed, so per-session worker
+    processes can be pinned to distinct cores. Slot 0 is left to the server
+    process itself (event loop and the default session).
+    """
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.capacity = capacity or os.cpu_count() or 1
+        self._sessions: Dict[str, Session] = {}
+        self._reserved: Dict[str, int] = {}  # id -> cpu slot of sessions being built
+        self._lock = threading.Lock()
+
+    def add(self, session: Session) -> Session:
+        with self._lock:
+            self._check_free(session.session_id)
+            self._sessions[session.session_id] = session
+        return session
+
+    def _check_free(self, session_id: str) -> None:
+        if session_id in self._sessions or session_id in self._reserved:
+            raise SessionExistsError(f"Session '{session_id}' already exists")
+        if len(self._sessions) + len(self._reserved) >= self.capacity:
+            raise SessionCapacityError(f"Session capacity reached ({self.capacity})")
+
+    def create(self, session_id: str, factory: SessionFactory) -> Session:
+        """Build a session with ``factory`` outside the lock; the id and CPU slot are reserved meanwhile.
+
+        Raises ``SessionExistsError`` or ``SessionCapacityError`` before calling
+        ``factory``; anything the factory raises propagates unchanged.
+        """
+        with self._lock:
+            self._check_free(session_id)
+            used = {s.cpu for s in self._sessions.values()} | set(self._reserved.values())
+            cpu = next(i for i in range(1, self.capacity + 1) if i not in used)
+            self._reserved[session_id] = cpu
+        try:
+            session = factory(session_id, cpu)
+        except BaseException:
+            with self._lock:
+                del self._reserved[session_id]
+            raise
+        with self._lock:
+            del self._reserved[session_id]
+            self._sessions[session_id] = session
+        logger.info("Created session %s on cpu slot %s", session_id, cpu)
+        return session
+
+    def get(self, session_id: str) -> Session:
+        """Raises ``KeyError`` for unknown sessions."""
+        return self._sessions[session_id]
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id)
+        session.stop()
+
+    def sessions(self) -> List[Session]:
+        return list(self._sessions.values())
+
+    def stop_all(self) -> None:
+        for session in self.sessions():
+            session.stop()
@@ -0,0 +1,190 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.services.gesture_classifier import LABEL_TABLE, LabelTable
+
+
+class EventRing:
+    """Fixed-capacity columns of (monotonic time, label id, value); the oldest row is overwritten."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(int(capacity), 1)
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        self.label = np.zeros(self.capacity, dtype=np.int16)
+        self.value = np.zeros(self.capacity, dtype=np.float32)
+        self.written = 0  # rows ever appended; ``written % capacity`` is the next slot
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.label.nbytes + self.value.nbytes
+
+    @property
+    def wrapped(self) -> bool:
+        return self.written > self.capacity
+
+    def oldest(self) -> Optional[float]:
+        if not self.written:
+            return None
+        return float(self.ts[self.written % self.capacity] if self.wrapped else self.ts[0])
+
+    def append(self, ts: float, label: int, value: float) -> None:
+        i = self.written % self.capacity
+        self.ts[i] = ts
+        self.label[i] = label
+        self.value[i] = value
+        self.written += 1
+
+    def between(self, start: float, end: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Copies of the rows with ``start <= ts < end``, oldest first."""
+        if not self.wrapped:
+            segments = [slice(0, self.written)]
+        else:
+            # Both halves of a wrapped ring are sorted: [head:] is older than [:head].
+            head = self.written % self.capacity
+            segments = [slice(head, self.capacity), slice(0, head)]
+        parts = []
+        for segment in segments:
+            ts = self.ts[segment]
+            lo, hi = np.searchsorted(ts, (start, end))
+            if hi > lo:
+                base = segment.start
+                parts.append(slice(base + lo, base + hi))
+        if not parts:
+            empty = slice(0, 0)
+            return self.ts[empty].copy(), self.label[empty].copy(), self.value[empty].copy()
+        return tuple(  # type: ignore[return-value]
+            np.concatenate([column[part] for part in parts]) for column in (self.ts, self.label, self.value)
+        )
+
+
+class GestureTimeline:
+    """Recent predictions and triggered actions in constant memory.
+
+    Predictions and actions go into separate ``EventRing``s, so a burst of
+    frames cannot evict the action history. Rows hold compact label ids (see
+    ``LabelTable``) and ``time.monotonic()`` timestamps; times are converted
+    to Unix seconds only when queried.
+    """
+
+    def __init__(
+        self, capacity: int = 16384, action_capacity: int = 1024, labels: Optional[LabelTable] = None
+    ) -> None:
+        self.labels = labels or LABEL_TABLE
+        self.predictions = EventRing(capacity)
+        self.actions = EventRing(action_capacity)
+        self._lock = threading.Lock()
+        self._wall_offset = time.time() - time.monotonic()
+
+    def record_prediction(self, label: str, confidence: float, now: Optional[float] = None) -> None:
+        label_id = self.labels.id(label)
+        with self._lock:
+            self.predictions.append(time.monotonic() if now is None else now, label_id, confidence)
+
+    def record_action(self, gesture: str, confidence: float, now: Optional[float] = None) -> None:
+        label_id = self.labels.id(gesture)
+        with self._lock:
+            self.actions.append(time.monotonic() if now is None else now, label_id, confidence)
+
+    def to_monotonic(self, unix_seconds: float) -> float:
+        return unix_seconds - self._wall_offset
+
+    def to_unix(self, monotonic_seconds: float) -> float:
+        return monotonic_seconds + self._wall_offset
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        events: bool = True,
+        aggregate: bool = True,
+        max_gap: float = 1.0,
+        limit: int = 0,
+    ) -> Dict[str, object]:
+        """Events and/or per-gesture aggregates for ``[start, end)`` (Unix seconds).
+
+        Events are columnar (``t`` in Unix seconds, ``label`` ids into
+        ``labels``, ``confidence``); ``limit`` keeps only the newest rows.
+        Dwell time credits each prediction with the time until the next one,
+        capped at ``max_gap`` so pauses in the loop are not counted.
+        """
+        now = time.monotonic()
+        end_m = min(self.to_monotonic(end), now) if end is not None else now
+        start_m = self.to_monotonic(start) if start is not None else float("-inf")
+        with self._lock:
+            rings = (self.predictions, self.actions)
+            oldest = [ring.oldest() for ring in rings if ring.written]
+            # Rows before this were overwritten; a wrapped ring can't vouch for earlier times.
+            retained = max((ring.oldest() for ring in rings if ring.wrapped), default=float("-inf"))
+            # Report (and compute rates over) the span the data actually covers.
+            first = min(oldest, default=end_m) if start is None else start_m
+            window_start = min(max(first, retained), end_m)
+            predictions = self.predictions.between(window_start, end_m + 1e-6)
+            actions = self.actions.between(window_start, end_m + 1e-6)
+        labels = list(self.labels.labels)
+        result: Dict[str, object] = {
+            "start": self.to_unix(window_start),
+            "end": self.to_unix(end_m),
+            "truncated": start_m < retained,
+            "labels": labels,
+        }
+        if events:
+            result["predictions"] = self._columns(predictions, limit)
+            result["actions"] = self._columns(actions, limit)
+        if aggregate:
+            minutes = (end_m - window_start) / 60.0
+            result["summary"] = self._aggregate(predictions, actions, labels, max_gap, minutes)
+        return result
+
+    def _columns(self, rows: Tuple[np.ndarray, np.ndarray, np.ndarray], limit: int) -> Dict[str, list]:
+        ts, label, value = (column[-limit:] for column in rows) if limit > 0 else rows
+        return {
+            "t": (ts + self._wall_offset).round(3).tolist(),
+            "label": label.tolist(),
+            # float32 storage: widen before rounding or JSON gets 0.699999988079071.
+            "confidence": value.astype(np.float64).round(3).tolist(),
+        }
+
+    @staticmethod
+    def _aggregate(
+        predictions: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        actions: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        labels: list,
+        max_gap: float,
+        minutes: float,
+    ) -> Dict[str, Dict[str, float]]:
+        ts, label, confidence = predictions
+        n = len(labels)
+        frames = np.bincount(label, minlength=n)
+        dwell = np.bincount(label[:-1], weights=np.minimum(np.diff(ts), max_gap), minlength=n)
+        # A segment starts at the first frame and wherever the label changes.
+        changed = np.ones(len(label), dtype=bool)
+        changed[1:] = label[1:] != label[:-1]
+        segments = np.bincount(label[changed], minlength=n)
+        conf_sum = np.bincount(label, weights=confidence, minlength=n)
+        triggers = np.bincount(actions[1], minlength=n)
+        summary: Dict[str, Dict[str, float]] = {}
+        for i in np.flatnonzero(frames + triggers):
+            summary[labels[i]] = {
+                "frames": int(frames[i]),
+                "segments": int(segments[i]),
+                "dwell_s": round(float(dwell[i]), 3),
+                "mean_confidence": round(float(conf_sum[i] / frames[i]), 3) if frames[i] else 0.0,
+                "triggers": int(triggers[i]),
+                "triggers_per_min": round(float(triggers[i]) / minutes, 3) if minutes > 0 else 0.0,
+            }
+        return summary
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "predictions": len(self.predictions),
+            "actions": len(self.actions),
+            "capacity": self.predictions.capacity,
+            "action_capacity": self.actions.capacity,
+            "bytes": self.predictions.nbytes + self.actions.nbytes,
+        }
@@ -1,47 +1,174 @@
 import logging
-from typing import Optional, Tuple
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
+from backend.services.frame_pool import FramePool
+from backend.services.frame_sources import CameraSource, FrameSource
+from backend.services.gesture_classifier import (
+    LABEL_TABLE,
+    RuleGestureClassifier,
+    landmarks_to_array,
+)
+from backend.services.inference_backends import InferenceBackend
+from backend.services.lazy_import import LazyModule, preload
+from backend.services.motion_gestures import MotionGestureRecognizer
+
 logger = logging.getLogger(__name__)
 
-try:
-    import cv2
-except Exception as exc:  # pragma: no cover - dependency guard
-    cv2 = None
-    logger.warning("OpenCV not available: %s", exc)
+# Heavy optional dependencies load on first use (see ``load_dependencies``), so
+# importing this module costs no more than NumPy.
+cv2 = LazyModule("cv2")
+mp = LazyModule("mediapipe")
+# Running from the repo root, the ``vision/`` source dir imports as a namespace package.
+vision = LazyModule("vision", check=lambda module: hasattr(module, "preprocess"))
+
+
+def load_dependencies(mediapipe: bool = True) -> Dict[str, bool]:
+    """Import OpenCV, the C++ extension and (optionally) MediaPipe now."""
+    if mediapipe:
+        return preload(opencv=cv2, cpp_extension=vision, mediapipe=mp)
+    return preload(opencv=cv2, cpp_extension=vision)
+
+
+def _binomial5(a: np.ndarray, axis: int) -> np.ndarray:
+    n = a.shape[axis] - 4
+
+    def tap(k: int) -> np.ndarray:
+        index = [slice(None)] * a.ndim
+        index[axis] = slice(k, k + n)
+        return a[tuple(index)]
+
+    return tap(0) + 4 * tap(1) + 6 * tap(2) + 4 * tap(3) + tap(4)
+
+
+def preprocess_numpy(frame: np.ndarray, batched: bool = False) -> np.ndarray:
+    """5x5 binomial blur (OpenCV's fixed kernel for ksize=5, sigma=0) in pure NumPy.
+
+    With ``batched`` the leading axis indexes frames (N x H x W [x C]) and the
+    whole batch is blurred in one vectorized pass.
+    """
+    y = 1 if batched else 0
+    pad = [(0, 0)] * frame.ndim
+    pad[y] = pad[y + 1] = (2, 2)
+    p = np.pad(frame, pad, mode="reflect").astype(np.uint16)
+    blurred = _binomial5(_binomial5(p, y), y + 1)
+    return ((blurred + 128) >> 8).astype(np.uint8)
+
+
+def preprocess_opencv(frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    return cv2.GaussianBlur(frame, (5, 5), 0, dst=out)
+
 
-try:
-    import mediapipe as mp  # type: ignore
-except Exception:
-    mp = None
+def preprocess_cpp(
+    frame: np.ndarray, out: Optional[np.ndarray] = None, single_channel: bool = False
+) -> np.ndarray:
+    """Edge-map preprocessing in the C++ extension (releases the GIL).
 
-try:
-    import vision  # type: ignore  # compiled extension stub
-except Exception:
-    vision = None
+    Pass ``out`` (HxWx3, or HxW with ``single_channel``) to have the result
+    written in place instead of allocating a new array.
+    """
+    return vision.preprocess(frame, out=out, single_channel=single_channel)
+
+
+PREPROCESS_PATHS = {
+    "numpy": preprocess_numpy,
+    "opencv": preprocess_opencv,
+    "cpp": preprocess_cpp,
+}
+
+
+def available_preprocess_paths() -> Dict[str, Callable[[np.ndarray], np.ndarray]]:
+    """Preprocess implementations whose dependencies are importable."""
+    paths = {"numpy": preprocess_numpy}
+    if cv2:
+        paths["opencv"] = preprocess_opencv
+    if vision:
+        paths["cpp"] = preprocess_cpp
+    return paths
 
 
 class VisionService:
-    def __init__(self, camera_index: int = 0, use_cpp_extension: bool = True) -> None:
+    def __init__(
+        self,
+        camera_index: int = 0,
+        use_cpp_extension: bool = True,
+        source: Optional[FrameSource] = None,
+        classifier: Optional[InferenceBackend] = None,
+        classifier_factory: Optional[Callable[[], InferenceBackend]] = None,
+        roi_tracking: bool = False,
+        roi_input_size: int = 256,
+        roi_margin: float = 0.35,
+        roi_detect_width: int = 640,
+        frame_pool: Optional[FramePool] = None,
+        motion_gestures: Optional[MotionGestureRecognizer] = None,
+    ) -> None:
         self.camera_index = camera_index
-        self.use_cpp_extension = use_cpp_extension and vision is not None
-        self.cap = None
+        self.use_cpp_extension = use_cpp_extension  # honoured only if the extension imports
+        self.source: FrameSource = source or CameraSource(camera_index)
+        self._source_open = False
         self._mp_hands = None
+        # A factory defers model loading to ``load_classifier``/``start``.
+        self._classifier_factory = classifier_factory
+        self.classifier: Optional[InferenceBackend] = None
+        self.frame_model = False
+        if classifier is not None or classifier_factory is None:
+            self._set_classifier(classifier or RuleGestureClassifier())
+        self.last_landmarks: Optional[np.ndarray] = None
+        # ROI tracking: once a hand is found, later frames are cropped around it.
+        self.roi_tracking = roi_tracking
+        self.roi_input_size = roi_input_size
+        self.roi_margin = roi_margin
+        self.roi_detect_width = roi_detect_width
+        self._roi: Optional[Tuple[int, int, int]] = None  # x0, y0, side in full-frame pixels
+        self._roi_frame: Tuple[int, int] = (0, 0)  # (height, width) the ROI was found in
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.full_detections = 0
+        # Capture and preprocess write into pooled frames; consumers release them.
+        self.frame_pool = frame_pool or FramePool()
+        self._frame_shape: Optional[Tuple[int, ...]] = None
+        # Per-call temporaries of extract_landmarks (inference thread only).
+        self._scratch: Dict[Tuple[str, Tuple[int, ...]], np.ndarray] = {}
+        # Quality knobs turned by the latency governor (see ``set_quality``).
+        self.frame_scale = 1.0
+        self.input_scale = 1.0
+        # Swipes, circles and taps recognised over the landmark history.
+        self.motion_gestures = motion_gestures
+
+    @property
+    def is_open(self) -> bool:
+        return self._source_open
+
+    @property
+    def source_paced(self) -> bool:
+        """True when the frame source controls timing itself."""
+        return self.source.paced
+
+    @property
+    def pacing_wait(self) -> float:
+        """Seconds the last ``read_frame`` spent waiting for the source's pacer."""
+        return getattr(self.source, "last_wait", 0.0)
+
+    def _set_classifier(self, classifier: InferenceBackend) -> None:
+        self.classifier = classifier
+        # Frame-input models classify whole frames and replace MediaPipe entirely.
+        self.frame_model = getattr(classifier, "input_kind", "landmarks") == "frame"
+
+    def load_classifier(self) -> InferenceBackend:
+        if self.classifier is None:
+            self._set_classifier(self._classifier_factory())
+        return self.classifier
 
     def start(self) -> None:
-        if cv2 is None:
-            logger.error("OpenCV is required to start the camera")
+        if self._source_open:
             return
-        if self.camera_index < 0:
-            logger.info("Camera index < 0; skipping capture start")
+        self.load_classifier()
+        self._source_open = self.source.open()
+        if not self._source_open:
             return
-        self.cap = cv2.VideoCapture(self.camera_index)
-        if not self.cap.isOpened():
-            logger.error("Unable to open camera %s", self.camera_index)
-            self.cap = None
-            return
-        if mp is not None:
+        if mp and not self.frame_model:
             self._mp_hands = mp.solutions.hands.Hands(
                 static_image_mode=False,
                 max_num_hands=1,
@@ -50,81 +177,236 @@ class VisionService:
             )
 
     def stop(self) -> None:
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self._source_open:
+            self.source.close()
+            self._source_open = False
         if self._mp_hands:
             self._mp_hands.close()
             self._mp_hands = None
 
+    def warm_up(self) -> float:
+        """Run one inference on a blank frame so lazy graph setup doesn't hit the first real one.
+
+        Returns the seconds it took. Call after ``start``.
+        """
+        began = time.perf_counter()
+        height = getattr(self.source, "height", 0) or 480
+        width = getattr(self.source, "width", 0) or 640
+        frame = self.preprocess(np.zeros((height, width, 3), dtype=np.uint8))
+        self.extract_landmarks(frame)
+        self.frame_pool.release(frame)
+        self._roi = None
+        self.last_landmarks = None
+        if self.motion_gestures is not None:
+            self.motion_gestures.reset()
+        self.roi_hits = self.roi_misses = self.full_detections = 0
+        return time.perf_counter() - began
+
+    def set_quality(self, frame_scale: float = 1.0, input_scale: float = 1.0) -> None:
+        """Downscale frames by ``frame_scale`` in ``preprocess`` and shrink detector inputs by ``input_scale``."""
+        self.frame_scale = min(max(frame_scale, 0.1), 1.0)
+        self.input_scale = min(max(input_scale, 0.1), 1.0)
+
     def read_frame(self) -> Optional[np.ndarray]:
-        if not self.cap:
-            return None
-        ret, frame = self.cap.read()
-        if not ret:
+        """Next frame, in a pooled buffer when the source can fill one; ``frame_pool.release`` it when done."""
+        if not self._source_open:
             return None
+        out = self.frame_pool.acquire(self._frame_shape) if self._frame_shape else None
+        frame = self.source.read(out)
+        if frame is not out:
+            self.frame_pool.release(out)
+        if frame is not None:
+            self._frame_shape = frame.shape
         return frame
 
-    def preprocess(self, frame: np.ndarray) -> np.ndarray:
+    def _scratch_buffer(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        # Keyed by shape too: ROI crops and full-frame detections alternate sizes.
+        key = (name, shape)
+        buffer = self._scratch.get(key)
+        if buffer is None:
+            buffer = self._scratch[key] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def _preprocess_path(self) -> str:
+        if self.frame_model:
+            return "deferred"  # the model resizes and normalises frames itself
         # MediaPipe prefers near-original frames; use light blur to reduce noise.
-        if mp is not None and cv2 is not None:
-            return cv2.GaussianBlur(frame, (5, 5), 0)
-        if self.use_cpp_extension:
+        if mp and cv2:
+            # With ROI tracking the blur runs on the small crop inside extract_landmarks.
+            return "deferred" if self.roi_tracking else "opencv"
+        if self.use_cpp_extension and vision:
+            return "cpp"
+        return "opencv" if cv2 else "numpy"
+
+    def preprocess(self, frame: np.ndarray) -> np.ndarray:
+        """Preprocessed frame; a pooled buffer unless it is ``frame`` itself (deferred path)."""
+        path = self._preprocess_path()
+        scaled = self._downscale(frame) if self.frame_scale < 1.0 and cv2 else frame
+        if path == "deferred":
+            return scaled
+        try:
+            return self._preprocess_into(path, scaled)
+        finally:
+            if scaled is not frame:
+                self.frame_pool.release(scaled)
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        size = (max(int(width * self.frame_scale), 1), max(int(height * self.frame_scale), 1))
+        out = self.frame_pool.acquire((size[1], size[0]) + frame.shape[2:], frame.dtype)
+        cv2.resize(frame, size, dst=out, interpolation=cv2.INTER_AREA)
+        return out
+
+    def _preprocess_into(self, path: str, frame: np.ndarray) -> np.ndarray:
+        if path == "numpy":
+            return preprocess_numpy(frame)
+        out = self.frame_pool.acquire_like(frame)
+        if path == "cpp":
             try:
-                return vision.preprocess(frame)
+                return preprocess_cpp(frame, out=out)
             except Exception as exc:  # pragma: no cover - extension runtime guard
                 logger.warning("C++ extension failed, falling back to numpy/cv: %s", exc)
-        if cv2 is None:
-            return frame
-        return cv2.GaussianBlur(frame, (5, 5), 0)
+                if not cv2:
+                    self.frame_pool.release(out)
+                    return preprocess_numpy(frame)
+        return preprocess_opencv(frame, out=out)
+
+    def preprocess_batch(
+        self, frames: Union[np.ndarray, Sequence[np.ndarray]]
+    ) -> Union[np.ndarray, List[np.ndarray]]:
+        """Preprocess an N x H x W x C array (returns an array) or a list of frames (returns a list).
+
+        Uses the extension's parallel batch entry point when available, else
+        OpenCV per frame into one preallocated output, else one vectorized
+        NumPy pass. Each result matches ``preprocess`` on the same frame.
+        """
+        path = self._preprocess_path()
+        if path == "deferred":
+            return frames if isinstance(frames, np.ndarray) else list(frames)
+        if path == "cpp":
+            try:
+                return vision.preprocess_batch(frames if isinstance(frames, np.ndarray) else list(frames))
+            except Exception as exc:  # pragma: no cover - extension runtime guard
+                logger.warning("C++ batch preprocessing failed, falling back to numpy/cv: %s", exc)
+        if not isinstance(frames, np.ndarray):
+            fn = preprocess_opencv if cv2 else preprocess_numpy
+            return [fn(frame) for frame in frames]
+        if not cv2:
+            return preprocess_numpy(frames, batched=True)
+        out = np.empty_like(frames)
+        for i in range(len(frames)):
+            cv2.GaussianBlur(frames[i], (5, 5), 0, dst=out[i])
+        return out
 
     def extract_landmarks(self, frame: np.ndarray) -> Tuple[str, float]:
         """Return gesture label and confidence.
 
         Uses MediaPipe if available, otherwise returns a dummy prediction.
+        Detected landmarks are kept on ``last_landmarks`` as a (hands, 21, 3) array.
+        While a motion gesture is being reported it replaces the static pose.
         """
-        if mp is None or cv2 is None or self._mp_hands is None:
+        self.last_landmarks = None
+        if self.frame_model:
+            label_ids, confidences = self.classifier.classify(frame[None])
+            return LABEL_TABLE.labels[label_ids[0]], float(confidences[0])
+        if not mp or not cv2 or self._mp_hands is None:
             return "unknown", 0.0
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.roi_tracking:
+            hands = self._detect_tracked(frame)
+        elif self.input_scale < 1.0:
+            height, width = frame.shape[:2]
+            width, height = max(int(width * self.input_scale), 1), max(int(height * self.input_scale), 1)
+            hands = self._detect(self._to_rgb(self._resized(frame, width, height)))
+        else:
+            hands = self._detect(self._to_rgb(frame))
+        if hands is None:
+            return self._with_motion(None, "unknown", 0.0)
+        self.last_landmarks = hands
+        label_ids, confidences = self.classifier.classify(self.last_landmarks[:1])
+        return self._with_motion(hands, LABEL_TABLE.labels[label_ids[0]], float(confidences[0]))
+
+    def _with_motion(self, hands: Optional[np.ndarray], label: str, confidence: float) -> Tuple[str, float]:
+        if self.motion_gestures is None:
+            return label, confidence
+        motion = self.motion_gestures.update(hands)
+        return motion if motion is not None else (label, confidence)
+
+    def _to_rgb(self, image: np.ndarray) -> np.ndarray:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._scratch_buffer("rgb", image.shape))
+
+    def _detect(self, frame_rgb: np.ndarray) -> Optional[np.ndarray]:
         result = self._mp_hands.process(frame_rgb)
         if not result.multi_hand_landmarks:
-            return "unknown", 0.0
-        landmarks = result.multi_hand_landmarks[0]
-
-        # Landmark aliases
-        wrist = landmarks.landmark[0]
-        thumb_tip = landmarks.landmark[4]
-        index_tip = landmarks.landmark[8]
-        middle_tip = landmarks.landmark[12]
-        ring_tip = landmarks.landmark[16]
-        pinky_tip = landmarks.landmark[20]
-
-        def finger_extended(tip, base_idx: int) -> bool:
-            base = landmarks.landmark[base_idx]
-            return tip.y < base.y - 0.02
-
-        pinch_dist = abs(thumb_tip.x - index_tip.x) + abs(thumb_tip.y - index_tip.y)
-        thumb_up = thumb_tip.y < wrist.y - 0.05
-        thumb_down = thumb_tip.y > wrist.y + 0.08
-
-        index_ext = finger_extended(index_tip, 5)
-        middle_ext = finger_extended(middle_tip, 9)
-        ring_ext = finger_extended(ring_tip, 13)
-        pinky_ext = finger_extended(pinky_tip, 17)
-
-        extended_count = sum([index_ext, middle_ext, ring_ext, pinky_ext])
-
-        # Heuristic ordering
-        if pinch_dist < 0.1 and index_ext:
-            return "pinch", 0.85
-        if thumb_up and not index_ext and not middle_ext:
-            return "thumbs_up", 0.75
-        if thumb_down and not index_ext and not middle_ext:
-            return "thumbs_down", 0.75
-        if index_ext and not middle_ext and not ring_ext and not pinky_ext:
-            return "point", 0.7
-        if extended_count <= 1 and pinch_dist >= 0.1:
-            return "fist", 0.65
-        if extended_count >= 3:
-            return "open_hand", 0.65
-        return "unknown", 0.4
+            return None
+        return landmarks_to_array(result.multi_hand_landmarks)
+
+    def _resized(self, image: np.ndarray, width: int, height: int) -> np.ndarray:
+        if image.shape[1] == width and image.shape[0] == height:
+            return image
+        resized = self._scratch_buffer("resized", (height, width) + image.shape[2:])
+        return cv2.resize(image, (width, height), dst=resized, interpolation=cv2.INTER_AREA)
+
+    def _detect_resized(self, image: np.ndarray, width: int, height: int) -> Optional[np.ndarray]:
+        """Blur + RGB-convert a downscaled copy of ``image`` and detect on it."""
+        image = self._resized(image, width, height)
+        image = cv2.GaussianBlur(image, (5, 5), 0, dst=self._scratch_buffer("blurred", image.shape))
+        return self._detect(self._to_rgb(image))
+
+    def _detect_tracked(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """Detect inside the tracked ROI, falling back to (downscaled) full-frame detection."""
+        height, width = frame.shape[:2]
+        hands = None
+        if self._roi_frame != (height, width):
+            self._roi = None  # found at a different processing resolution
+        if self._roi is not None:
+            x0, y0, side = self._roi
+            crop = frame[y0 : y0 + side, x0 : x0 + side]
+            size = max(int(self.roi_input_size * self.input_scale), 32)
+            hands = self._detect_resized(crop, size, size)
+            if hands is not None:
+                # Crop-normalized -> full-frame-normalized coordinates.
+                hands[..., 0] = (x0 + hands[..., 0] * side) / width
+                hands[..., 1] = (y0 + hands[..., 1] * side) / height
+                hands[..., 2] *= side / width
+                self.roi_hits += 1
+            else:
+                self.roi_misses += 1
+        if hands is None:
+            scale = min(self.roi_detect_width / width, 1.0) if self.roi_detect_width > 0 else 1.0
+            scale *= self.input_scale
+            hands = self._detect_resized(frame, max(int(width * scale), 1), max(int(height * scale), 1))
+            self.full_detections += 1
+        self._roi = self._roi_around(hands[0], width, height) if hands is not None else None
+        self._roi_frame = (height, width)
+        return hands
+
+    def _roi_around(self, hand: np.ndarray, width: int, height: int) -> Tuple[int, int, int]:
+        """Square crop around a hand's landmarks, expanded by ``roi_margin`` and kept in frame."""
+        xs = hand[:, 0] * width
+        ys = hand[:, 1] * height
+        extent = max(float(xs.max() - xs.min()), float(ys.max() - ys.min()), 1.0)
+        side = int(min(max(extent * (1.0 + 2.0 * self.roi_margin), 32), min(width, height)))
+        cx, cy = float(xs.mean()), float(ys.mean())
+        x0 = int(min(max(cx - side / 2, 0), width - side))
+        y0 = int(min(max(cy - side / 2, 0), height - side))
+        return x0, y0, side
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "roi_tracking": self.roi_tracking,
+            "roi": list(self._roi) if self._roi else None,
+            "roi_hits": self.roi_hits,
+            "roi_misses": self.roi_misses,
+            "full_detections": self.full_detections,
+            "frame_scale": self.frame_scale,
+            "input_scale": self.input_scale,
+            "motion_gestures": self.motion_gestures.stats() if self.motion_gestures is not None else None,
+            "frame_pool": self.frame_pool.stats(),
+            "backend": self.classifier.stats()
+            if hasattr(self.classifier, "stats")
+            else type(self.classifier).__name__ if self.classifier is not None else None,
+        }
+
+    def classify_landmarks(self, landmarks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Classify many hands/frames at once; landmarks shaped (N, 21, 3)."""
+        return self.load_classifier().classify(landmarks)
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Tuple[str, Callable[[], object]]
+
+
+class Warmup:
+    """Runs named initialization steps on a background thread and reports progress.
+
+    Startup only has to schedule this, so the server answers HTTP as soon as
+    FastAPI is up while imports, model loading, camera open and the first
+    inference happen here. A failing step stops the sequence; ``status()``
+    says which one and why.
+    """
+
+    def __init__(self, steps: Sequence[WarmupStep]) -> None:
+        self._steps = list(steps)
+        self._status: List[Dict[str, object]] = [
+            {"name": name, "state": "pending", "duration_ms": None, "result": None, "error": None}
+            for name, _ in self._steps
+        ]
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self.state = "pending"  # pending | running | ready | failed
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.state = "running"
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every step has run (or one failed); True if ready."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def _run(self) -> None:
+        try:
+            for (name, step), status in zip(self._steps, self._status):
+                status["state"] = "running"
+                began = time.perf_counter()
+                try:
+                    result = step()
+                except Exception as exc:
+                    status.update(state="failed", error=str(exc))
+                    logger.error("Warm-up step %s failed: %s", name, exc)
+                    self.state = "failed"
+                    return
+                finally:
+                    status["duration_ms"] = (time.perf_counter() - began) * 1000.0
+                status.update(state="done", result=result)
+                logger.info("Warm-up step %s done in %.0f ms", name, status["duration_ms"])
+            self.state = "ready"
+        finally:
+            self.finished_at = time.monotonic()
+            self._done.set()
+
+    def status(self) -> Dict[str, object]:
+        end = self.finished_at or time.monotonic()
+        done = sum(1 for s in self._status if s["state"] == "done")
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "progress": done / len(self._status) if self._status else 1.0,
+            "elapsed_ms": (end - self.started_at) * 1000.0 if self.started_at else 0.0,
+            "steps": [dict(s) for s in self._status],
+        }
@@ -13,9 +13,12 @@ function App() {
       const data = await getGestureStatus();
       setStatus(data);
     })();
-    const ws = connectGestureStream((payload) => {
-      setStatus((prev) => ({ ...prev, latest: payload }));
-    });
+    const ws = connectGestureStream(
+      (payload) => {
+        setStatus((prev) => ({ ...prev, latest: payload }));
+      },
+      { mode: 'delta', encoding: 'binary' }
+    );
     return () => ws.close();
   }, []);
 
@@ -1,7 +1,9 @@
 import axios from 'axios';
 
 export const baseURL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
-export const api = axios.create({ baseURL });
+// Station this UI controls; each session has its own camera, mappings and stream.
+export const sessionId = import.meta.env.VITE_SESSION_ID || 'default';
+export const api = axios.create({ baseURL, params: { session: sessionId } });
 
 export type GestureStatus = {
   latest?: { label: string; confidence: number; timestamp: string };
@@ -11,8 +13,12 @@ export type GestureStatus = {
 export type GestureMapping = {
   gesture: string;
   action: string;
-  action_type: 'key' | 'shortcut' | 'macro';
+  action_type: 'key' | 'shortcut' | 'macro' | 'text';
   hold_ms?: number;
+  cooldown_ms?: number;
+  hold_to_repeat?: boolean;
+  repeat_delay_ms?: number;
+  repeat_interval_ms?: number;
 };
 
 export type MappingConfig = { mappings: GestureMapping[] };
@@ -41,13 +47,76 @@ export async function pressKey(mapping: GestureMapping) {
   await api.post('/api/keyboard/press', mapping);
 }
 
-export function connectGestureStream(onMessage: (payload: any) => void) {
+export type GestureUpdate = { label: string; confidence: number; timestamp: string };
+
+export type StreamOptions = {
+  // 'delta' receives only changes, batched per server tick; 'full' every prediction.
+  mode?: 'full' | 'delta';
+  encoding?: 'json' | 'binary';
+};
+
+const MSG_BATCH = 1;
+const HEADER_SIZE = 3; // u8 type, u16 count
+const UPDATE_SIZE = 18; // u32 seq, u16 label id, f32 confidence, f64 unix seconds
+
+type RawUpdate = [number, number, number, number]; // seq, label id, confidence, unix ms
+
+function decodeBinary(buffer: ArrayBuffer): { type: string; updates: RawUpdate[] } {
+  const view = new DataView(buffer);
+  const count = view.getUint16(1, true);
+  const updates: RawUpdate[] = [];
+  for (let i = 0; i < count; i += 1) {
+    const offset = HEADER_SIZE + i * UPDATE_SIZE;
+    updates.push([
+      view.getUint32(offset, true),
+      view.getUint16(offset + 4, true),
+      view.getFloat32(offset + 6, true),
+      view.getFloat64(offset + 10, true) * 1000,
+    ]);
+  }
+  return { type: view.getUint8(0) === MSG_BATCH ? 'batch' : 'heartbeat', updates };
+}
+
+export function connectGestureStream(
+  onMessage: (payload: GestureUpdate) => void,
+  options: StreamOptions = {}
+) {
+  const { mode = 'full', encoding = 'json' } = options;
   const wsBase = baseURL.replace(/^http/, 'ws');
-  const ws = new WebSocket(wsBase + '/ws/gestures');
+  const query = new URLSearchParams({ session: sessionId, mode, encoding });
+  const ws = new WebSocket(`${wsBase}/ws/gestures?${query}`);
+  ws.binaryType = 'arraybuffer';
+  let labels: string[] = [];
+
+  // Updates carry absolute state, so only the newest one in a batch matters.
+  const emit = (updates: RawUpdate[] | null | undefined) => {
+    const last = updates && updates[updates.length - 1];
+    if (!last) return;
+    const [, labelId, confidence, ts] = last;
+    onMessage({
+      label: labels[labelId] ?? String(labelId),
+      confidence,
+      timestamp: new Date(ts).toISOString(),
+    });
+  };
+
   ws.onmessage = (event) => {
     try {
+      if (event.data instanceof ArrayBuffer) {
+        emit(decodeBinary(event.data).updates);
+        return;
+      }
       const parsed = JSON.parse(event.data);
-      onMessage(parsed);
+      if (mode === 'full') {
+        onMessage(parsed);
+      } else if (parsed.type === 'hello') {
+        labels = parsed.labels;
+        emit(parsed.state ? [parsed.state] : null);
+      } else if (parsed.type === 'labels') {
+        labels = parsed.labels;
+      } else {
+        emit(parsed.updates);
+      }
     } catch (err) {
       console.error('Failed to parse gesture payload', err);
     }
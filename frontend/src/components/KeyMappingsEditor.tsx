@@ -7,6 +7,7 @@ export default function KeyMappingsEditor() {
   const [config, setConfig] = useState<MappingConfig>({ mappings: [] });
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
+  const [errors, setErrors] = useState<string[]>([]);
 
   useEffect(() => {
     (async () => {
@@ -31,8 +32,16 @@ export default function KeyMappingsEditor() {
 
   const handleSave = async () => {
     setSaving(true);
-    await saveMappings(config);
-    setSaving(false);
+    try {
+      await saveMappings(config);
+      setErrors([]);
+    } catch (err: any) {
+      // The backend compiles mappings on save and rejects unknown keys or bad macro steps.
+      const detail = err?.response?.data?.detail;
+      setErrors(Array.isArray(detail) ? detail.map((d: any) => (typeof d === 'string' ? d : d.msg)) : ['Save failed']);
+    } finally {
+      setSaving(false);
+    }
   };
 
   if (loading) return <div className="card">Loading mappings...</div>;
@@ -70,7 +79,7 @@ export default function KeyMappingsEditor() {
                 <input
                   value={m.action}
                   onChange={(e) => updateRow(idx, { action: e.target.value })}
-                  placeholder="space / ctrl+c / a,b,c"
+                  placeholder="space / ctrl+c / a, wait:100, text:hi"
                 />
               </td>
               <td>
@@ -81,6 +90,7 @@ export default function KeyMappingsEditor() {
                   <option value="key">Key</option>
                   <option value="shortcut">Shortcut</option>
                   <option value="macro">Macro</option>
+                  <option value="text">Text</option>
                 </select>
               </td>
               <td>
@@ -103,8 +113,17 @@ export default function KeyMappingsEditor() {
       </table>
       <div className="flex" style={{ marginTop: 12, justifyContent: 'space-between' }}>
         <button onClick={handleSave}>{saving ? 'Saving...' : 'Save mappings'}</button>
-        <span className="small">Macros use commas, shortcuts use plus signs.</span>
+        <span className="small">
+          Macros use commas: keys, chords (ctrl+c), wait:ms, down:key, up:key, text:"...".
+        </span>
       </div>
+      {errors.length > 0 && (
+        <div className="small" style={{ marginTop: 8, color: 'var(--danger)' }}>
+          {errors.map((e) => (
+            <div key={e}>{e}</div>
+          ))}
+        </div>
+      )}
     </div>
   );
 }
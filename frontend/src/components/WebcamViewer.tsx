@@ -1,29 +1,27 @@
 import { useEffect, useState } from 'react';
-import { baseURL } from '../api/client';
+import { baseURL, sessionId } from '../api/client';
 
 interface Props {
   active: boolean;
 }
 
+// Server pushes MJPEG; each frame is encoded once and shared by all viewers.
+const PREVIEW_WIDTH = 640;
+const PREVIEW_QUALITY = 70;
+
 export default function WebcamViewer({ active }: Props) {
   const [src, setSrc] = useState<string>('');
 
   useEffect(() => {
-    let timer: number | undefined;
     if (!active) {
       setSrc('');
       return () => {};
     }
-    const tick = () => {
-      const url = `${baseURL}/api/gesture/frame?ts=${Date.now()}`;
-      setSrc(url);
-    };
-    tick();
-    // Pull frames frequently for smoother preview (~20 fps default loop)
-    timer = window.setInterval(tick, 50);
-    return () => {
-      if (timer) window.clearInterval(timer);
-    };
+    // Unique query so a re-enabled preview opens a fresh stream instead of a cached one
+    setSrc(
+      `${baseURL}/api/gesture/preview.mjpg?session=${sessionId}&width=${PREVIEW_WIDTH}&quality=${PREVIEW_QUALITY}&ts=${Date.now()}`
+    );
+    return () => setSrc('');
   }, [active]);
 
   return (
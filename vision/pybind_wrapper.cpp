@@ -6,25 +6,143 @@
 
 namespace py = pybind11;
 
-py::array_t<uint8_t> preprocess(py::array_t<uint8_t> input) {
-  py::buffer_info buf = input.request();
-  if (buf.ndim != 3) {
-    throw std::runtime_error("Expected HxWxC array");
+using InputArray = py::array_t<uint8_t, py::array::c_style | py::array::forcecast>;
+
+namespace {
+cv::Mat wrap_input(const InputArray &input) {
+  if (input.ndim() == 2) {
+    return cv::Mat(static_cast<int>(input.shape(0)), static_cast<int>(input.shape(1)), CV_8UC1,
+                   const_cast<uint8_t *>(input.data()));
+  }
+  if (input.ndim() != 3) {
+    throw std::runtime_error("Expected HxW or HxWxC array");
   }
-  const int height = static_cast<int>(buf.shape[0]);
-  const int width = static_cast<int>(buf.shape[1]);
-  const int channels = static_cast<int>(buf.shape[2]);
+  const int channels = static_cast<int>(input.shape(2));
+  return cv::Mat(static_cast<int>(input.shape(0)), static_cast<int>(input.shape(1)), CV_8UC(channels),
+                 const_cast<uint8_t *>(input.data()));
+}
 
-  cv::Mat frame(height, width, CV_8UC(channels), buf.ptr);
-  cv::Mat output = vision_ext::preprocess_frame(frame);
+using OutputArray = py::array_t<uint8_t, py::array::c_style>;
 
-  auto result = py::array_t<uint8_t>({output.rows, output.cols, output.channels()});
-  py::buffer_info out_buf = result.request();
-  std::memcpy(out_buf.ptr, output.data, output.total() * output.elemSize());
+cv::Mat wrap_output(OutputArray &out, int rows, int cols, bool single_channel) {
+  if (!out.writeable()) {
+    throw std::runtime_error("Output array is read-only");
+  }
+  const bool shape_ok = single_channel
+                            ? (out.ndim() == 2 || (out.ndim() == 3 && out.shape(2) == 1))
+                            : (out.ndim() == 3 && out.shape(2) == 3);
+  if (!shape_ok || out.shape(0) != rows || out.shape(1) != cols) {
+    throw std::runtime_error("Output shape does not match input frame");
+  }
+  return cv::Mat(rows, cols, single_channel ? CV_8UC1 : CV_8UC3, out.mutable_data());
+}
+}  // namespace
+
+// Preprocess `input` into `out` (allocated here when not given) without intermediate copies.
+// The GIL is released while OpenCV runs, so Python threads keep making progress.
+OutputArray preprocess(const InputArray &input, py::object out, bool single_channel) {
+  cv::Mat frame = wrap_input(input);
+  OutputArray result;
+  if (out.is_none()) {
+    if (single_channel) {
+      result = OutputArray({frame.rows, frame.cols});
+    } else {
+      result = OutputArray({frame.rows, frame.cols, 3});
+    }
+  } else {
+    // isinstance checks dtype and layout without converting, so we never write into a copy.
+    if (!py::isinstance<OutputArray>(out)) {
+      throw std::runtime_error("Output must be a C-contiguous uint8 numpy array");
+    }
+    result = out.cast<OutputArray>();
+  }
+  cv::Mat output = wrap_output(result, frame.rows, frame.cols, single_channel);
+  {
+    py::gil_scoped_release release;
+    vision_ext::preprocess_frame_into(frame, output, single_channel);
+  }
   return result;
 }
 
+// Batch variant: `input` is an N x H x W [x C] array (result is one N x H x W [x 3] array)
+// or a list of frames (result is a list). Frames are processed in parallel across cores.
+py::object preprocess_batch(py::object input, py::object out, bool single_channel) {
+  std::vector<cv::Mat> frames, outputs;
+  if (py::isinstance<py::list>(input) || py::isinstance<py::tuple>(input)) {
+    std::vector<InputArray> inputs;
+    py::list results;
+    py::sequence seq = input.cast<py::sequence>();
+    py::sequence out_seq = out.is_none() ? py::sequence(py::list()) : out.cast<py::sequence>();
+    if (!out.is_none() && out_seq.size() != seq.size()) {
+      throw std::runtime_error("Output list length does not match input");
+    }
+    for (size_t i = 0; i < seq.size(); ++i) {
+      inputs.push_back(seq[i].cast<InputArray>());
+      frames.push_back(wrap_input(inputs.back()));
+      const cv::Mat &frame = frames.back();
+      OutputArray result;
+      if (out.is_none()) {
+        result = single_channel ? OutputArray({frame.rows, frame.cols}) : OutputArray({frame.rows, frame.cols, 3});
+      } else {
+        py::object item = out_seq[i];
+        if (!py::isinstance<OutputArray>(item)) {
+          throw std::runtime_error("Outputs must be C-contiguous uint8 numpy arrays");
+        }
+        result = item.cast<OutputArray>();
+      }
+      outputs.push_back(wrap_output(result, frame.rows, frame.cols, single_channel));
+      results.append(result);
+    }
+    {
+      py::gil_scoped_release release;
+      vision_ext::preprocess_batch_into(frames, outputs, single_channel);
+    }
+    return std::move(results);
+  }
+
+  InputArray batch = input.cast<InputArray>();
+  if (batch.ndim() != 3 && batch.ndim() != 4) {
+    throw std::runtime_error("Expected NxHxW or NxHxWxC array");
+  }
+  const int count = static_cast<int>(batch.shape(0));
+  const int rows = static_cast<int>(batch.shape(1));
+  const int cols = static_cast<int>(batch.shape(2));
+  const int channels = batch.ndim() == 4 ? static_cast<int>(batch.shape(3)) : 1;
+  OutputArray result;
+  if (out.is_none()) {
+    result = single_channel ? OutputArray({count, rows, cols}) : OutputArray({count, rows, cols, 3});
+  } else {
+    if (!py::isinstance<OutputArray>(out)) {
+      throw std::runtime_error("Output must be a C-contiguous uint8 numpy array");
+    }
+    result = out.cast<OutputArray>();
+  }
+  const int out_channels = single_channel ? 1 : 3;
+  const bool shape_ok = result.shape(0) == count && result.shape(1) == rows && result.shape(2) == cols &&
+                        (single_channel ? (result.ndim() == 3 || (result.ndim() == 4 && result.shape(3) == 1))
+                                        : (result.ndim() == 4 && result.shape(3) == 3));
+  if (!shape_ok || !result.writeable()) {
+    throw std::runtime_error("Output batch shape does not match input");
+  }
+  const size_t in_stride = static_cast<size_t>(rows) * cols * channels;
+  const size_t out_stride = static_cast<size_t>(rows) * cols * out_channels;
+  uint8_t *in_data = const_cast<uint8_t *>(batch.data());
+  uint8_t *out_data = result.mutable_data();
+  for (int i = 0; i < count; ++i) {
+    frames.emplace_back(rows, cols, CV_8UC(channels), in_data + i * in_stride);
+    outputs.emplace_back(rows, cols, single_channel ? CV_8UC1 : CV_8UC3, out_data + i * out_stride);
+  }
+  {
+    py::gil_scoped_release release;
+    vision_ext::preprocess_batch_into(frames, outputs, single_channel);
+  }
+  return std::move(result);
+}
+
 PYBIND11_MODULE(vision, m) {
   m.doc() = "Fast preprocessing extension for Local AI Vision Keyboard";
-  m.def("preprocess", &preprocess, "Preprocess frame for gesture detection");
+  m.def("preprocess", &preprocess, "Preprocess frame for gesture detection", py::arg("input"),
+        py::arg("out") = py::none(), py::arg("single_channel") = false);
+  m.def("preprocess_batch", &preprocess_batch, "Preprocess a batch of frames in parallel", py::arg("input"),
+        py::arg("out") = py::none(), py::arg("single_channel") = false);
 }
@@ -1,14 +1,76 @@
 #include "vision.h"
 
+#include <exception>
+#include <mutex>
+#include <stdexcept>
+
 #include <opencv2/imgproc.hpp>
 
 namespace vision_ext {
+namespace {
+struct Scratch {
+  cv::Mat gray;
+  cv::Mat blurred;
+  cv::Mat edges;
+};
+
+Scratch &scratch() {
+  thread_local Scratch s;
+  return s;
+}
+}  // namespace
+
 cv::Mat preprocess_frame(const cv::Mat &frame) {
-  cv::Mat gray, blurred, edges, merged;
-  cv::cvtColor(frame, gray, cv::COLOR_BGR2GRAY);
-  cv::GaussianBlur(gray, blurred, cv::Size(3, 3), 0);
-  cv::Canny(blurred, edges, 30, 90);
-  cv::cvtColor(edges, merged, cv::COLOR_GRAY2BGR);
+  cv::Mat merged(frame.rows, frame.cols, CV_8UC3);
+  preprocess_frame_into(frame, merged, false);
   return merged;
 }
+
+void preprocess_frame_into(const cv::Mat &frame, cv::Mat &out, bool single_channel) {
+  const int out_type = single_channel ? CV_8UC1 : CV_8UC3;
+  if (out.rows != frame.rows || out.cols != frame.cols || out.type() != out_type) {
+    throw std::invalid_argument("Output buffer has the wrong shape or type");
+  }
+  Scratch &s = scratch();
+  const uchar *out_data = out.data;
+
+  const cv::Mat *gray = &frame;
+  if (frame.channels() == 3) {
+    cv::cvtColor(frame, s.gray, cv::COLOR_BGR2GRAY);
+    gray = &s.gray;
+  } else if (frame.channels() == 4) {
+    cv::cvtColor(frame, s.gray, cv::COLOR_BGRA2GRAY);
+    gray = &s.gray;
+  }
+  cv::GaussianBlur(*gray, s.blurred, cv::Size(3, 3), 0);
+  if (single_channel) {
+    cv::Canny(s.blurred, out, 30, 90);
+  } else {
+    cv::Canny(s.blurred, s.edges, 30, 90);
+    cv::cvtColor(s.edges, out, cv::COLOR_GRAY2BGR);
+  }
+  if (out.data != out_data) {
+    throw std::runtime_error("OpenCV reallocated the caller-provided output buffer");
+  }
+}
+
+void preprocess_batch_into(const std::vector<cv::Mat> &frames, std::vector<cv::Mat> &outs,
+                           bool single_channel) {
+  if (frames.size() != outs.size()) {
+    throw std::invalid_argument("Frame and output counts differ");
+  }
+  std::exception_ptr error;
+  std::mutex error_mutex;
+  cv::parallel_for_(cv::Range(0, static_cast<int>(frames.size())), [&](const cv::Range &range) {
+    for (int i = range.start; i < range.end; ++i) {
+      try {
+        preprocess_frame_into(frames[i], outs[i], single_channel);
+      } catch (...) {
+        std::lock_guard<std::mutex> lock(error_mutex);
+        if (!error) error = std::current_exception();
+      }
+    }
+  });
+  if (error) std::rethrow_exception(error);
+}
 }  // namespace vision_ext
@@ -1,7 +1,19 @@
 #pragma once
 
+#include <vector>
+
 #include <opencv2/core.hpp>
 
 namespace vision_ext {
 cv::Mat preprocess_frame(const cv::Mat &frame);
+
+// Writes the edge map into `out`, which must already be allocated as HxW CV_8UC1
+// (single_channel) or CV_8UC3. Intermediate Mats are thread-local and reused
+// across calls, so steady-state processing performs no heap allocations.
+void preprocess_frame_into(const cv::Mat &frame, cv::Mat &out, bool single_channel);
+
+// Runs preprocess_frame_into over frames[i] -> outs[i] with cv::parallel_for_.
+// Each worker thread uses its own scratch Mats.
+void preprocess_batch_into(const std::vector<cv::Mat> &frames, std::vector<cv::Mat> &outs,
+                           bool single_channel);
 }